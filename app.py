@@ -1,14 +1,34 @@
+import json
+import logging
 import os
 from flask import Flask, render_template, request, jsonify, send_file
 from werkzeug.utils import secure_filename
 from utils.sie_parser import SIEParser
 from utils.data_processor import add_description
 from utils.data_model import SIEDataModel
+from utils.sie_serializer import dumps, iter_model_json, iter_model_ndjson, model_to_json
+from utils.model_store import ModelStore
+
+logging.basicConfig(
+    level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+    format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+)
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16 MB max upload
 app.config['ALLOWED_EXTENSIONS'] = {'se', 'sie'}
+app.config['STORED_FILES_MAX'] = int(os.environ.get('STORED_FILES_MAX', 8))  # Parsed files kept for paging
+app.config['STORED_FILES_TTL'] = int(os.environ.get('STORED_FILES_TTL', 3600))  # Seconds after last use
+app.config['MAX_PAGE_SIZE'] = 1000
+
+# Response formats of /upload besides the default buffered JSON
+STREAM_FORMATS = ('json', 'ndjson')
+UPLOAD_MESSAGE = 'File successfully processed'
+
+# Parsed files of uploads with store=true, by file id
+model_store = ModelStore(app.config['STORED_FILES_MAX'], app.config['STORED_FILES_TTL'])
 
 # Create upload directory if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -24,6 +44,20 @@ def index():
 def test():
     return render_template('test.html')
 
+def _stream_upload(data_model, stream):
+    """Body of a streamed /upload response, see iter_model_json() and iter_model_ndjson()."""
+    try:
+        if stream == 'ndjson':
+            yield from iter_model_ndjson(data_model, header={'status': 'success', 'message': UPLOAD_MESSAGE})
+        else:
+            yield b'{"status":"success","message":"' + UPLOAD_MESSAGE.encode() + b'","data":'
+            yield from iter_model_json(data_model, verifications_last=True)
+            yield b'}'
+    except Exception:
+        # The status line is already sent; the client sees a truncated body
+        logger.exception("Error while streaming the response")
+        raise
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
     if 'file' not in request.files:
@@ -34,6 +68,12 @@ def upload_file():
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
     
+    # Stream the response instead of building it in memory: 'json' (one
+    # object, verifications last) or 'ndjson' (one verification per line)
+    stream = request.form.get('stream', '').lower()
+    if stream and stream not in STREAM_FORMATS:
+        return jsonify({'error': f"Invalid stream format, expected one of {', '.join(STREAM_FORMATS)}"}), 400
+    
     if file and allowed_file(file.filename):
         try:
             # Secure the filename
@@ -47,99 +87,81 @@ def upload_file():
             # Save the file temporarily
             file.save(file_path)
             
-            print(f"File saved to {file_path}")
+            logger.debug("File saved to %s", file_path)
             
-            # Parse the SIE file
+            # Parse the SIE file; balances_only skips the verifications
+            balances_only = request.form.get('balances_only', '').lower() in ('1', 'true', 'yes', 'on')
             parser = SIEParser(file_path)
-            sie_data = parser.parse()
+            data_model = parser.parse_model(balances_only=balances_only)
             
-            if sie_data is None:
-                print("Parser returned None")
+            if data_model is None:
+                logger.warning("Parser returned None for %s", filename)
                 return jsonify({
                     'status': 'error',
                     'error': 'Failed to parse SIE file. The file may be corrupted or in an unsupported format.'
                 }), 400
             
-            # Add detailed logging about the parsed data
-            print(f"SIE data keys: {sie_data.keys() if isinstance(sie_data, dict) else 'Not a dictionary'}")
-            
-            # Check for result data
-            print("Checking for result data:")
-            if 'results' in sie_data and sie_data['results']:
-                print(f"Results keys: {sie_data['results'].keys()}")
-                for year, year_data in sie_data['results'].items():
-                    print(f"Year {year} has {len(year_data)} result entries")
-                    for acc, value in list(year_data.items())[:5]:  # Show first 5 entries
-                        print(f"  Account {acc}: {value}")
+            # Log the results found; without #RES records there are none to recover
+            if data_model.results:
+                if logger.isEnabledFor(logging.DEBUG):
+                    for year, year_data in data_model.results.items():
+                        logger.debug("Year %s has %d result entries", year, len(year_data))
             else:
-                print("WARNING: No results data found in SIE data!")
-                # If we still don't have results, try to parse the file again with the raw parser
-                print("Attempting to recover results data...")
-                try:
-                    parser = SIEParser(file_path)
-                    raw_data = parser.parse_raw()  # Parse without converting to data model
-                    if raw_data and 'res' in raw_data and raw_data['res']:
-                        print(f"Raw RES data found: {raw_data['res']}")
-                        # Convert raw RES data to the expected format
-                        results_data = {}
-                        for year, accounts in raw_data['res'].items():
-                            if year not in results_data:
-                                results_data[year] = {}
-                            for acc_num, amount in accounts.items():
-                                results_data[year][acc_num] = {
-                                    'account': acc_num,
-                                    'amount': float(amount),
-                                    'year': year
-                                }
-                        # Add the recovered results to the sie_data
-                        if results_data:
-                            print(f"Adding recovered results data: {results_data}")
-                            sie_data['results'] = results_data
-                    else:
-                        print("No 'res' data found in raw parser data either!")
-                except Exception as e:
-                    print(f"Error recovering results data: {e}")
-                    import traceback
-                    print(traceback.format_exc())
-            
-            # The data is already processed through our standardized model
-            # No need for additional processing
-            
-            # Debug the data being sent to the frontend
-            print("=== DATA BEING SENT TO FRONTEND ===")
-            import json
-            print("Balance Sheet:", json.dumps(sie_data.get('balance_sheet', {}), indent=2, default=str))
-            print("Income Statement:", json.dumps(sie_data.get('income_statement', {}), indent=2, default=str))
-            print("Opening Balances:", json.dumps(sie_data.get('opening_balances', {}), indent=2, default=str))
-            print("Results:", json.dumps(sie_data.get('results', {}), indent=2, default=str))
-            print("Account Types:", {acc_num: acc.get('type', '') for acc_num, acc in sie_data.get('accounts', {}).items()})
-            print("=== END OF DATA ===")
+                logger.info("No results data found in %s", filename)
             
             # Clean up: Remove the temporary file at the end of processing
             if os.path.exists(file_path):
                 try:
                     os.remove(file_path)
-                    print(f"Temporary file {file_path} removed successfully")
                 except Exception as e:
-                    print(f"Warning: Could not remove temporary file {file_path}: {e}")
+                    logger.warning("Could not remove temporary file %s: %s", file_path, e)
             
-            return jsonify({
-                'status': 'success',
-                'data': sie_data,
-                'message': 'File successfully processed'
-            })
+            # Keep the model and send only a summary; the verifications are paged
+            if request.form.get('store', '').lower() in ('1', 'true', 'yes', 'on'):
+                file_id = model_store.add(data_model)
+                logger.info("Stored %s as file %s", filename, file_id)
+                header = dumps({
+                    'status': 'success',
+                    'message': UPLOAD_MESSAGE,
+                    'file_id': file_id,
+                    'verification_count': data_model.table.n_verifications,
+                    'transaction_count': len(data_model.table),
+                })
+                return app.response_class(
+                    header[:-1] + b',"data":' + model_to_json(data_model, include_verifications=False) + b'}',
+                    mimetype='application/json'
+                )
+            
+            if stream:
+                # The body is written while it is sent; only the model stays in memory
+                logger.debug("Streaming %s response for %s", stream, filename)
+                return app.response_class(
+                    _stream_upload(data_model, stream),
+                    mimetype='application/x-ndjson' if stream == 'ndjson' else 'application/json'
+                )
+            
+            # Written straight from the model, without building the dict
+            data_json = model_to_json(data_model)
+            
+            # Debug the data being sent to the frontend; only serialized when enabled
+            if logger.isEnabledFor(logging.DEBUG):
+                sie_data = json.loads(data_json)
+                for key in ('balance_sheet', 'income_statement', 'opening_balances', 'results'):
+                    logger.debug("%s: %s", key, json.dumps(sie_data.get(key, {}), indent=2, default=str))
+            
+            return app.response_class(
+                b'{"status":"success","data":' + data_json + b',"message":"' + UPLOAD_MESSAGE.encode() + b'"}',
+                mimetype='application/json'
+            )
         except Exception as e:
-            import traceback
-            print(f"Error processing file: {e}")
-            print(traceback.format_exc())
+            logger.exception("Error processing file")
             
             # Clean up: Remove the temporary file if there was an error
             if 'file_path' in locals() and os.path.exists(file_path):
                 try:
                     os.remove(file_path)
-                    print(f"Temporary file {file_path} removed after error")
                 except Exception as cleanup_error:
-                    print(f"Warning: Could not remove temporary file after error: {cleanup_error}")
+                    logger.warning("Could not remove temporary file after error: %s", cleanup_error)
             
             return jsonify({
                 'status': 'error',
@@ -148,6 +170,136 @@ def upload_file():
     
     return jsonify({'error': 'Invalid file type'}), 400
 
+@app.route('/trial-balance', methods=['POST'])
+def trial_balance():
+    """
+    Trial balance (råbalans) of an uploaded SIE file as of a date.
+
+    Parses the whole file for one query; for repeated queries, upload with
+    store=true and use /files/<file_id>/trial-balance. Form fields: file, end_date (YYYY-MM-DD, YYYYMMDD or YYYY-MM for the
+    month end) and optionally start_date (defaults to the fiscal year start).
+    """
+    file = request.files.get('file')
+    if file is None or file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+    if not allowed_file(file.filename):
+        return jsonify({'error': 'Invalid file type'}), 400
+    end_date = request.form.get('end_date', '')
+    if not end_date:
+        return jsonify({'error': 'Missing end_date'}), 400
+
+    temp_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'temp')
+    os.makedirs(temp_dir, exist_ok=True)
+    file_path = os.path.join(temp_dir, secure_filename(file.filename))
+    file.save(file_path)
+    try:
+        data_model = SIEParser(file_path).parse_model()
+        if data_model is None:
+            return jsonify({
+                'status': 'error',
+                'error': 'Failed to parse SIE file. The file may be corrupted or in an unsupported format.'
+            }), 400
+        try:
+            result = data_model.trial_balance(end_date, request.form.get('start_date') or None)
+        except ValueError as e:
+            return jsonify({'status': 'error', 'error': str(e)}), 400
+        return jsonify({'status': 'success', 'data': result})
+    finally:
+        try:
+            os.remove(file_path)
+        except OSError as e:
+            logger.warning("Could not remove temporary file %s: %s", file_path, e)
+
+def _page_args():
+    """Paging and filter arguments from the query string (ValueError if malformed)."""
+    args = request.args
+    return {
+        'offset': int(args.get('offset', 0)),
+        'limit': min(int(args.get('limit', 100)), app.config['MAX_PAGE_SIZE']),
+        'series': args.get('series') or None,
+        'start_date': args.get('start_date') or None,
+        'end_date': args.get('end_date') or None,
+    }
+
+@app.route('/files/<file_id>/verifications')
+def file_verifications(file_id):
+    """
+    One page of a stored file's verifications.
+
+    Query parameters: offset, limit (at most MAX_PAGE_SIZE), and optionally
+    series, start_date and end_date (YYYY-MM-DD, YYYYMMDD or YYYY-MM).
+    """
+    data_model = model_store.get(file_id)
+    if data_model is None:
+        return jsonify({'error': 'File not found'}), 404
+    try:
+        page = data_model.verification_page(**_page_args())
+    except ValueError as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 400
+    return app.response_class(dumps({'status': 'success', 'data': page}), mimetype='application/json')
+
+@app.route('/files/<file_id>/transactions')
+def file_transactions(file_id):
+    """
+    One page of a stored file's transactions.
+
+    Query parameters as for the verifications, plus account.
+    """
+    data_model = model_store.get(file_id)
+    if data_model is None:
+        return jsonify({'error': 'File not found'}), 404
+    try:
+        page = data_model.transaction_page(account=request.args.get('account') or None, **_page_args())
+    except ValueError as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 400
+    return app.response_class(dumps({'status': 'success', 'data': page}), mimetype='application/json')
+
+@app.route('/files/<file_id>/ledger/<account>')
+def file_ledger(file_id, account):
+    """
+    One page of an account's general ledger in a stored file, with running balances.
+
+    Query parameters: offset and limit (at most MAX_PAGE_SIZE).
+    """
+    data_model = model_store.get(file_id)
+    if data_model is None:
+        return jsonify({'error': 'File not found'}), 404
+    if account not in data_model.accounts and not len(data_model.table.account_rows(account)):
+        return jsonify({'error': 'Account not found'}), 404
+    try:
+        page_args = _page_args()
+        ledger = data_model.general_ledger(account, page_args['offset'], page_args['limit'])
+    except ValueError as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 400
+    return app.response_class(dumps({'status': 'success', 'data': ledger}), mimetype='application/json')
+
+@app.route('/files/<file_id>/trial-balance')
+def file_trial_balance(file_id):
+    """
+    Trial balance (råbalans) of a stored file as of a date.
+
+    Query parameters: end_date (YYYY-MM-DD, YYYYMMDD or YYYY-MM for the
+    month end) and optionally start_date (defaults to the fiscal year start).
+    The date index is built on the first request and reused by later ones.
+    """
+    data_model = model_store.get(file_id)
+    if data_model is None:
+        return jsonify({'error': 'File not found'}), 404
+    end_date = request.args.get('end_date', '')
+    if not end_date:
+        return jsonify({'error': 'Missing end_date'}), 400
+    try:
+        result = data_model.trial_balance(end_date, request.args.get('start_date') or None)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 400
+    return app.response_class(dumps({'status': 'success', 'data': result}), mimetype='application/json')
+
+@app.route('/files/<file_id>', methods=['DELETE'])
+def delete_file(file_id):
+    if not model_store.remove(file_id):
+        return jsonify({'error': 'File not found'}), 404
+    return jsonify({'status': 'success'})
+
 @app.route('/add-description', methods=['POST'])
 def add_file_description():
     data = request.json
@@ -174,7 +326,6 @@ def save_json():
     filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
     
     with open(filepath, 'w', encoding='utf-8') as f:
-        import json
         json.dump(data['data'], f, ensure_ascii=False, indent=2)
     
     return jsonify({
@@ -0,0 +1,55 @@
+"""
+Benchmark: deriving account totals, balance sheet and income statement from
+the cached per-year totals versus recomputing them for every call.
+
+"uncached" calls SIEDataModel.invalidate_aggregates() before each step, so
+every step walks the transaction table again, as the model did before the
+totals were memoised.
+
+    python benchmarks/bench_aggregation.py [n_verifications]
+"""
+
+import os
+import sys
+import tempfile
+
+from sie_fixtures import best_time, write_sie_file
+from utils.sie_parser import SIEParser
+
+
+def statements(model, invalidate):
+    steps = (model.account_totals_ore, model.get_balance_sheet, model.get_income_statement)
+    results = []
+    for step in steps:
+        if invalidate:
+            model.invalidate_aggregates()
+        results.append(step())
+    return results
+
+
+def main():
+    n_verifications = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_sie_file(os.path.join(tmp, 'bench.se'), n_verifications)
+        parser = SIEParser(path)
+        parser._build_model(parser.iter_records(use_mmap=True))
+        model = parser.data_model
+
+    print(f"{n_verifications} verifications, {len(model.table)} transaction rows")
+    print("\n                  ms")
+    uncached_time, expected = best_time(statements, model, True)
+    print(f"uncached     {uncached_time * 1e3:8.1f}")
+
+    def cached():
+        # One aggregation pass, then every step reads the cached totals
+        model.invalidate_aggregates()
+        return statements(model, False)
+
+    cached_time, result = best_time(cached)
+    assert result == expected
+    print(f"cached       {cached_time * 1e3:8.1f}  x{uncached_time / cached_time:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""
+Benchmark: balances-only parsing versus the full parse.
+
+SIEParser.parse(balances_only=True) reads metadata, accounts and the
+#IB/#UB/#RES records and skips the #VER blocks without tokenizing them.
+
+    python benchmarks/bench_balances_only.py [n_verifications]
+"""
+
+import logging
+import os
+import sys
+import tempfile
+
+from sie_fixtures import best_time, write_sie_file
+from utils.sie_parser import SIEParser
+
+
+def main():
+    n_verifications = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    logging.disable(logging.INFO)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_sie_file(os.path.join(tmp, 'bench.se'), n_verifications)
+        size_mb = os.path.getsize(path) / 1e6
+        full_time, full = best_time(lambda: SIEParser(path).parse(), repeat=3)
+        fast_time, fast = best_time(lambda: SIEParser(path).parse(balances_only=True), repeat=3)
+    
+    assert fast['accounts'] == full['accounts']
+    assert fast['closing_balances']['0'] == full['closing_balances']['0']
+    assert not fast['verifications']
+    
+    print(f"{size_mb:.1f} MB file, {n_verifications} verifications")
+    print(f"full parse:     {full_time * 1e3:9.1f} ms")
+    print(f"balances only:  {fast_time * 1e3:9.1f} ms  (x{full_time / fast_time:.0f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark: building the data model directly while parsing versus collecting
+the verifications in the parser first and converting them afterwards.
+
+"two-step" is how parse() worked before the builder API: every Verification
+is kept in parser.data and then copied into the data model's transaction
+table. "direct" feeds each record into the data model as
+it is read. Each variant runs in its own subprocess; the numbers cover
+building the model and its aggregates, not serialising it.
+
+    python benchmarks/bench_builder.py [n_verifications]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from sie_fixtures import write_sie_file
+from utils.sie_parser import SIEParser
+
+
+def measure(path, variant):
+    """Build the data model for path in this process and print peak bytes and seconds."""
+    parser = SIEParser(path)
+    tracemalloc.start()
+    started = time.perf_counter()
+    if variant == 'two-step':
+        parser._consume_records(parser.iter_records(use_mmap=True))
+        parser.data_model.from_parser_data(parser.data)
+        parser.data_model.resolve_account_names(force=True)
+        parser._calculate_table_aggregates()
+    else:
+        parser._build_model(parser.iter_records(use_mmap=True))
+        parser._calculate_table_aggregates()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    print(peak, elapsed)
+
+
+def run_variant(path, variant):
+    output = subprocess.run(
+        [sys.executable, __file__, '--measure', path, variant],
+        check=True, capture_output=True, text=True
+    ).stdout.split()
+    return int(output[0]), float(output[1])
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--measure':
+        measure(sys.argv[2], sys.argv[3])
+        return
+
+    n_verifications = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_sie_file(os.path.join(tmp, 'bench.se'), n_verifications)
+        print(f"{os.path.getsize(path) / 1e6:.1f} MB file, {n_verifications} verifications")
+        print("\nvariant       peak MB   seconds")
+        for variant in ('two-step', 'direct'):
+            peak, elapsed = run_variant(path, variant)
+            print(f"{variant:<10} {peak / 1e6:10.1f} {elapsed:9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: columnar TransactionTable versus a list of Verification and
+Transaction objects.
+
+Measures the memory held by each representation of the same parsed file
+and the time to sum amounts per account (the core of
+SIEDataModel.calculate_account_balances), with the array and, if it is
+installed, the NumPy backend.
+
+    python benchmarks/bench_columnar.py [n_verifications]
+"""
+
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from sie_fixtures import best_time, write_sie_file
+from utils.sie_parser import SIEParser
+from utils.transaction_table import TransactionTable, VerificationSequence, np
+
+
+def object_sums(verifications, year):
+    """Per-account sums over objects, as calculate_account_balances did before the table."""
+    sums = {}
+    for verification in verifications:
+        if verification.date and verification.date.startswith(year):
+            for transaction in verification.transactions:
+                sums[transaction.account] = sums.get(transaction.account, 0) + transaction.amount_ore
+    return sums
+
+
+def table_sums(table, year):
+    """Per-account sums of one year, as SIEDataModel.account_totals_ore(year) takes them."""
+    sums, counts = table.sum_by_year_and_account()[year]
+    return {account: sums[i] for i, account in enumerate(table.accounts) if counts[i]}
+
+
+def main():
+    n_verifications = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_sie_file(os.path.join(tmp, 'bench.se'), n_verifications)
+        
+        tracemalloc.start()
+        parser = SIEParser(path)
+        parser._consume_records(parser.iter_records())
+        verifications = parser.data['verifications']
+        del parser
+        gc.collect()
+        objects_size, _ = tracemalloc.get_traced_memory()
+        
+        table = TransactionTable(use_numpy=False)
+        sequence = VerificationSequence(table)
+        for verification in verifications:
+            sequence.append(verification)
+        n_rows = len(table)
+        del verifications, sequence
+        gc.collect()
+        table_size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    
+    print(f"{n_verifications} verifications, {n_rows} transaction rows")
+    print("\nmemory            MB    bytes/row")
+    print(f"objects      {objects_size / 1e6:8.1f} {objects_size / n_rows:10.0f}")
+    print(f"table        {table_size / 1e6:8.1f} {table_size / n_rows:10.0f}")
+    
+    # Rebuild the objects (outside tracemalloc) for the timing comparison
+    year = table.ver_date[0][:4]
+    views = list(VerificationSequence(table))
+    object_time, expected = best_time(object_sums, views, year)
+    print("\nsum per account   ms")
+    print(f"objects      {object_time * 1e3:8.1f}")
+    array_time, result = best_time(table_sums, table, year)
+    assert result == expected
+    print(f"table/array  {array_time * 1e3:8.1f}  x{object_time / array_time:.1f}")
+    if np is not None:
+        table.use_numpy = True
+        numpy_time, result = best_time(table_sums, table, year)
+        assert result == expected
+        print(f"table/numpy  {numpy_time * 1e3:8.1f}  x{object_time / numpy_time:.1f}")
+    else:
+        print("table/numpy  (NumPy not installed)")
+
+
+if __name__ == '__main__':
+    main()
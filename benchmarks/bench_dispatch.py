@@ -0,0 +1,114 @@
+"""
+Benchmark: per-line record dispatch cost.
+
+Compares the old sequential line.startswith('#...') elif chain with the
+label lookup used by SIEParser.iter_records() on a transaction-heavy file.
+Handlers are no-ops so only the routing cost is measured.
+
+    python benchmarks/bench_dispatch.py [n_verifications]
+"""
+
+import sys
+
+from sie_fixtures import best_time, sie_lines
+from utils.sie_parser import SIEParser
+
+PREFIXES = [
+    '#FLAGGA', '#PROGRAM', '#FORMAT', '#GEN', '#SIETYP', '#RAR', '#FNAMN',
+    '#ORGNR', '#ADRESS', '#KPTYP', '#KONTO', '#SRU', '#IB', '#UB', '#RES',
+    '#VER', '#TRANS', '#RTRANS', '#BTRANS',
+]
+
+
+def noop(*args):
+    return None
+
+
+def dispatch_chain(lines):
+    """The routing previously used by parse() and parse_raw()."""
+    hits = 0
+    for line in lines:
+        if line.startswith('#FLAGGA'):
+            noop(line)
+        elif line.startswith('#PROGRAM'):
+            noop(line)
+        elif line.startswith('#FORMAT'):
+            noop(line)
+        elif line.startswith('#GEN'):
+            noop(line)
+        elif line.startswith('#SIETYP'):
+            noop(line)
+        elif line.startswith('#RAR'):
+            noop(line)
+        elif line.startswith('#FNAMN'):
+            noop(line)
+        elif line.startswith('#ORGNR'):
+            noop(line)
+        elif line.startswith('#ADRESS'):
+            noop(line)
+        elif line.startswith('#KPTYP'):
+            noop(line)
+        elif line.startswith('#KONTO'):
+            noop(line)
+        elif line.startswith('#SRU'):
+            noop(line)
+        elif line.startswith('#IB'):
+            noop(line)
+        elif line.startswith('#UB'):
+            noop(line)
+        elif line.startswith('#RES'):
+            noop(line)
+        elif line.startswith('#VER') or line.startswith('VER '):
+            noop(line)
+        elif line.startswith('#TRANS'):
+            hits += 1
+        elif line.startswith('#RTRANS'):
+            noop(line)
+        elif line.startswith('#BTRANS'):
+            noop(line)
+        elif line.startswith('{'):
+            noop(line)
+        elif line.startswith('}'):
+            noop(line)
+    return hits
+
+
+def dispatch_table(lines):
+    """The label lookup used by SIEParser.iter_records()."""
+    record_handlers = {label: noop for label in SIEParser.RECORD_HANDLERS}
+    row_handlers = {label: noop for label in SIEParser.ROW_HANDLERS}
+    hits = 0
+    for line in lines:
+        if line[0] == '#':
+            label = line.split(None, 1)[0]
+            row_handler = row_handlers.get(label)
+            if row_handler is not None:
+                hits += label == '#TRANS'
+            elif label == '#VER':
+                noop(line)
+            else:
+                handler = record_handlers.get(label)
+                if handler is not None:
+                    handler(line)
+        elif line[0] == '{':
+            noop(line)
+        elif line[0] == '}':
+            noop(line)
+    return hits
+
+
+def main():
+    n_verifications = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    lines = sie_lines(n_verifications)
+    assert dispatch_chain(lines) == dispatch_table(lines)
+    
+    chain, _ = best_time(dispatch_chain, lines)
+    table, _ = best_time(dispatch_table, lines)
+    print(f"{len(lines)} lines ({n_verifications} verifications)")
+    print(f"startswith chain: {chain * 1e9 / len(lines):8.1f} ns/line")
+    print(f"label table:      {table * 1e9 / len(lines):8.1f} ns/line")
+    print(f"speedup:          {chain / table:8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+Benchmark: one general-ledger page through the posting index versus scanning
+every verification for the account's transactions.
+
+    python benchmarks/bench_ledger.py [n_verifications]
+"""
+
+import os
+import sys
+import tempfile
+
+from sie_fixtures import best_time, write_sie_file
+from utils.sie_parser import SIEParser
+
+
+def scan_postings(model, account):
+    """The account's transactions found by walking all verifications."""
+    return [
+        transaction
+        for verification in model.verifications
+        for transaction in verification.transactions
+        if transaction.account == account
+    ]
+
+
+def main():
+    n_verifications = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_sie_file(os.path.join(tmp, 'bench.se'), n_verifications)
+        parser = SIEParser(path)
+        parser._build_model(parser.iter_records(use_mmap=True))
+        model = parser.data_model
+
+    print(f"{n_verifications} verifications, {len(model.table)} transaction rows")
+    print("\naccount   postings    scan ms   index ms")
+    for account in model.table.accounts[:5]:
+        scan_time, postings = best_time(scan_postings, model, account, repeat=1)
+        index_time, ledger = best_time(model.general_ledger, account, 0, 100)
+        print(f"{account:<8} {len(postings):9d} {scan_time * 1e3:10.1f} {index_time * 1e3:10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: memory held by parsed verifications, with and without the
+per-parse string symbol table.
+
+Each variant runs in its own subprocess so the resident set sizes do not
+influence each other. "no interning" replaces SIEParser._intern with the
+identity function, which is how the parser behaved before the symbol table.
+
+    python benchmarks/bench_memory.py [n_verifications]
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+from sie_fixtures import write_sie_file
+from utils.sie_parser import SIEParser
+
+
+class NoInternParser(SIEParser):
+    def _intern(self, value):
+        return value
+
+
+def measure(path, variant, use_mmap):
+    """Parse path in this process and print retained bytes and peak RSS."""
+    parser_class = NoInternParser if variant == 'plain' else SIEParser
+    tracemalloc.start()
+    parser = parser_class(path)
+    parser._consume_records(parser.iter_records(use_mmap=use_mmap))
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # ru_maxrss is in kilobytes on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    print(retained, peak_rss, len(parser.data['verifications']))
+
+
+def run_variant(path, variant, use_mmap):
+    output = subprocess.run(
+        [sys.executable, __file__, '--measure', path, variant, str(int(use_mmap))],
+        check=True, capture_output=True, text=True
+    ).stdout.split()
+    return int(output[0]), int(output[1])
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--measure':
+        measure(sys.argv[2], sys.argv[3], sys.argv[4] == '1')
+        return
+    
+    n_verifications = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_sie_file(os.path.join(tmp, 'bench.se'), n_verifications)
+        print(f"{os.path.getsize(path) / 1e6:.1f} MB file, {n_verifications} verifications")
+        for use_mmap in (False, True):
+            plain = run_variant(path, 'plain', use_mmap)
+            interned = run_variant(path, 'interned', use_mmap)
+            print(f"\nuse_mmap={use_mmap}         retained MB   peak RSS MB")
+            print(f"no interning      {plain[0] / 1e6:11.1f} {plain[1] / 1e6:13.1f}")
+            print(f"symbol table      {interned[0] / 1e6:11.1f} {interned[1] / 1e6:13.1f}")
+            print(f"saved             {(plain[0] - interned[0]) / 1e6:11.1f} {(plain[1] - interned[1]) / 1e6:13.1f}")
+
+
+if __name__ == '__main__':
+    main()
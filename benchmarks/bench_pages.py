@@ -0,0 +1,48 @@
+"""
+Benchmark: bytes and time for the browser to get going with a stored file
+(summary plus the first page of verifications) versus the full response,
+and the cost of later pages with and without a filter.
+
+    python benchmarks/bench_pages.py [n_verifications]
+"""
+
+import os
+import sys
+import tempfile
+
+from sie_fixtures import timed, write_sie_file
+from utils.sie_parser import SIEParser
+from utils.sie_serializer import dumps, model_to_json
+
+
+def main():
+    n_verifications = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_sie_file(os.path.join(tmp, 'bench.se'), n_verifications)
+        model = SIEParser(path).parse_model(use_mmap=True)
+    model.to_dict()  # Balances and statements are computed on first use
+    print(f"{n_verifications} verifications, {len(model.table)} transaction rows")
+
+    full_time, full = timed(model_to_json, model)
+    summary_time, summary = timed(model_to_json, model, include_verifications=False)
+    page_time, page = timed(lambda: dumps(model.verification_page(0, 100)))
+    print("\n                               MB       ms")
+    print(f"full response            {len(full) / 1e6:8.2f} {full_time * 1e3:8.1f}")
+    print(f"summary + first page     {(len(summary) + len(page)) / 1e6:8.2f} {(summary_time + page_time) * 1e3:8.1f}")
+
+    year = model.table.ver_date[0][:4]
+    month = {'start_date': f'{year}-06', 'end_date': f'{year}-06'}
+    print("\npage of 100                         ms")
+    elapsed, _ = timed(model.verification_page, n_verifications - 100, 100)
+    print(f"{'last page':<30} {elapsed * 1e3:7.2f}")
+    elapsed, first = timed(model.verification_page, 0, 100, **month)
+    print(f"{'one month, selects (1st page)':<30} {elapsed * 1e3:7.2f}")
+    elapsed, _ = timed(model.verification_page, max(first['total'] - 100, 0), 100, **month)
+    print(f"{'one month, cached (last page)':<30} {elapsed * 1e3:7.2f}")
+    elapsed, _ = timed(model.transaction_page, 0, 100, account=model.table.accounts[0])
+    print(f"{'transactions of one account':<30} {elapsed * 1e3:7.2f}")
+
+
+if __name__ == '__main__':
+    main()
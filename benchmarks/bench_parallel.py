@@ -0,0 +1,47 @@
+"""
+Benchmark: parsing one large SIE file with several worker processes.
+
+Times SIEParser.parse(workers=N) for 1..cpu_count workers and checks that
+every run produces exactly the same result as the sequential parse. The
+speedup is bounded by the sequential parts (header, merging the chunk
+results, balance calculation and serialisation), so it flattens out well
+below the core count.
+
+    python benchmarks/bench_parallel.py [n_verifications] [max_workers]
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+from sie_fixtures import best_time, write_sie_file
+from utils.sie_parser import SIEParser
+
+
+def time_parse(path, workers, use_mmap):
+    best, result = best_time(lambda: SIEParser(path).parse(use_mmap=use_mmap, workers=workers), repeat=3)
+    return best, json.dumps(result)
+
+
+def main():
+    n_verifications = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_sie_file(os.path.join(tmp, 'bench.se'), n_verifications)
+        size_mb = os.path.getsize(path) / 1e6
+        print(f"{size_mb:.1f} MB file, {n_verifications} verifications, {os.cpu_count()} CPUs")
+        
+        for use_mmap in (False, True):
+            print(f"\nuse_mmap={use_mmap}")
+            baseline, expected = time_parse(path, 1, use_mmap)
+            print(f"workers= 1 {baseline:7.2f} s")
+            for workers in range(2, max_workers + 1):
+                elapsed, result = time_parse(path, workers, use_mmap)
+                status = "ok" if result == expected else "MISMATCH"
+                print(f"workers={workers:2d} {elapsed:7.2f} s  x{baseline / elapsed:4.2f}  {status}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark: account-by-month totals from the table's one-pass pivot versus
+nested defaultdicts filled row by row, as aggregate_transactions did before.
+
+    python benchmarks/bench_pivot.py [n_verifications]
+"""
+
+import os
+import sys
+import tempfile
+from collections import defaultdict
+
+from sie_fixtures import best_time, write_sie_file
+from utils.sie_parser import SIEParser
+from utils.transaction_table import np
+
+
+def nested_totals(verifications):
+    aggregates = defaultdict(lambda: defaultdict(float))
+    for ver in verifications:
+        for trans in ver['transactions']:
+            aggregates[trans['account']][trans['date'][:7]] += trans['amount']
+    return aggregates
+
+
+def main():
+    n_verifications = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_sie_file(os.path.join(tmp, 'bench.se'), n_verifications)
+        parser = SIEParser(path)
+        parser._build_model(parser.iter_records(use_mmap=True))
+        model = parser.data_model
+    verifications = model.table.verification_dicts()
+    table = model.table
+
+    print(f"{n_verifications} verifications, {len(table)} transaction rows")
+    print("\naccount x month   ms")
+    nested_time, _ = best_time(nested_totals, verifications)
+    print(f"defaultdicts {nested_time * 1e3:8.1f}")
+    table.use_numpy = False
+    array_time, _ = best_time(table.sum_by_account_and_period, 'month')
+    print(f"table/array  {array_time * 1e3:8.1f}  x{nested_time / array_time:.1f}")
+    if np is not None:
+        table.use_numpy = True
+        numpy_time, _ = best_time(table.sum_by_account_and_period, 'month')
+        print(f"table/numpy  {numpy_time * 1e3:8.1f}  x{nested_time / numpy_time:.1f}")
+    else:
+        print("table/numpy  (NumPy not installed)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: memory and time of sampling 20 transactions by copying every row
+into a flat list first (as sample_transactions did before) versus streaming
+them through the reservoir sampler.
+
+    python benchmarks/bench_sampling.py [n_verifications]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from sie_fixtures import write_sie_file
+from utils.data_processor import sample_transactions
+from utils.sie_parser import SIEParser
+
+
+def flat_list_sample(sie_data, max_samples=20):
+    all_transactions = []
+    for ver in sie_data['verifications']:
+        for trans in ver['transactions']:
+            all_transactions.append({
+                'verification': f"{ver['series']}{ver['number']}",
+                'date': trans['date'],
+                'account': trans['account'],
+                'account_name': trans.get('account_name', 'Unknown'),
+                'amount': trans['amount'],
+                'text': trans['text'] or ver['text']
+            })
+    step = max(len(all_transactions) // max_samples, 1)
+    return all_transactions[::step][:max_samples]
+
+
+def measure(func, *args, **kwargs):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def main():
+    n_verifications = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_sie_file(os.path.join(tmp, 'bench.se'), n_verifications)
+        parser = SIEParser(path)
+        parser._build_model(parser.iter_records(use_mmap=True))
+        model = parser.data_model
+    sie_data = {'verifications': model.table.verification_dicts()}
+
+    print(f"{n_verifications} verifications, {len(model.table)} transaction rows, 20 samples")
+    print("\n                          peak MB   seconds")
+    for label, func, kwargs in (
+        ('flat list', flat_list_sample, {}),
+        ('reservoir, dicts', sample_transactions, {}),
+        ('reservoir, table', sample_transactions, {'data_model': model}),
+        ('stratified by month', sample_transactions, {'data_model': model, 'stratify': 'month'}),
+    ):
+        peak, elapsed = measure(func, sie_data, **kwargs)
+        print(f"{label:<22} {peak / 1e6:10.2f} {elapsed:9.3f}")
+
+
+if __name__ == '__main__':
+    main()
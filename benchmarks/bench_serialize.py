@@ -0,0 +1,59 @@
+"""
+Benchmark: JSON of a parsed file through to_dict() and json.dumps (as the
+upload endpoint did before) versus model_to_json(), which writes the model
+straight to bytes, with the json module and with orjson when installed.
+
+    python benchmarks/bench_serialize.py [n_verifications]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from sie_fixtures import best_time, write_sie_file
+from utils import sie_serializer
+from utils.sie_parser import SIEParser
+
+
+def via_dict(model):
+    return json.dumps(model.to_dict(), separators=(',', ':')).encode('utf-8')
+
+
+def measure(func, *args, repeat=3):
+    """Peak traced memory of one call, best time of repeat untraced calls."""
+    tracemalloc.start()
+    result = func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    elapsed, _ = best_time(func, *args, repeat=repeat)
+    return peak, elapsed, result
+
+
+def main():
+    n_verifications = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_sie_file(os.path.join(tmp, 'bench.se'), n_verifications)
+        model = SIEParser(path).parse_model(use_mmap=True)
+    model.to_dict()  # Balances and statements are computed on first use
+
+    orjson = sie_serializer.orjson
+    print(f"{n_verifications} verifications, {len(model.table)} transaction rows")
+    print("\n                         peak MB   seconds        MB out")
+    peak, elapsed, output = measure(via_dict, model)
+    print(f"to_dict + json.dumps  {peak / 1e6:10.2f} {elapsed:9.3f} {len(output) / 1e6:13.2f}")
+    sie_serializer.orjson = None
+    peak, elapsed, output = measure(sie_serializer.model_to_json, model)
+    print(f"model_to_json, json   {peak / 1e6:10.2f} {elapsed:9.3f} {len(output) / 1e6:13.2f}")
+    if orjson is not None:
+        sie_serializer.orjson = orjson
+        peak, elapsed, output = measure(sie_serializer.model_to_json, model)
+        print(f"model_to_json, orjson {peak / 1e6:10.2f} {elapsed:9.3f} {len(output) / 1e6:13.2f}")
+    else:
+        print("model_to_json, orjson (orjson not installed)")
+
+
+if __name__ == '__main__':
+    main()
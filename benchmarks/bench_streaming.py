@@ -0,0 +1,67 @@
+"""
+Benchmark: peak memory and time to first byte of the /upload body built in
+one piece versus streamed as chunked JSON or NDJSON. Only the serialisation
+of an already parsed model is measured; the pieces of the streamed bodies
+are dropped as they come, like a server that writes them to the socket.
+
+    python benchmarks/bench_streaming.py [n_verifications]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from sie_fixtures import write_sie_file
+from utils.sie_parser import SIEParser
+from utils.sie_serializer import iter_model_json, iter_model_ndjson, model_to_json
+
+
+def buffered_body(model):
+    yield model_to_json(model)
+
+
+def consume(pieces):
+    """Read a body; returns (seconds to the first piece, bytes)."""
+    start = time.perf_counter()
+    first_byte = None
+    size = 0
+    for piece in pieces:
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        size += len(piece)
+    return first_byte, size
+
+
+def measure(make_body):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first_byte, size = consume(make_body())
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, first_byte, elapsed, size
+
+
+def main():
+    n_verifications = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_sie_file(os.path.join(tmp, 'bench.se'), n_verifications)
+        model = SIEParser(path).parse_model(use_mmap=True)
+    model.to_dict()  # Balances and statements are computed on first use
+
+    print(f"{n_verifications} verifications, {len(model.table)} transaction rows")
+    print("\n                peak MB  first byte s   total s    MB out")
+    for label, make_body in (
+        ('buffered', lambda: buffered_body(model)),
+        ('chunked JSON', lambda: iter_model_json(model, verifications_last=True)),
+        ('NDJSON', lambda: iter_model_ndjson(model)),
+    ):
+        peak, first_byte, elapsed, size = measure(make_body)
+        print(f"{label:<13} {peak / 1e6:9.2f} {first_byte:13.4f} {elapsed:9.3f} {size / 1e6:9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: SIE line tokenizer throughput.
+
+Compares the previous split-and-stitch _extract_values implementation with
+utils.sie_tokenizer.tokenize on the lines of a synthetic file, and checks
+that tokenize stays linear on a pathological line with a long quoted text.
+
+    python benchmarks/bench_tokenizer.py [n_verifications]
+"""
+
+import sys
+import time
+
+from sie_fixtures import sie_lines
+from utils.sie_tokenizer import tokenize
+
+
+def legacy_extract_values(line):
+    """The tokenizer previously used by SIEParser._extract_values."""
+    values = []
+    parts = line.split(' ')
+    i = 0
+    while i < len(parts):
+        if parts[i].startswith('"'):
+            quoted_value = parts[i]
+            while i + 1 < len(parts) and not quoted_value.endswith('"'):
+                i += 1
+                quoted_value += ' ' + parts[i]
+            values.append(quoted_value[1:-1] if quoted_value.endswith('"') else quoted_value[1:])
+        elif parts[i]:
+            values.append(parts[i].strip())
+        i += 1
+    return values
+
+
+def throughput(func, lines, repeat=5):
+    size = sum(len(line) for line in lines)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            func(line)
+        best = min(best, time.perf_counter() - start)
+    return len(lines) / best, size / best / 1e6
+
+
+def main():
+    n_verifications = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    lines = sie_lines(n_verifications)
+    
+    print(f"{len(lines)} lines ({n_verifications} verifications)")
+    for name, func in (("legacy _extract_values", legacy_extract_values), ("tokenize", tokenize)):
+        lines_per_s, mb_per_s = throughput(func, lines)
+        print(f"{name:24s} {lines_per_s / 1e6:6.2f} M lines/s {mb_per_s:7.1f} MB/s")
+    
+    # Linear-time check: a single long quoted text with many spaces and
+    # escaped quotes. The legacy implementation leaves the escapes in place.
+    print("\nwords in one quoted text -> time per line (legacy / tokenize)")
+    for n_words in (5000, 10000, 20000, 40000):
+        line = '#VER A 1 20240101 "' + 'ord \\"x\\" ' * n_words + '"'
+        timings = []
+        for func in (legacy_extract_values, tokenize):
+            start = time.perf_counter()
+            for _ in range(5):
+                func(line)
+            timings.append((time.perf_counter() - start) / 5 * 1e3)
+        print(f"{n_words:6d} {timings[0]:9.2f} ms {timings[1]:9.2f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark: month-end trial balances through the date index versus filtering
+every verification by date for each query.
+
+    python benchmarks/bench_trial_balance.py [n_verifications]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from sie_fixtures import write_sie_file
+from utils.data_model import parse_date
+from utils.sie_parser import SIEParser
+
+
+def scan_balances(model, end):
+    """Per-account sums up to end by walking all verifications."""
+    last_day = end.isoformat()
+    sums = {}
+    for verification in model.verifications:
+        if verification.date and verification.date <= last_day:
+            for transaction in verification.transactions:
+                sums[transaction.account] = sums.get(transaction.account, 0) + transaction.amount_ore
+    return sums
+
+
+def main():
+    n_verifications = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_sie_file(os.path.join(tmp, 'bench.se'), n_verifications)
+        parser = SIEParser(path)
+        parser._build_model(parser.iter_records(use_mmap=True))
+        model = parser.data_model
+
+    year = int(model.table.ver_date[0][:4])
+    month_ends = [f"{year}-{month:02d}" for month in range(1, 13)]
+    print(f"{n_verifications} verifications, {len(model.table)} transaction rows, 12 month ends")
+
+    start = time.perf_counter()
+    for month_end in month_ends:
+        scan_balances(model, parse_date(month_end, month_end=True))
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model.table._get_date_index()
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for month_end in month_ends:
+        model.trial_balance(month_end)
+    query_time = time.perf_counter() - start
+
+    print("\n                      ms")
+    print(f"scan per query   {scan_time * 1e3:9.1f}")
+    print(f"index build      {build_time * 1e3:9.1f}")
+    print(f"index queries    {query_time * 1e3:9.1f}  ({query_time / 12 * 1e3:.2f} per query)")
+
+
+if __name__ == '__main__':
+    main()
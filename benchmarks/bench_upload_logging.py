@@ -0,0 +1,68 @@
+"""
+Benchmark: /upload latency with debug logging enabled vs disabled.
+
+Posts a synthetic SIE file to the Flask app through its test client, once
+with the root logger at DEBUG and once at INFO. Log output goes to
+os.devnull in both runs, so the difference is the cost of building and
+serializing debug messages inside the request. With logging disabled that
+cost should be zero.
+
+    python benchmarks/bench_upload_logging.py [n_verifications]
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from sie_fixtures import write_sie_file
+
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app  # noqa: E402
+
+
+def time_upload(client, path, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        with open(path, 'rb') as f:
+            start = time.perf_counter()
+            response = client.post(
+                '/upload',
+                data={'file': (f, 'bench.se')},
+                content_type='multipart/form-data'
+            )
+            best = min(best, time.perf_counter() - start)
+        assert response.status_code == 200, response.data[:200]
+    return best
+
+
+def main():
+    n_verifications = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    app.config['MAX_CONTENT_LENGTH'] = None
+    
+    root = logging.getLogger()
+    devnull = open(os.devnull, 'w')
+    for handler in root.handlers:
+        if isinstance(handler, logging.StreamHandler):
+            handler.setStream(devnull)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_sie_file(os.path.join(tmp, 'bench.se'), n_verifications)
+        size_mb = os.path.getsize(path) / 1e6
+        client = app.test_client()
+        
+        timings = {}
+        for level in (logging.DEBUG, logging.INFO):
+            root.setLevel(level)
+            timings[level] = time_upload(client, path)
+    
+    print(f"{size_mb:.1f} MB file, {n_verifications} verifications")
+    print(f"debug logging on:  {timings[logging.DEBUG] * 1e3:8.1f} ms")
+    print(f"debug logging off: {timings[logging.INFO] * 1e3:8.1f} ms")
+    print(f"saved:             {(timings[logging.DEBUG] - timings[logging.INFO]) * 1e3:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
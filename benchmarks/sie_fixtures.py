@@ -0,0 +1,127 @@
+"""
+Synthetic SIE 4 files and timing helpers for the benchmarks in this directory.
+
+The generated files mimic a typical Fortnox export: a short header, a BAS
+chart of accounts, opening/closing balances and results, followed by a large
+number of #VER blocks with two to four #TRANS rows each. The files are
+written in CP437 like real PC8 exports.
+"""
+
+import os
+import random
+import sys
+import time
+
+# Allow running the benchmarks as plain scripts from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ACCOUNTS = [
+    ("1510", "Kundfordringar"),
+    ("1930", "Företagskonto"),
+    ("2081", "Aktiekapital"),
+    ("2440", "Leverantörsskulder"),
+    ("2610", "Utgående moms 25%"),
+    ("2640", "Ingående moms"),
+    ("3011", "Försäljning tjänster"),
+    ("4010", "Inköp material"),
+    ("5410", "Förbrukningsinventarier"),
+    ("6230", "Datakommunikation"),
+    ("6570", "Bankkostnader"),
+    ("8999", "Årets resultat"),
+]
+
+
+def header_lines(rng):
+    """Return the header, chart of accounts and balance records."""
+    lines = [
+        '#FLAGGA 0',
+        '#PROGRAM "Fortnox" 3.0',
+        '#FORMAT PC8',
+        '#GEN 20240201',
+        '#SIETYP 4',
+        '#FNAMN "Testbolaget AB"',
+        '#ORGNR 556677-8899',
+        '#RAR 0 20240101 20241231',
+        '#RAR -1 20230101 20231231',
+        '#KPTYP BAS2014',
+    ]
+    for number, name in ACCOUNTS:
+        lines.append(f'#KONTO {number} "{name}"')
+    for number in ("1510", "1930", "2081", "2440"):
+        lines.append(f'#IB 0 {number} {rng.randint(-50000, 50000)}.00')
+        lines.append(f'#IB -1 {number} {rng.randint(-50000, 50000)}.50')
+        lines.append(f'#UB 0 {number} {rng.randint(-50000, 50000)}.25')
+    for number in ("3011", "4010", "5410", "6230", "6570"):
+        lines.append(f'#RES 0 {number} {rng.randint(-90000, 90000)}.10')
+        lines.append(f'#RES -1 {number} {rng.randint(-90000, 90000)}')
+    return lines
+
+
+def verification_lines(rng, number):
+    """Return the lines of one balanced #VER block."""
+    date = f"2024{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}"
+    amount = rng.randint(100, 1000000) / 100
+    vat = round(amount * 0.25, 2)
+    lines = [f'#VER A {number} {date} "Faktura {number}" 20240301', '{']
+    kind = number % 3
+    if kind == 0:
+        lines.append(f'   #TRANS 1510 {{}} {amount + vat:.2f}')
+        lines.append(f'   #TRANS 3011 {{}} -{amount:.2f} {date} "Försäljning"')
+        lines.append(f'   #TRANS 2610 {{}} -{vat:.2f}')
+    elif kind == 1:
+        lines.append(f'   #TRANS 6230 {{1 "100"}} {amount:.2f} {date} "Abonnemang"')
+        lines.append(f'   #TRANS 2640 {{}} {vat:.2f}')
+        lines.append(f'   #TRANS 2440 {{}} -{amount + vat:.2f}')
+    else:
+        lines.append(f'   #TRANS 1930 {{}} -{amount:.2f} {date} "Betalning"')
+        lines.append(f'   #TRANS 2440 {{}} {amount:.2f}')
+    lines.append('}')
+    return lines
+
+
+def write_sie_file(path, n_verifications=10000, seed=1):
+    """
+    Write a synthetic SIE 4 file.
+    
+    Args:
+        path: Destination file path
+        n_verifications: Number of #VER blocks to generate
+        seed: Random seed, so the same arguments always give the same file
+        
+    Returns:
+        The path that was written
+    """
+    rng = random.Random(seed)
+    with open(path, 'wb') as f:
+        f.write(('\r\n'.join(header_lines(rng)) + '\r\n').encode('cp437'))
+        for number in range(1, n_verifications + 1):
+            block = verification_lines(rng, number)
+            f.write(('\r\n'.join(block) + '\r\n').encode('cp437'))
+    return path
+
+
+def sie_lines(n_verifications=10000, seed=1):
+    """Return the decoded, stripped lines of a synthetic file."""
+    rng = random.Random(seed)
+    lines = header_lines(rng)
+    for number in range(1, n_verifications + 1):
+        lines.extend(line.strip() for line in verification_lines(rng, number))
+    return lines
+
+
+def best_time(func, *args, repeat=5, **kwargs):
+    """Best wall time of repeat calls of func(*args, **kwargs); returns (seconds, last result)."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def timed(func, *args, **kwargs):
+    """Wall time of a single call of func(*args, **kwargs); returns (seconds, result)."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
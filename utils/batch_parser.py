@@ -0,0 +1,223 @@
+"""
+Batch parsing of many SIE files.
+
+Parses every SIE file in a directory (or matching a glob pattern) in a
+process pool. Each worker writes the parsed data for its file to
+``<output_dir>/<name>.json`` and only returns a small summary, so memory
+use is bounded by the files being parsed at the moment, not by the size of
+the batch. A failing file is recorded in the manifest and does not stop the
+batch.
+
+Usage:
+
+    python -m utils.batch_parser exports/ -o parsed/ --workers 8
+    python -m utils.batch_parser "exports/2024-*/*.se" -o parsed/
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+
+from utils.sie_parser import SIEParser
+
+logger = logging.getLogger(__name__)
+
+SIE_EXTENSIONS = ('.se', '.sie')
+MANIFEST_NAME = 'manifest.json'
+
+
+def find_sie_files(source):
+    """
+    List the SIE files to parse.
+
+    Args:
+        source: A directory (its *.se/*.sie files are used) or a glob pattern
+
+    Returns:
+        Sorted list of file paths
+    """
+    if os.path.isdir(source):
+        paths = [
+            os.path.join(source, name) for name in os.listdir(source)
+            if name.lower().endswith(SIE_EXTENSIONS)
+        ]
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(path for path in paths if os.path.isfile(path))
+
+
+def parse_batch(paths, output_dir, workers=None, use_mmap=False):
+    """
+    Parse SIE files in a process pool and write one JSON file per input.
+
+    Args:
+        paths: SIE file paths to parse
+        output_dir: Directory for the per-file results and the manifest
+        workers: Number of worker processes (default: CPU count)
+        use_mmap: Parse in memory-mapped bytes mode
+
+    Returns:
+        Manifest dict with one summary entry per file, in input order
+    """
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+    output_paths = _output_paths(paths, output_dir)
+    started = time.perf_counter()
+
+    results = [None] * len(paths)
+    if workers == 1:
+        for i, path in enumerate(paths):
+            results[i] = parse_file(path, output_paths[i], use_mmap)
+            _log_result(results[i])
+    else:
+        # Keep at most two tasks per worker in flight so a batch of thousands
+        # of files does not queue thousands of pending futures
+        pending = {}
+        next_index = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while next_index < len(paths) or pending:
+                while next_index < len(paths) and len(pending) < workers * 2:
+                    future = executor.submit(
+                        parse_file, paths[next_index], output_paths[next_index], use_mmap
+                    )
+                    pending[future] = next_index
+                    next_index += 1
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = pending.pop(future)
+                    try:
+                        results[i] = future.result()
+                    except Exception as e:
+                        # The worker process itself died (e.g. out of memory)
+                        results[i] = _summary(paths[i], None, 'error', error=repr(e))
+                    _log_result(results[i])
+
+    ok = sum(1 for result in results if result['status'] == 'ok')
+    manifest = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'workers': workers,
+        'total_files': len(paths),
+        'parsed': ok,
+        'failed': len(paths) - ok,
+        'total_bytes': sum(result['size'] for result in results),
+        'elapsed_seconds': round(time.perf_counter() - started, 3),
+        'files': results,
+    }
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    logger.info(
+        "Batch done: %d/%d files parsed in %.1f s",
+        ok, len(paths), manifest['elapsed_seconds'],
+        extra={'parsed': ok, 'failed': len(paths) - ok, 'elapsed': manifest['elapsed_seconds']},
+    )
+    return manifest
+
+
+def parse_file(path, output_path, use_mmap=False):
+    """
+    Parse one SIE file and write its data to output_path.
+
+    Runs in a worker process. Never raises: errors are returned in the summary.
+
+    Args:
+        path: SIE file to parse
+        output_path: JSON file to write the parsed data to
+        use_mmap: Parse in memory-mapped bytes mode
+
+    Returns:
+        Summary dict for the manifest
+    """
+    started = time.perf_counter()
+    try:
+        data = SIEParser(path).parse(use_mmap=use_mmap)
+        if data is None:
+            # parse() logs the underlying exception
+            return _summary(path, None, 'error', started, error='parse failed, see log')
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        return _summary(
+            path, output_path, 'ok', started,
+            verifications=len(data.get('verifications', [])),
+            accounts=len(data.get('accounts', {})),
+            dialect=data.get('metadata', {}).get('dialect', ''),
+        )
+    except Exception as e:
+        logger.exception("Error in batch parsing of %s", path)
+        return _summary(path, None, 'error', started, error=repr(e))
+
+
+def _summary(path, output_path, status, started=None, **fields):
+    """Build the manifest entry for one file."""
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        size = 0
+    summary = {
+        'file': path,
+        'output': output_path,
+        'status': status,
+        'size': size,
+        'seconds': round(time.perf_counter() - started, 3) if started is not None else None,
+    }
+    summary.update(fields)
+    return summary
+
+
+def _output_paths(paths, output_dir):
+    """Map each input to a unique <output_dir>/<name>.json path."""
+    used = set()
+    output_paths = []
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name = stem
+        n = 1
+        # Same file name in different input directories
+        while name in used or name == os.path.splitext(MANIFEST_NAME)[0]:
+            n += 1
+            name = f"{stem}_{n}"
+        used.add(name)
+        output_paths.append(os.path.join(output_dir, name + '.json'))
+    return output_paths
+
+
+def _log_result(result):
+    if result['status'] == 'ok':
+        logger.info("Parsed %s in %.2f s", result['file'], result['seconds'])
+    else:
+        logger.warning("Failed %s: %s", result['file'], result.get('error'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse many SIE files into JSON in parallel.")
+    parser.add_argument('source', help="Directory with .se/.sie files, or a glob pattern")
+    parser.add_argument('-o', '--output', default='parsed', help="Output directory (default: parsed)")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Number of worker processes (default: CPU count)")
+    parser.add_argument('--mmap', action='store_true', help="Use memory-mapped bytes parsing")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+        format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+    )
+
+    paths = find_sie_files(args.source)
+    if not paths:
+        logger.error("No SIE files found for %s", args.source)
+        return 1
+
+    manifest = parse_batch(paths, args.output, workers=args.workers, use_mmap=args.mmap)
+    print(f"{manifest['parsed']}/{manifest['total_files']} files parsed, "
+          f"{manifest['failed']} failed, manifest: {os.path.join(args.output, MANIFEST_NAME)}")
+    return 0 if manifest['failed'] == 0 else 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
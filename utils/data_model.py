@@ -6,10 +6,61 @@ This module defines a consistent data model for SIE files from different bookkee
 regardless of the source system, ensuring consistent handling in the frontend.
 """
 
-from datetime import datetime
+from collections import Counter, OrderedDict
+from datetime import date, datetime
 from dataclasses import dataclass, field, asdict
 from typing import List, Dict, Optional, Any, Union
+import calendar
 import json
+import logging
+
+from utils.transaction_table import TransactionTable, VerificationSequence
+
+logger = logging.getLogger(__name__)
+
+# Filters whose selections the page methods keep, most recently used first out
+SELECTION_CACHE_SIZE = 4
+
+
+def amount_to_ore(amount) -> int:
+    """
+    Convert an amount in kronor (float, int or numeric string) to integer öre.
+    
+    SIE amounts have at most two decimals, so rounding the scaled float
+    recovers the exact öre value.
+    """
+    if isinstance(amount, str):
+        amount = float(amount.replace(',', '.'))
+    return round(amount * 100)
+
+
+def ore_to_amount(ore: int) -> float:
+    """Convert integer öre to kronor for serialization (the nearest float to the exact value)."""
+    return ore / 100
+
+
+def parse_date(value: str, month_end: bool = False) -> date:
+    """
+    Parse a query date: YYYY-MM-DD, YYYYMMDD or a month as YYYY-MM.
+    
+    Args:
+        value: Date string
+        month_end: For a month, return its last day instead of its first
+        
+    Returns:
+        datetime.date
+        
+    Raises:
+        ValueError: If value is not one of the formats
+    """
+    value = value.strip()
+    if len(value) == 7 and value[4] == '-':
+        year, month = int(value[:4]), int(value[5:])
+        day = calendar.monthrange(year, month)[1] if month_end else 1
+        return date(year, month, day)
+    if len(value) == 8 and value.isdigit():
+        return date(int(value[:4]), int(value[4:6]), int(value[6:]))
+    return date.fromisoformat(value)
 
 
 @dataclass
@@ -22,7 +73,14 @@ class Account:
     transactions_amount: float = 0.0
     
     def to_dict(self):
-        return asdict(self)
+        # Explicit dicts instead of asdict(), which deep-copies field by field
+        return {
+            "number": self.number,
+            "name": self.name,
+            "type": self.type,
+            "balance": self.balance,
+            "transactions_amount": self.transactions_amount
+        }
 
 
 @dataclass
@@ -33,9 +91,23 @@ class Transaction:
     date: str = ""
     text: str = ""
     account_name: str = ""
+    objects: tuple = ()  # ((dimension, object_id), ...) from the object list
+    amount_ore: Optional[int] = None  # Exact amount in öre; derived from amount if not given
+    
+    def __post_init__(self):
+        if self.amount_ore is None:
+            self.amount_ore = amount_to_ore(self.amount)
     
     def to_dict(self):
-        return asdict(self)
+        # Sums use the öre value; the serialized form only carries the amount
+        return {
+            "account": self.account,
+            "amount": self.amount,
+            "date": self.date,
+            "text": self.text,
+            "account_name": self.account_name,
+            "objects": self.objects
+        }
 
 
 @dataclass
@@ -48,6 +120,7 @@ class Verification:
     transactions: List[Transaction] = field(default_factory=list)
     original_number: str = ""  # For preserving Bokio verification numbers
     original_date: str = ""    # For preserving Bokio date fields that contain amounts
+    budget_transactions: List[Transaction] = field(default_factory=list)  # #BTRANS rows
     
     def to_dict(self):
         return {
@@ -57,7 +130,8 @@ class Verification:
             "text": self.text,
             "original_number": self.original_number,
             "original_date": self.original_date,
-            "transactions": [t.to_dict() for t in self.transactions]
+            "transactions": [t.to_dict() for t in self.transactions],
+            "budget_transactions": [t.to_dict() for t in self.budget_transactions]
         }
 
 
@@ -71,7 +145,13 @@ class BalanceEntry:
     transaction_amount: float = 0.0
     
     def to_dict(self):
-        return asdict(self)
+        return {
+            "account": self.account,
+            "amount": self.amount,
+            "year": self.year,
+            "had_transactions": self.had_transactions,
+            "transaction_amount": self.transaction_amount
+        }
 
 
 @dataclass
@@ -89,6 +169,45 @@ class Metadata:
     current_fiscal_year: Dict[str, str] = field(default_factory=dict)
     current_fiscal_year_start_year: str = ""
     current_fiscal_year_end_year: str = ""
+    dialect: str = ""  # Detected SIE producer profile (fortnox, bokio, dooer, generic)
+    
+    def to_dict(self):
+        return asdict(self)
+
+
+@dataclass
+class PeriodTotals:
+    """Transaction totals per account and period (see SIEDataModel.period_totals)."""
+    period: str  # month, quarter or year
+    accounts: List[str]  # Row labels: account numbers
+    periods: List[str]  # Column labels: YYYY-MM, YYYY-Qn or YYYY, then 'unknown' for undated rows
+    amounts_ore: List[List[int]]  # [account][period] sums in öre
+    counts: List[List[int]]  # [account][period] number of transactions
+    
+    def to_dict(self):
+        """Account -> period -> amount, leaving out periods without transactions."""
+        return {
+            account: {
+                label: ore_to_amount(ore)
+                for label, ore, count in zip(self.periods, amounts, counts) if count
+            }
+            for account, amounts, counts in zip(self.accounts, self.amounts_ore, self.counts)
+        }
+
+
+@dataclass
+class ParseStatistics:
+    """Counts collected while a file was parsed (see SIEDataModel.set_statistics)."""
+    record_counts: Dict[str, int] = field(default_factory=dict)  # Record label without '#' -> lines read
+    verifications: int = 0
+    transactions: int = 0  # #TRANS/#RTRANS rows, not #BTRANS
+    verifications_per_series: Dict[str, int] = field(default_factory=dict)
+    transactions_per_account: Dict[str, int] = field(default_factory=dict)
+    accounts_per_type: Dict[str, int] = field(default_factory=dict)  # Parser account types ('asset', ...)
+    first_date: str = ""  # Earliest and latest verification date
+    last_date: str = ""
+    byte_size: int = 0
+    parse_seconds: float = 0.0
     
     def to_dict(self):
         return asdict(self)
@@ -103,10 +222,23 @@ class SIEDataModel:
     def __init__(self):
         self.metadata = Metadata()
         self.accounts: Dict[str, Account] = {}
-        self.verifications: List[Verification] = []
+        # Transaction rows are stored column by column; verifications is a
+        # read-only sequence of Verification views over the table
+        self.table = TransactionTable()
+        self.verifications: VerificationSequence = VerificationSequence(self.table)
         self.opening_balances: Dict[str, Dict[str, BalanceEntry]] = {}  # Year -> Account -> BalanceEntry
         self.closing_balances: Dict[str, Dict[str, BalanceEntry]] = {}  # Year -> Account -> BalanceEntry
         self.results: Dict[str, Dict[str, BalanceEntry]] = {}  # Year -> Account -> BalanceEntry
+        # Set when the file was parsed without its verifications (balances-only mode)
+        self.balances_only = False
+        # Set by the parser, see set_statistics()
+        self.statistics: Optional[ParseStatistics] = None
+        # False when some rows may not carry their account's final name
+        self._names_resolved = True
+        # Cached aggregation results, see _cached_aggregate() and invalidate_aggregates()
+        self._aggregates = {}
+        self._aggregates_size = None
+        self._balances_calculated = False
         
     def from_parser_data(self, parser_data: dict) -> 'SIEDataModel':
         """
@@ -118,11 +250,35 @@ class SIEDataModel:
         Returns:
             SIEDataModel instance
         """
-        print("Converting parser data to standardized data model")
-        print(f"Parser data keys: {parser_data.keys()}")
+        self.set_metadata(parser_data.get('metadata', {}))
+        
+        for acc_num, acc_data in parser_data.get('accounts', {}).items():
+            self.add_account(acc_num, acc_data.get('name', ''))
+        
+        logger.debug("Converting %d verifications", len(parser_data.get('verifications', [])))
+        for ver_data in parser_data.get('verifications', []):
+            self.add_verification(ver_data)
+        
+        for kind in ('ib', 'ub', 'res'):
+            for year, balances in parser_data.get(kind, {}).items():
+                # Handle different data types for results
+                if isinstance(balances, dict):
+                    for acc_num, amount in balances.items():
+                        self.add_balance(kind, year, acc_num, amount)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Found %d result accounts across %d years",
+                sum(len(accounts) for accounts in self.results.values()), len(self.results)
+            )
         
-        # Process metadata
-        metadata = parser_data.get('metadata', {})
+        return self
+    
+    # Incremental builder API: the parser feeds records in as they are read
+    
+    def set_metadata(self, metadata: dict):
+        """Set the file metadata from the parser's metadata dict."""
+        self.invalidate_aggregates()
         self.metadata = Metadata(
             company_name=metadata.get('company_name', ''),
             organization_number=metadata.get('organization_number', ''),
@@ -135,165 +291,195 @@ class SIEDataModel:
             fiscal_years=metadata.get('fiscal_years', {}),
             current_fiscal_year=metadata.get('current_fiscal_year', {}),
             current_fiscal_year_start_year=metadata.get('current_fiscal_year_start_year', ''),
-            current_fiscal_year_end_year=metadata.get('current_fiscal_year_end_year', '')
+            current_fiscal_year_end_year=metadata.get('current_fiscal_year_end_year', ''),
+            dialect=metadata.get('dialect', '')
         )
+    
+    def add_account(self, number: str, name: str = ""):
+        """Add (or redefine) an account in the chart of accounts."""
+        self.invalidate_aggregates()
+        self.accounts[number] = Account(
+            number=number,
+            name=name,
+            type=self._determine_account_type(number)
+        )
+        if len(self.table):
+            # Rows added before this account was defined may carry the wrong name
+            self._names_resolved = False
+    
+    def add_balance(self, kind: str, year: str, account: str, amount):
+        """
+        Add an opening balance, closing balance or result.
         
-        # Process accounts
-        for acc_num, acc_data in parser_data.get('accounts', {}).items():
-            self.accounts[acc_num] = Account(
-                number=acc_num,
-                name=acc_data.get('name', ''),
-                type=self._determine_account_type(acc_num)
-            )
+        Args:
+            kind: 'ib', 'ub' or 'res'
+            year: Year index as written in the file ('0', '-1', ...)
+            account: Account number
+            amount: Amount in kronor; results may also be strings or dicts
+                    with an 'amount' key
+        """
+        self.invalidate_aggregates()
+        if kind == 'res':
+            # Handle both direct number values and object values with amount property
+            if isinstance(amount, dict) and 'amount' in amount:
+                amount = amount['amount']
+            elif isinstance(amount, (str, int, float)):
+                try:
+                    amount = float(amount)
+                except (ValueError, TypeError):
+                    amount = 0.0
+            balances = self.results
+        elif kind == 'ib':
+            balances = self.opening_balances
+        else:
+            balances = self.closing_balances
         
-        # Process verifications and transactions
-        print(f"Processing {len(parser_data.get('verifications', []))} verifications")
-        for ver_index, ver_data in enumerate(parser_data.get('verifications', [])):
-            print(f"Processing verification {ver_index}: {type(ver_data)}")
+        if year not in balances:
+            balances[year] = {}
+        balances[year][account] = BalanceEntry(account=account, amount=amount, year=year)
+    
+    def add_verification(self, ver_data):
+        """
+        Add a verification and its transactions.
+        
+        Args:
+            ver_data: A Verification object or a dictionary in the
+                      Verification.to_dict() layout
+        """
+        self.invalidate_aggregates()
+        table = self.table
+        # Check if ver_data is a Verification object or a dictionary
+        if hasattr(ver_data, 'series'):
+            # It's a Verification object
+            ver_date = getattr(ver_data, 'date', '')
+            ver_index = table.add_verification(
+                series=getattr(ver_data, 'series', ''),
+                number=getattr(ver_data, 'number', ''),
+                date=ver_date,
+                text=getattr(ver_data, 'text', ''),
+                original_number=getattr(ver_data, 'original_number', ''),
+                original_date=getattr(ver_data, 'original_date', '')
+            )
             
-            # Check if ver_data is a Verification object or a dictionary
-            if hasattr(ver_data, 'series'):
-                # It's a Verification object
-                verification = Verification(
-                    series=getattr(ver_data, 'series', ''),
-                    number=getattr(ver_data, 'number', ''),
-                    date=getattr(ver_data, 'date', ''),
-                    text=getattr(ver_data, 'text', ''),
-                    original_number=getattr(ver_data, 'original_number', ''),
-                    original_date=getattr(ver_data, 'original_date', '')
-                )
-                
-                # Process transactions
-                if hasattr(ver_data, 'transactions'):
-                    print(f"Verification {ver_index} has {len(ver_data.transactions)} transactions")
-                    for trans_index, trans_data in enumerate(ver_data.transactions):
-                        print(f"Processing transaction {trans_index} in verification {ver_index}: {type(trans_data)}")
-                        
-                        # Check if trans_data is a Transaction object or a dictionary
-                        if hasattr(trans_data, 'account'):
-                            transaction = Transaction(
-                                account=getattr(trans_data, 'account', ''),
-                                amount=getattr(trans_data, 'amount', 0.0),
-                                date=getattr(trans_data, 'date', verification.date),
-                                text=getattr(trans_data, 'text', '')
-                            )
-                            
-                            # Set account_name if available
-                            if hasattr(trans_data, 'account_name') and getattr(trans_data, 'account_name'):
-                                transaction.account_name = getattr(trans_data, 'account_name')
-                            elif trans_data.account in self.accounts:
-                                transaction.account_name = self.accounts[trans_data.account].name
-                        else:
-                            transaction = Transaction(
-                                account=trans_data.get('account', ''),
-                                amount=trans_data.get('amount', 0.0),
-                                date=trans_data.get('date', verification.date),
-                                text=trans_data.get('text', '')
-                            )
-                            
-                            # Set account_name if available
-                            if 'account_name' in trans_data and trans_data['account_name']:
-                                transaction.account_name = trans_data['account_name']
-                            elif trans_data.get('account') in self.accounts:
-                                transaction.account_name = self.accounts[trans_data.get('account')].name
-                                
-                        verification.transactions.append(transaction)
-                else:
-                    print(f"Warning: Verification {ver_index} has no transactions attribute")
-            else:
-                # It's a dictionary
-                verification = Verification(
-                    series=ver_data.get('series', ''),
-                    number=ver_data.get('number', ''),
-                    date=ver_data.get('date', ''),
-                    text=ver_data.get('text', ''),
-                    original_number=ver_data.get('original_number', ''),
-                    original_date=ver_data.get('original_date', '')
-                )
-                
-                # Process transactions
-                if 'transactions' in ver_data:
-                    print(f"Verification {ver_index} has {len(ver_data.get('transactions', []))} transactions (dict)")
-                    for trans_index, trans_data in enumerate(ver_data.get('transactions', [])):
-                        print(f"Processing transaction {trans_index} in verification {ver_index} (dict): {trans_data}")
-                        
-                        transaction = Transaction(
-                            account=trans_data.get('account', ''),
-                            amount=trans_data.get('amount', 0.0),
-                            date=trans_data.get('date', verification.date),
-                            text=trans_data.get('text', '')
+            # Process transactions
+            if hasattr(ver_data, 'transactions'):
+                for trans_data in ver_data.transactions:
+                    # Check if trans_data is a Transaction object or a dictionary
+                    if hasattr(trans_data, 'account'):
+                        self._add_transaction_row(
+                            trans_data.account,
+                            getattr(trans_data, 'amount_ore', None),
+                            getattr(trans_data, 'amount', 0.0),
+                            getattr(trans_data, 'date', ver_date),
+                            getattr(trans_data, 'text', ''),
+                            getattr(trans_data, 'account_name', ''),
+                            getattr(trans_data, 'objects', ())
                         )
-                        
-                        # Set account_name if available
-                        if 'account_name' in trans_data and trans_data['account_name']:
-                            transaction.account_name = trans_data['account_name']
-                        elif trans_data.get('account') in self.accounts:
-                            transaction.account_name = self.accounts[trans_data.get('account')].name
-                            
-                        verification.transactions.append(transaction)
-                else:
-                    print(f"Warning: Verification {ver_index} has no transactions key in dictionary")
+                    else:
+                        self._add_transaction_dict(trans_data, ver_date)
+            else:
+                logger.warning("Verification %d has no transactions attribute", ver_index)
             
-            self.verifications.append(verification)
-        
-        # Process opening balances
-        for year, balances in parser_data.get('ib', {}).items():
-            if year not in self.opening_balances:
-                self.opening_balances[year] = {}
+            # Budget rows are carried over as-is; they never affect balances
+            for budget_transaction in getattr(ver_data, 'budget_transactions', []):
+                table.add_budget_transaction(budget_transaction)
+        else:
+            # It's a dictionary
+            ver_date = ver_data.get('date', '')
+            ver_index = table.add_verification(
+                series=ver_data.get('series', ''),
+                number=ver_data.get('number', ''),
+                date=ver_date,
+                text=ver_data.get('text', ''),
+                original_number=ver_data.get('original_number', ''),
+                original_date=ver_data.get('original_date', '')
+            )
             
-            for acc_num, amount in balances.items():
-                self.opening_balances[year][acc_num] = BalanceEntry(
-                    account=acc_num,
-                    amount=amount,
-                    year=year
-                )
+            # Process transactions
+            if 'transactions' in ver_data:
+                for trans_data in ver_data.get('transactions', []):
+                    self._add_transaction_dict(trans_data, ver_date)
+            else:
+                logger.warning("Verification %d has no transactions key in dictionary", ver_index)
+    
+    def set_statistics(self, record_counts: Dict[str, int], accounts_per_type: Dict[str, int],
+                       byte_size: int = 0, parse_seconds: float = 0.0) -> ParseStatistics:
+        """
+        Attach the statistics of the parse that built this model.
         
-        # Process closing balances
-        for year, balances in parser_data.get('ub', {}).items():
-            if year not in self.closing_balances:
-                self.closing_balances[year] = {}
-            
-            for acc_num, amount in balances.items():
-                self.closing_balances[year][acc_num] = BalanceEntry(
-                    account=acc_num,
-                    amount=amount,
-                    year=year
-                )
+        The record counts come from the parser's single read; the per-series,
+        per-account and date figures are taken from the table's headers and
+        posting index, without going through the transactions again.
         
-        # Process results
-        print(f"Processing results data from parser: {parser_data.get('res', {})}")
-        for year, results in parser_data.get('res', {}).items():
-            if year not in self.results:
-                self.results[year] = {}
-            
-            # Handle different data types for results
-            if isinstance(results, dict):
-                for acc_num, amount in results.items():
-                    # Handle both direct number values and object values with amount property
-                    actual_amount = amount
-                    if isinstance(amount, dict) and 'amount' in amount:
-                        actual_amount = amount['amount']
-                    elif isinstance(amount, (str, int, float)):
-                        try:
-                            actual_amount = float(amount)
-                        except (ValueError, TypeError):
-                            actual_amount = 0.0
-                    
-                    print(f"Adding result: Year={year}, Account={acc_num}, Amount={actual_amount}")
-                    self.results[year][acc_num] = BalanceEntry(
-                        account=acc_num,
-                        amount=actual_amount,
-                        year=year
-                    )
-        
-        # Debug output for results data
-        if not self.results or all(len(accounts) == 0 for accounts in self.results.values()):
-            print("No RES data found in the SIE file. This may be normal if the SIE file doesn't contain result information.")
-        else:
-            print(f"Found {sum(len(accounts) for accounts in self.results.values())} result accounts across {len(self.results)} years")
+        Args:
+            record_counts: Lines read per record label
+            accounts_per_type: Number of accounts per parser account type
+            byte_size: Size of the parsed file
+            parse_seconds: Time the parse took
             
+        Returns:
+            The new ParseStatistics, also stored as self.statistics
+        """
+        table = self.table
+        # Verification dates are shared strings, so the distinct ones are few
+        dates = sorted(ver_date for ver_date in set(table.ver_date) if ver_date)
+        self.statistics = ParseStatistics(
+            record_counts=dict(record_counts),
+            verifications=table.n_verifications,
+            transactions=len(table),
+            verifications_per_series=dict(Counter(table.ver_series)),
+            transactions_per_account={account: len(table.account_rows(account)) for account in table.accounts},
+            accounts_per_type=dict(accounts_per_type),
+            first_date=dates[0] if dates else "",
+            last_date=dates[-1] if dates else "",
+            byte_size=byte_size,
+            parse_seconds=parse_seconds
+        )
+        return self.statistics
+    
+    def resolve_account_names(self, unknown: str = "Unknown", force: bool = False):
+        """
+        Set every transaction's account name from the final chart of accounts.
         
-        return self
+        Used after building from a stream, where an account may be defined
+        after rows that use it. Rows for accounts that are never defined get
+        the name `unknown`.
+        
+        Args:
+            unknown: Name for accounts missing from the chart of accounts
+            force: Rewrite the names even if no add_account() or unknown
+                   account since the last call can have changed them
+        """
+        if self._names_resolved and not force:
+            return
+        self.table.set_account_names([
+            self.accounts[account].name if account in self.accounts else unknown
+            for account in self.table.accounts
+        ])
+        self._names_resolved = True
+    
+    def _add_transaction_row(self, account, amount_ore, amount, date, text, account_name, objects):
+        """Append one transaction to the table, filling in the account name if it is missing."""
+        if amount_ore is None:
+            amount_ore = amount_to_ore(amount)
+        if not account_name:
+            if account in self.accounts:
+                account_name = self.accounts[account].name
+            else:
+                self._names_resolved = False
+        self.table.add_row(account, amount_ore, date, text, account_name or '', tuple(objects))
+    
+    def _add_transaction_dict(self, trans_data, ver_date):
+        """Append a transaction given as a dictionary (e.g. reloaded JSON)."""
+        self._add_transaction_row(
+            trans_data.get('account', ''),
+            trans_data.get('amount_ore'),
+            trans_data.get('amount', 0.0),
+            trans_data.get('date', ver_date),
+            trans_data.get('text', ''),
+            trans_data.get('account_name', ''),
+            tuple(map(tuple, trans_data.get('objects', ())))
+        )
     
     def _determine_account_type(self, account_number: str) -> str:
         """
@@ -326,10 +512,92 @@ class SIEDataModel:
         else:
             return "Other"
     
+    def invalidate_aggregates(self):
+        """
+        Drop the cached transaction totals and account balances.
+        
+        The builder methods call this themselves. Call it after changing
+        accounts, balances or metadata of the model directly.
+        """
+        self._aggregates.clear()
+        self._balances_calculated = False
+    
+    def _cached_aggregate(self, key, compute):
+        """Return a cached aggregation result, computing it on first use after the model changed."""
+        table = self.table
+        # Rows appended to the table directly also make the cache stale
+        size = (len(table), table.n_verifications)
+        if size != self._aggregates_size:
+            self.invalidate_aggregates()
+            self._aggregates_size = size
+        if key not in self._aggregates:
+            self._aggregates[key] = compute()
+        return self._aggregates[key]
+    
+    def year_totals(self) -> Dict[str, tuple]:
+        """
+        Transaction totals per account for every year, from one pass over the table.
+        
+        The result is cached until the model changes; account totals,
+        balances and the statements are all derived from it.
+        
+        Returns:
+            Dict year ('' for undated verifications) -> (sums in öre, row
+            counts), both lists indexed like table.accounts
+        """
+        return self._cached_aggregate('year_totals', self.table.sum_by_year_and_account)
+    
+    def period_totals(self, period: str = 'month') -> 'PeriodTotals':
+        """
+        Account-by-period matrix of transaction totals, from one pass over the table.
+        
+        Cached per period until the model changes, so reports, charts and
+        the LLM export can all share it.
+        
+        Args:
+            period: 'month' (YYYY-MM), 'quarter' (YYYY-Qn) or 'year' (YYYY)
+            
+        Returns:
+            PeriodTotals with one row per account and one column per period
+        """
+        def compute():
+            periods, sums, counts = self.table.sum_by_account_and_period(period)
+            return PeriodTotals(period, list(self.table.accounts), periods, sums, counts)
+        
+        return self._cached_aggregate(('period_totals', period), compute)
+    
+    def account_totals_ore(self, year: Optional[str] = None) -> Dict[str, int]:
+        """
+        Sum of the transactions per account in öre.
+        
+        Args:
+            year: Only count verifications dated in this year. Defaults to
+                  all verifications, including undated ones.
+            
+        Returns:
+            Dict account number -> öre, for accounts with transactions
+        """
+        selected = [
+            totals for key, totals in self.year_totals().items()
+            if year is None or (key and key.startswith(year))
+        ]
+        account_totals = {}
+        for account_id, account in enumerate(self.table.accounts):
+            if any(counts[account_id] for _, counts in selected):
+                account_totals[account] = sum(sums[account_id] for sums, _ in selected)
+        return account_totals
+    
     def calculate_account_balances(self):
         """
         Calculate current balances for all accounts based on opening balances and transactions.
+        
+        Does nothing if the balances are already up to date; they are
+        recalculated after the model changes (see invalidate_aggregates).
         """
+        self.year_totals()
+        if self._balances_calculated:
+            return
+        
         # Get the current financial year
         current_year = self.metadata.financial_year_start[:4]
         
@@ -347,24 +615,44 @@ class SIEDataModel:
             break
         
         # Add opening balances using the first available year key
+        opening = {}
         if opening_balance_year and opening_balance_year in self.opening_balances:
-            for acc_num, balance_entry in self.opening_balances[opening_balance_year].items():
-                if acc_num in self.accounts:
-                    self.accounts[acc_num].balance = balance_entry.amount
+            opening = {
+                acc_num: balance_entry for acc_num, balance_entry in self.opening_balances[opening_balance_year].items()
+                if acc_num in self.accounts
+            }
+        for acc_num, balance_entry in opening.items():
+            self.accounts[acc_num].balance = balance_entry.amount
+        
+        if self.balances_only:
+            # No verifications were read: use the closing balances and results
+            # the file declares for the current year (year 0) instead
+            for declared in (self.closing_balances, self.results):
+                for acc_num, balance_entry in declared.get('0', {}).items():
+                    if acc_num in self.accounts:
+                        self.accounts[acc_num].balance = balance_entry.amount
+            self._balances_calculated = True
+            return
+        
+        # Sums are kept in integer öre so they are exact; the float balances
+        # on the accounts are only set from them at the end
+        balances_ore = {acc_num: amount_to_ore(balance_entry.amount) for acc_num, balance_entry in opening.items()}
+        transactions_ore = {}
         
         # Track accounts with transactions
         accounts_with_transactions = set()
         
         # Add transaction amounts - only for the current year
-        for verification in self.verifications:
-            # Check if the verification is for the current year
-            if verification.date and verification.date.startswith(current_year):
-                for transaction in verification.transactions:
-                    acc_num = transaction.account
-                    if acc_num in self.accounts:
-                        self.accounts[acc_num].balance += transaction.amount
-                        self.accounts[acc_num].transactions_amount += transaction.amount
-                        accounts_with_transactions.add(acc_num)
+        for acc_num, ore in self.account_totals_ore(current_year).items():
+            if acc_num in self.accounts:
+                balances_ore[acc_num] = balances_ore.get(acc_num, 0) + ore
+                transactions_ore[acc_num] = ore
+                accounts_with_transactions.add(acc_num)
+        
+        for acc_num, ore in balances_ore.items():
+            self.accounts[acc_num].balance = ore_to_amount(ore)
+        for acc_num, ore in transactions_ore.items():
+            self.accounts[acc_num].transactions_amount = ore_to_amount(ore)
                     
         # Store closing balances and transaction info
         if current_year not in self.closing_balances:
@@ -379,6 +667,269 @@ class SIEDataModel:
                 # Add the transaction amount for this account
                 balance_entry.transaction_amount = getattr(account, 'transactions_amount', 0.0)
                 self.closing_balances[current_year][acc_num] = balance_entry
+        
+        # Only now, so a calculation that raised is run again on the next call
+        self._balances_calculated = True
+    
+    def general_ledger(self, account: str, offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+        """
+        One page of an account's general ledger (huvudbok) with running balances.
+        
+        Uses the table's posting index, so the cost is proportional to the
+        account's own postings. Postings are the account's transactions in
+        current-year verifications, in file order, the same ones
+        calculate_account_balances() adds to the opening balance.
+        
+        Args:
+            account: Account number
+            offset: Index of the first posting on the page
+            limit: Maximum number of postings on the page
+        
+        Returns:
+            Dictionary with the opening and closing balance, the total number
+            of postings and the page of postings, each with the balance after it
+        """
+        if offset < 0 or limit < 1:
+            raise ValueError("offset must be >= 0 and limit >= 1")
+        
+        table = self.table
+        current_year = self.metadata.financial_year_start[:4]
+        
+        # Same opening balance year as calculate_account_balances()
+        opening_ore = 0
+        for balances in self.opening_balances.values():
+            if account in balances:
+                opening_ore = amount_to_ore(balances[account].amount)
+            break
+        
+        ver_date = table.ver_date
+        ver_index = table.ver_index
+        rows = [
+            row for row in table.account_rows(account)
+            if ver_date[ver_index[row]] and ver_date[ver_index[row]].startswith(current_year)
+        ]
+        
+        amount_ore = table.amount_ore
+        balance_ore = opening_ore + sum(amount_ore[row] for row in rows[:offset])
+        postings = []
+        for row in rows[offset:offset + limit]:
+            balance_ore += amount_ore[row]
+            ver = ver_index[row]
+            postings.append({
+                'series': table.ver_series[ver],
+                'number': table.ver_number[ver],
+                'date': table.date_string(table.date_ordinal[row]),
+                'text': table.strings[table.text_id[row]],
+                'verification_text': table.ver_text[ver],
+                'amount': ore_to_amount(amount_ore[row]),
+                'balance': ore_to_amount(balance_ore),
+            })
+        
+        account_data = self.accounts.get(account)
+        return {
+            'account': account,
+            'name': account_data.name if account_data else "Unknown",
+            'year': current_year,
+            'opening_balance': ore_to_amount(opening_ore),
+            'closing_balance': ore_to_amount(opening_ore + sum(amount_ore[row] for row in rows)),
+            'total_postings': len(rows),
+            'offset': offset,
+            'limit': limit,
+            'postings': postings,
+        }
+
+    def verification_page(self, offset: int = 0, limit: int = 100, series: Optional[str] = None,
+                          start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
+        """
+        One page of verifications, optionally only those of a series or date range.
+        
+        The selected verification indexes of the last few filters are cached
+        until the model changes, so each further page only serializes its
+        own verifications.
+        
+        Args:
+            offset: Index of the first selected verification on the page
+            limit: Maximum number of verifications on the page
+            series: Only verifications of this series
+            start_date: Only verifications dated on or after this day (see
+                        parse_date; YYYY-MM means the first of the month)
+            end_date: Only verifications dated on or before this day
+                      (YYYY-MM means the month end)
+        
+        Returns:
+            Dictionary with the number of selected verifications (total), the
+            page position, next_offset (None on the last page) and the page
+            of verifications in the Verification.to_dict() layout
+        
+        Raises:
+            ValueError: For a negative offset, a limit below 1 or a bad date
+        """
+        selected = self._selection('verifications', series, start_date, end_date)
+        page = self._page(selected, offset, limit)
+        page['verifications'] = [
+            self.table.verification(ver_index).to_dict() for ver_index in selected[offset:offset + limit]
+        ]
+        return page
+    
+    def transaction_page(self, offset: int = 0, limit: int = 100, series: Optional[str] = None,
+                         start_date: Optional[str] = None, end_date: Optional[str] = None,
+                         account: Optional[str] = None) -> Dict[str, Any]:
+        """
+        One page of transaction rows, optionally filtered like verification_page().
+        
+        Rows are selected by their verification's series and date; with an
+        account only that account's rows are read, from the posting index.
+        
+        Args:
+            offset, limit, series, start_date, end_date: See verification_page()
+            account: Only transactions on this account
+        
+        Returns:
+            Dictionary with the number of selected transactions (total), the
+            page position, next_offset and the page of transactions, each
+            with its verification's series, number and text
+        
+        Raises:
+            ValueError: For a negative offset, a limit below 1 or a bad date
+        """
+        selected = self._selection('transactions', series, start_date, end_date, account)
+        page = self._page(selected, offset, limit)
+        
+        table = self.table
+        transactions = []
+        for row in selected[offset:offset + limit]:
+            ver = table.ver_index[row]
+            transactions.append({
+                'series': table.ver_series[ver],
+                'number': table.ver_number[ver],
+                'date': table.date_string(table.date_ordinal[row]),
+                'account': table.accounts[table.account_id[row]],
+                'account_name': table.strings[table.name_id[row]],
+                'text': table.strings[table.text_id[row]],
+                'verification_text': table.ver_text[ver],
+                'amount': ore_to_amount(table.amount_ore[row]),
+                'objects': table.objects[table.objects_id[row]],
+            })
+        page['transactions'] = transactions
+        return page
+    
+    def _selection(self, kind, series, start_date, end_date, account=None):
+        """
+        Verification indexes or row numbers for the page methods.
+        
+        The selections of the SELECTION_CACHE_SIZE most recently used filters
+        are kept, so paging through one filter reads the table once while a
+        stored model does not collect a selection for every filter it saw.
+        """
+        first_day = parse_date(start_date).toordinal() if start_date else None
+        last_day = parse_date(end_date, month_end=True).toordinal() if end_date else None
+        if first_day is not None and last_day is not None and last_day < first_day:
+            raise ValueError("end_date is before start_date")
+        
+        if series is None and first_day is None and last_day is None and account is None:
+            return range(self.table.n_verifications if kind == 'verifications' else len(self.table))
+        if kind == 'verifications':
+            compute = lambda: self.table.select_verifications(series, first_day, last_day)
+        else:
+            compute = lambda: self.table.select_rows(series, first_day, last_day, account)
+        selections = self._cached_aggregate('selections', OrderedDict)
+        key = (kind, series, first_day, last_day, account)
+        selected = selections.pop(key, None)
+        if selected is None:
+            selected = compute()
+        selections[key] = selected
+        while len(selections) > SELECTION_CACHE_SIZE:
+            selections.popitem(last=False)
+        return selected
+    
+    @staticmethod
+    def _page(selected, offset, limit):
+        if offset < 0 or limit < 1:
+            raise ValueError("offset must be >= 0 and limit >= 1")
+        end = offset + limit
+        return {
+            'total': len(selected),
+            'offset': offset,
+            'limit': limit,
+            'next_offset': end if end < len(selected) else None,
+        }
+    
+    def trial_balance(self, end_date: str, start_date: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Trial balance (råbalans) for a period of the current fiscal year.
+        
+        Each account gets its balance at the start of the period (opening
+        balance plus postings from the fiscal year start), the sum of its
+        postings in the period and its balance at the end. Totals come from
+        the table's date index, a binary search per account, so any date can
+        be queried without going through the transactions again. Postings
+        are placed by verification date, as in calculate_account_balances().
+        
+        Args:
+            end_date: Last day of the period (see parse_date; YYYY-MM means
+                      the month end)
+            start_date: First day of the period. Defaults to the fiscal year
+                        start, which makes the closing balances the balances
+                        as of end_date.
+            
+        Returns:
+            Dictionary with the period and, per account and in total, the
+            opening balance, period amount and closing balance
+            
+        Raises:
+            ValueError: If a date cannot be parsed or the period ends before it starts
+        """
+        end = parse_date(end_date, month_end=True)
+        fiscal_start = None
+        if self.metadata.financial_year_start:
+            fiscal_start = parse_date(self.metadata.financial_year_start)
+        start = parse_date(start_date) if start_date else fiscal_start
+        if start is not None and end < start:
+            raise ValueError("end_date is before start_date")
+        
+        table = self.table
+        start_day = start.toordinal() if start else None
+        fiscal_day = fiscal_start.toordinal() if fiscal_start else None
+        before_sums, before_counts = table.sum_by_account_between(fiscal_day, start_day - 1 if start_day else 0)
+        period_sums, period_counts = table.sum_by_account_between(start_day, end.toordinal())
+        
+        opening_ore = {}
+        # Same opening balance year as calculate_account_balances()
+        for balances in self.opening_balances.values():
+            for acc_num, balance_entry in balances.items():
+                opening_ore[acc_num] = amount_to_ore(balance_entry.amount)
+            break
+        period_ore = {}
+        for account_id, acc_num in enumerate(table.accounts):
+            if before_counts[account_id]:
+                opening_ore[acc_num] = opening_ore.get(acc_num, 0) + before_sums[account_id]
+            if period_counts[account_id]:
+                period_ore[acc_num] = period_sums[account_id]
+        
+        accounts = {}
+        totals = [0, 0, 0]
+        for acc_num in sorted(set(opening_ore) | set(period_ore)):
+            row = (opening_ore.get(acc_num, 0), period_ore.get(acc_num, 0))
+            row += (row[0] + row[1],)
+            if not any(row) and acc_num not in period_ore:
+                continue
+            account = self.accounts.get(acc_num)
+            accounts[acc_num] = {
+                'name': account.name if account else "Unknown",
+                'opening_balance': ore_to_amount(row[0]),
+                'period_amount': ore_to_amount(row[1]),
+                'closing_balance': ore_to_amount(row[2]),
+            }
+            totals = [total + value for total, value in zip(totals, row)]
+        
+        return {
+            'start_date': start.isoformat() if start else '',
+            'end_date': end.isoformat(),
+            'accounts': accounts,
+            'total_opening_balance': ore_to_amount(totals[0]),
+            'total_period_amount': ore_to_amount(totals[1]),
+            'total_closing_balance': ore_to_amount(totals[2]),
+        }
     
     def get_balance_sheet(self) -> Dict[str, Any]:
         """
@@ -397,13 +948,15 @@ class SIEDataModel:
             "total_liabilities_equity": 0.0
         }
         
+        total_assets_ore = 0
+        total_liabilities_equity_ore = 0
         for acc_num, account in self.accounts.items():
             if account.type == "Asset" and account.balance != 0:
                 balance_sheet["assets"][acc_num] = {
                     "name": account.name,
                     "balance": account.balance
                 }
-                balance_sheet["total_assets"] += account.balance
+                total_assets_ore += amount_to_ore(account.balance)
             elif account.type == "Liability/Equity" and account.balance != 0:
                 # Determine if it's liability or equity based on account number
                 if acc_num.startswith("20") or acc_num.startswith("21"):
@@ -416,7 +969,10 @@ class SIEDataModel:
                         "name": account.name,
                         "balance": account.balance
                     }
-                balance_sheet["total_liabilities_equity"] += account.balance
+                total_liabilities_equity_ore += amount_to_ore(account.balance)
+        
+        balance_sheet["total_assets"] = ore_to_amount(total_assets_ore)
+        balance_sheet["total_liabilities_equity"] = ore_to_amount(total_liabilities_equity_ore)
         
         return balance_sheet
     
@@ -437,21 +993,25 @@ class SIEDataModel:
             "net_income": 0.0
         }
         
+        total_income_ore = 0
+        total_expenses_ore = 0
         for acc_num, account in self.accounts.items():
             if account.type == "Income" and account.balance != 0:
                 income_statement["income"][acc_num] = {
                     "name": account.name,
                     "amount": account.balance
                 }
-                income_statement["total_income"] += account.balance
+                total_income_ore += amount_to_ore(account.balance)
             elif account.type == "Expense" and account.balance != 0:
                 income_statement["expenses"][acc_num] = {
                     "name": account.name,
                     "amount": account.balance
                 }
-                income_statement["total_expenses"] += account.balance
+                total_expenses_ore += amount_to_ore(account.balance)
         
-        income_statement["net_income"] = income_statement["total_income"] - income_statement["total_expenses"]
+        income_statement["total_income"] = ore_to_amount(total_income_ore)
+        income_statement["total_expenses"] = ore_to_amount(total_expenses_ore)
+        income_statement["net_income"] = ore_to_amount(total_income_ore - total_expenses_ore)
         
         return income_statement
     
@@ -462,11 +1022,10 @@ class SIEDataModel:
         Returns:
             Dictionary representation of the data model
         """
-        print("Converting data model to dictionary")
         result = {
             'metadata': self.metadata.to_dict(),
             'accounts': {acc_num: acc.to_dict() for acc_num, acc in self.accounts.items()},
-            'verifications': [ver.to_dict() for ver in self.verifications],
+            'verifications': self.table.verification_dicts(),
             'opening_balances': {},
             'closing_balances': {},
             'results': {},
@@ -491,17 +1050,12 @@ class SIEDataModel:
                 result['closing_balances'][year][acc_num] = balance.to_dict()
         
         # Process results
-        print(f"Converting results data: {self.results}")
         for year, balances in self.results.items():
             if year not in result['results']:
                 result['results'][year] = {}
             
             for acc_num, balance in balances.items():
                 result['results'][year][acc_num] = balance.to_dict()
-                print(f"Added result for year {year}, account {acc_num}: {balance.to_dict()}")
-        
-        print(f"Data model converted to dictionary with {len(result['verifications'])} verifications")
-        print(f"Results in dictionary: {result['results']}")
         
         return result
     
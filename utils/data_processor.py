@@ -2,19 +2,27 @@ import json
 from datetime import datetime
 from collections import defaultdict
 
-def process_for_llm(sie_data):
+from utils.data_model import SIEDataModel, amount_to_ore, ore_to_amount
+from utils.transaction_sampler import StratifiedSampler, check_stratify, sample_table_rows, stratum_key
+
+def process_for_llm(sie_data, data_model=None):
     """
     Process SIE data to make it more suitable for LLM analysis.
     Handles large transaction sets by creating summaries and aggregations.
+    
+    Pass the SIEDataModel the data was parsed into as data_model to reuse
+    its parse statistics and cached aggregates instead of recounting and
+    rebuilding them from the verifications.
     """
+    statistics = data_model.statistics if data_model is not None else None
     processed_data = {
         'metadata': sie_data['metadata'],
-        'summary': create_summary(sie_data),
+        'summary': create_summary(sie_data, statistics),
         'accounts': sie_data['accounts'],
         'balance_sheet': create_balance_sheet(sie_data),
         'income_statement': create_income_statement(sie_data),
-        'transaction_samples': sample_transactions(sie_data, max_samples=20),
-        'transaction_count': count_transactions(sie_data),
+        'transaction_samples': sample_transactions(sie_data, max_samples=20, data_model=data_model),
+        'transaction_count': count_transactions(sie_data, statistics),
         'ib': sie_data['ib'],  # Include opening balance data
         'ub': sie_data['ub'],  # Include closing balance data
         'res': sie_data['res']  # Include result data
@@ -22,9 +30,12 @@ def process_for_llm(sie_data):
     
     # Only include full transaction list if it's not too large
     if processed_data['transaction_count'] <= 500:
-        processed_data['all_transactions'] = sie_data['verifications']
+        if data_model is not None:
+            processed_data['all_transactions'] = data_model.table.verification_dicts()
+        else:
+            processed_data['all_transactions'] = sie_data['verifications']
     else:
-        processed_data['transaction_aggregates'] = aggregate_transactions(sie_data)
+        processed_data['transaction_aggregates'] = aggregate_transactions(sie_data, data_model)
     
     return processed_data
 
@@ -42,15 +53,15 @@ def add_description(data, description):
     
     return enhanced_data
 
-def create_summary(sie_data):
-    """Create a summary of the SIE data."""
+def create_summary(sie_data, statistics=None):
+    """Create a summary of the SIE data, from the parse statistics if given."""
     summary = {
         'company_name': sie_data['metadata'].get('company_name', 'Unknown'),
         'period': get_period_string(sie_data),
         'total_accounts': len(sie_data['accounts']),
-        'total_verifications': len(sie_data['verifications']),
-        'total_transactions': count_transactions(sie_data),
-        'account_types': count_account_types(sie_data)
+        'total_verifications': statistics.verifications if statistics else len(sie_data['verifications']),
+        'total_transactions': count_transactions(sie_data, statistics),
+        'account_types': count_account_types(sie_data, statistics)
     }
     
     # Add financial totals
@@ -77,15 +88,19 @@ def get_period_string(sie_data):
     
     return "Unknown period"
 
-def count_transactions(sie_data):
-    """Count the total number of transactions."""
+def count_transactions(sie_data, statistics=None):
+    """Count the total number of transactions; read from the parse statistics if given."""
+    if statistics is not None:
+        return statistics.transactions
     count = 0
     for ver in sie_data['verifications']:
         count += len(ver['transactions'])
     return count
 
-def count_account_types(sie_data):
-    """Count the number of accounts by type."""
+def count_account_types(sie_data, statistics=None):
+    """Count the number of accounts by type; read from the parse statistics if given."""
+    if statistics is not None:
+        return dict(statistics.accounts_per_type)
     type_counts = defaultdict(int)
     
     for account_number, account_data in sie_data['accounts'].items():
@@ -191,64 +206,85 @@ def create_income_statement(sie_data):
     
     return income_statement
 
-def sample_transactions(sie_data, max_samples=20):
-    """Sample a limited number of transactions for LLM analysis."""
-    all_transactions = []
+def sample_transactions(sie_data, max_samples=20, stratify=None, seed=0, data_model=None):
+    """
+    Sample a limited number of transactions for LLM analysis.
+    
+    Streams over the transactions with a reservoir sampler, so only the
+    sampled transactions are copied (see utils.transaction_sampler).
+    
+    Args:
+        sie_data: Parsed data with 'verifications'
+        max_samples: Maximum number of transactions
+        stratify: Spread the sample over 'account_class', 'month' or
+                  'magnitude' strata, or None for a plain random sample
+        seed: Random seed; the same seed gives the same sample
+        data_model: SIEDataModel to sample from directly instead of
+                    sie_data['verifications']
+    """
+    if data_model is not None:
+        table = data_model.table
+        samples = []
+        for row in sample_table_rows(table, max_samples, stratify, seed):
+            ver = table.ver_index[row]
+            samples.append({
+                'verification': f"{table.ver_series[ver]}{table.ver_number[ver]}",
+                'date': table.date_string(table.date_ordinal[row]),
+                'account': table.accounts[table.account_id[row]],
+                'account_name': table.strings[table.name_id[row]] or 'Unknown',
+                'amount': ore_to_amount(table.amount_ore[row]),
+                'text': table.strings[table.text_id[row]] or table.ver_text[ver]
+            })
+        return samples
     
+    check_stratify(stratify)
+    sampler = StratifiedSampler(max_samples, seed)
     for ver in sie_data['verifications']:
         for trans in ver['transactions']:
-            all_transactions.append({
-                'verification': f"{ver['series']}{ver['number']}",
-                'date': trans['date'],
-                'account': trans['account'],
-                'account_name': trans.get('account_name', 'Unknown'),
-                'amount': trans['amount'],
-                'text': trans['text'] or ver['text']
-            })
-    
-    # If we have fewer transactions than the max, return all of them
-    if len(all_transactions) <= max_samples:
-        return all_transactions
-    
-    # Otherwise, sample transactions from different parts of the dataset
-    sampled = []
-    step = len(all_transactions) // max_samples
-    
-    for i in range(0, len(all_transactions), step):
-        if len(sampled) < max_samples:
-            sampled.append(all_transactions[i])
-    
-    return sampled
+            key = stratum_key(stratify, trans['account'], trans['date'], amount_to_ore(trans['amount'])) if stratify else None
+            sampler.add(key, (ver, trans))
+    
+    return [
+        {
+            'verification': f"{ver['series']}{ver['number']}",
+            'date': trans['date'],
+            'account': trans['account'],
+            'account_name': trans.get('account_name', 'Unknown'),
+            'amount': trans['amount'],
+            'text': trans['text'] or ver['text']
+        }
+        for _, (ver, trans) in sampler.sample()
+    ]
 
-def aggregate_transactions(sie_data):
-    """Aggregate transactions by account and month for large datasets."""
-    aggregates = defaultdict(lambda: defaultdict(float))
+def aggregate_transactions(sie_data, data_model=None):
+    """
+    Aggregate transactions by account and month for large datasets.
     
-    for ver in sie_data['verifications']:
-        for trans in ver['transactions']:
-            account = trans['account']
-            amount = trans['amount']
-            
-            # Extract month from date (format: YYYYMMDD)
-            date = trans['date']
-            if len(date) >= 6:
-                month_key = date[:6]  # YYYYMM
-            else:
-                month_key = 'unknown'
-            
-            aggregates[account][month_key] += amount
+    Uses the data model's account-by-month totals (SIEDataModel.period_totals),
+    computed in one pass over its transaction table. Without a data_model, a
+    temporary one is built from sie_data['verifications'].
+    """
+    if data_model is None:
+        data_model = SIEDataModel()
+        for ver in sie_data['verifications']:
+            data_model.add_verification(ver)
+    
+    totals = data_model.period_totals('month')
     
-    # Convert to regular dict for JSON serialization
+    # Months are YYYY-MM; rows without a YYYY-MM-DD date are under 'unknown'
     result = {}
-    for account, months in aggregates.items():
+    for account, amounts, counts in zip(totals.accounts, totals.amounts_ore, totals.counts):
         account_name = "Unknown"
         if account in sie_data['accounts']:
             account_name = sie_data['accounts'][account].get('name', 'Unknown')
         
         result[account] = {
             'name': account_name,
-            'monthly_totals': dict(months),
-            'total': sum(months.values())
+            'monthly_totals': {
+                month: ore_to_amount(ore)
+                for month, ore, count in zip(totals.periods, amounts, counts) if count
+            },
+            'total': ore_to_amount(sum(amounts))
         }
     
     return result
@@ -0,0 +1,93 @@
+"""
+Parsed data models kept in memory between requests.
+
+An upload with store=true puts its SIEDataModel in a ModelStore and only
+sends a summary and a file id. The browser then pages through the
+verifications and transactions by id, so it never receives the whole file.
+
+The store lives in the process that parsed the file. With several server
+workers, requests for a file id must reach the same worker (or run a single
+worker with threads), otherwise the id is unknown there.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+import logging
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class ModelStore:
+    """
+    Data models by file id, least recently used first out.
+
+    Holds at most max_files models; a model that was not read for
+    ttl_seconds is dropped on the next access to the store.
+    """
+
+    def __init__(self, max_files=8, ttl_seconds=3600):
+        """
+        Args:
+            max_files: Maximum number of models kept
+            ttl_seconds: Seconds a model is kept after its last use
+        """
+        self.max_files = max_files
+        self.ttl_seconds = ttl_seconds
+        self._models = OrderedDict()  # File id -> (model, last use), oldest first
+        self._lock = Lock()
+
+    def __len__(self):
+        with self._lock:
+            self._expire()
+            return len(self._models)
+
+    def add(self, data_model):
+        """
+        Keep a model.
+
+        Args:
+            data_model: SIEDataModel
+
+        Returns:
+            The new file id
+        """
+        file_id = uuid.uuid4().hex
+        with self._lock:
+            self._expire()
+            self._models[file_id] = (data_model, time.monotonic())
+            while len(self._models) > self.max_files:
+                dropped, _ = self._models.popitem(last=False)
+                logger.info("Dropped stored file %s to make room", dropped)
+        return file_id
+
+    def get(self, file_id):
+        """
+        The model for a file id, or None if it is unknown or expired.
+
+        Counts as a use: the model's time to live starts again.
+        """
+        with self._lock:
+            self._expire()
+            entry = self._models.get(file_id)
+            if entry is None:
+                return None
+            self._models[file_id] = (entry[0], time.monotonic())
+            self._models.move_to_end(file_id)
+            return entry[0]
+
+    def remove(self, file_id):
+        """Drop a model. Returns whether the file id was known."""
+        with self._lock:
+            return self._models.pop(file_id, None) is not None
+
+    def _expire(self):
+        """Drop models unused for ttl_seconds; the lock must be held."""
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._models:
+            file_id, (_, last_use) = next(iter(self._models.items()))
+            if last_use >= cutoff:
+                break
+            del self._models[file_id]
+            logger.info("Stored file %s expired", file_id)
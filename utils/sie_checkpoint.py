@@ -0,0 +1,123 @@
+"""
+Checkpoints for incremental parsing of SIE files that grow over time.
+
+A checkpoint records how far a file has been parsed (a byte offset at the end
+of a complete #VER block), a SHA-256 hash of the bytes before that offset and
+what is needed to continue from there: the header metadata, the accounts,
+the #IB/#UB/#RES balances and the data model's TransactionTable, whose
+columns are stored as arrays rather than as verification objects. When the
+file is parsed again and its prefix still has the same hash, only the bytes
+after the offset need to be parsed.
+
+Checkpoints are pickle files written by SIEParser.parse_incremental(); only
+load checkpoints you wrote yourself.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+
+logger = logging.getLogger(__name__)
+
+# Bump when the parser state layout changes; older checkpoints are ignored
+CHECKPOINT_VERSION = 4
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+# How much of the file end to inspect when looking for the last block end
+_TAIL_SIZE = 64 * 1024
+
+
+def prefix_hash(file_path, length):
+    """
+    Hash the first length bytes of a file.
+
+    Args:
+        file_path: File to hash
+        length: Number of bytes to hash
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    remaining = length
+    with open(file_path, 'rb') as f:
+        while remaining > 0:
+            block = f.read(min(_HASH_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+
+def resume_offset(file_path, size):
+    """
+    Offset a later parse can resume from, or None if there is none.
+
+    A file can be resumed from its end only if it ends with a closed #VER
+    block (optionally followed by whitespace): then the parser is between
+    records and appended #VER blocks parse the same on their own.
+
+    Args:
+        file_path: SIE file
+        size: File size the parse saw
+
+    Returns:
+        size, or None if the file does not end with a block end
+    """
+    if size == 0:
+        return None
+    with open(file_path, 'rb') as f:
+        f.seek(max(size - _TAIL_SIZE, 0))
+        tail = f.read(min(size, _TAIL_SIZE)).rstrip()
+    last_line = tail.rsplit(b'\n', 1)[-1].strip()
+    return size if last_line.startswith(b'}') else None
+
+
+def load_checkpoint(checkpoint_path):
+    """
+    Load a checkpoint written by save_checkpoint().
+
+    Returns:
+        Checkpoint dict, or None if it is missing, unreadable or outdated
+    """
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return None
+    try:
+        # Unpickling runs code from the file, which is fine for checkpoints
+        # this process wrote to a local cache directory but not for files
+        # anyone else can write to
+        with open(checkpoint_path, 'rb') as f:
+            checkpoint = pickle.load(f)
+    except Exception:
+        logger.warning("Ignoring unreadable checkpoint %s", checkpoint_path, exc_info=True)
+        return None
+    if not isinstance(checkpoint, dict) or checkpoint.get('version') != CHECKPOINT_VERSION:
+        logger.info("Ignoring checkpoint %s from another version", checkpoint_path)
+        return None
+    return checkpoint
+
+
+def save_checkpoint(checkpoint_path, offset, digest, state):
+    """
+    Write a checkpoint atomically.
+
+    Args:
+        checkpoint_path: Where to write the checkpoint
+        offset: Byte offset the next parse resumes from
+        digest: prefix_hash() of the file up to offset
+        state: Parser and data model state to restore on resume
+    """
+    checkpoint = {
+        'version': CHECKPOINT_VERSION,
+        'offset': offset,
+        'prefix_sha256': digest,
+        'state': state,
+    }
+    tmp_path = checkpoint_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+    # Replace in one step so a crash never leaves a half-written checkpoint
+    os.replace(tmp_path, checkpoint_path)
@@ -0,0 +1,196 @@
+"""
+Parallel parsing of a single large SIE file.
+
+The header (everything before the first #VER record: metadata, accounts and
+balances) is parsed in the calling process. The remainder is split into byte
+ranges that start right after a verification block's closing brace, so no
+#VER block is ever cut in half, and the ranges are parsed in a process pool.
+Each worker builds a TransactionTable of its own chunk; the tables are
+appended to the model in file order, which makes the outcome identical to a
+sequential parse.
+
+Whether this is faster than one process depends on the machine: the header,
+the merge and everything after the parse still run in the calling process.
+Measure with benchmarks/bench_parallel.py before using more than one worker.
+"""
+
+import logging
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.sie_dialects import PROFILES
+
+logger = logging.getLogger(__name__)
+
+# Start of the first verification record (#VER, or VER as some programs
+# write it); everything before it is header
+_FIRST_VER_RE = re.compile(rb'(?m)^[ \t]*#?VER[ \t]')
+
+# A line closing a verification block; a chunk may start right after it
+_BLOCK_END_RE = re.compile(rb'\n[ \t]*\}[^\n]*\n')
+
+# Chunks per worker, so uneven chunks still keep every worker busy
+CHUNKS_PER_WORKER = 4
+
+
+def parse_parallel(parser, workers, use_mmap=False):
+    """
+    Fill parser.data_model by parsing the file with a process pool.
+
+    Args:
+        parser: SIEParser instance to fill
+        workers: Number of worker processes
+        use_mmap: Parse each chunk in bytes mode (see SIEParser.iter_records)
+
+    Returns:
+        Number of RES records parsed
+    """
+    with open(parser.file_path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if size == 0:
+            return parser._build_model(iter(()))
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            first_ver = _FIRST_VER_RE.search(mapped)
+            if first_ver is not None:
+                ranges = split_ranges(mapped, first_ver.start(), size, workers * CHUNKS_PER_WORKER)
+
+    if first_ver is None:
+        logger.info("No #VER record found in %s; parsing it in one process", parser.file_path)
+    if first_ver is None or len(ranges) <= 1 or workers <= 1:
+        return parser._build_model(parser.iter_records(use_mmap=use_mmap))
+
+    # Header records: metadata, accounts, balances and the dialect
+    res_count = parser._build_model(
+        parser.iter_records(use_mmap=use_mmap, byte_range=(0, first_ver.start()))
+    )
+    dialect_name = parser._get_dialect().name
+
+    logger.debug("Parsing %s in %d chunks with %d workers", parser.file_path, len(ranges), workers)
+    n_chunks = len(ranges)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            _parse_chunk,
+            [parser.file_path] * n_chunks,
+            ranges,
+            [parser.data['metadata']] * n_chunks,
+            [parser.data['accounts']] * n_chunks,
+            [dialect_name] * n_chunks,
+            [use_mmap] * n_chunks,
+        )
+        # map() yields in submission order, so chunks are merged in file order
+        for chunk in results:
+            res_count += _merge_chunk(parser, chunk)
+
+    parser.data_model.set_metadata(parser.data['metadata'])
+    parser.data_model.resolve_account_names()
+    return res_count
+
+
+def split_ranges(mapped, start, end, n_chunks):
+    """
+    Split [start, end) into at most n_chunks byte ranges at verification block ends.
+
+    Args:
+        mapped: The file contents (mmap or bytes)
+        start: Offset of the first #VER record
+        end: End of the file
+        n_chunks: Desired number of chunks
+
+    Returns:
+        List of (start, end) tuples covering [start, end) in order
+    """
+    if start >= end:
+        return []
+
+    bounds = [start]
+    step = max((end - start) // max(n_chunks, 1), 1)
+    for i in range(1, n_chunks):
+        target = start + i * step
+        if target <= bounds[-1]:
+            continue
+        # Begin one byte early so a block end right before target is found
+        match = _BLOCK_END_RE.search(mapped, target - 1, end)
+        if match is None:
+            break
+        if bounds[-1] < match.end() < end:
+            bounds.append(match.end())
+    bounds.append(end)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _parse_chunk(file_path, byte_range, metadata, accounts, dialect_name, use_mmap):
+    """
+    Parse one byte range in a worker process.
+
+    The verifications go into a TransactionTable of their own, which
+    pickles as a few arrays and symbol lists. Account and balance records
+    are sent back as (kind, data) pairs to be added in the parent.
+
+    Returns:
+        Dict with the chunk's table, records, parser data and record counts
+    """
+    # Imported here to avoid a circular import with utils.sie_parser
+    from utils.sie_parser import SIEParser
+
+    parser = SIEParser(file_path)
+    parser.data['metadata'] = dict(metadata)
+    parser.data['accounts'] = dict(accounts)
+    parser.dialect = PROFILES[dialect_name]
+    model = parser.data_model
+    records = []
+    for record in parser.iter_records(use_mmap=use_mmap, byte_range=byte_range):
+        if record.kind == 'VER':
+            model.add_verification(record.data)
+        elif record.kind in ('KONTO', 'IB', 'UB', 'RES'):
+            records.append((record.kind, record.data))
+            if record.kind == 'KONTO':
+                model.add_account(record.data['account'], record.data.get('name', ''))
+
+    data = parser.data
+    return {
+        'table': model.table,
+        'names_resolved': model._names_resolved,
+        'records': records,
+        'metadata': data['metadata'],
+        'accounts': {number: account for number, account in data['accounts'].items()
+                     if accounts.get(number) != account},
+        'balances': {key: data[key] for key in ('ib', 'ub', 'res')},
+        'record_counts': parser.record_counts,
+    }
+
+
+def _merge_chunk(parser, chunk):
+    """
+    Append a chunk to the parser's data model, as if it had been parsed in sequence.
+
+    Returns:
+        Number of RES records in the chunk
+    """
+    model = parser.data_model
+    model.invalidate_aggregates()
+    model.table.extend(chunk['table'])
+    if not chunk['names_resolved']:
+        model._names_resolved = False
+
+    res_count = 0
+    for kind, record_data in chunk['records']:
+        if kind == 'KONTO':
+            model.add_account(record_data['account'], record_data.get('name', ''))
+        else:
+            model.add_balance(kind.lower(), record_data['year'], record_data['account'], record_data['amount'])
+            if kind == 'RES':
+                res_count += 1
+
+    data = parser.data
+    for label, count in chunk['record_counts'].items():
+        parser.record_counts[label] = parser.record_counts.get(label, 0) + count
+    data['metadata'].update(chunk['metadata'])
+    data['accounts'].update(chunk['accounts'])
+    for key, chunk_balances in chunk['balances'].items():
+        for year, values in chunk_balances.items():
+            if year not in data[key]:
+                data[key][year] = {}
+            data[key][year].update(values)
+    return res_count
@@ -1,7 +1,54 @@
 import codecs
+import logging
+import mmap
+import os
 import re
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime
-from utils.data_model import SIEDataModel, Transaction, Verification
+from typing import Any
+from utils.data_model import SIEDataModel, Transaction, Verification, amount_to_ore, ore_to_amount
+from utils.sie_checkpoint import load_checkpoint, prefix_hash, resume_offset, save_checkpoint
+from utils.sie_dialects import PROFILES, detect_dialect
+from utils.sie_tokenizer import parse_object_list, tokenize, tokenize_bytes
+
+logger = logging.getLogger(__name__)
+
+# Verification block delimiters, for skipping #VER bodies without reading their rows
+_BLOCK_START_RE = re.compile(rb'(?m)^[ \t]*\{')
+_BLOCK_END_RE = re.compile(rb'\n[ \t]*\}[^\n]*')
+
+
+def _closes_block(line):
+    """
+    Whether a line that opens a { } block also closes it.
+    
+    True for '{}' or '{ #TRANS 1930 {} 100.00 }'; braces of object lists
+    and inside quoted texts are matched, not counted as the block's end.
+    """
+    depth = 0
+    quoted = False
+    for char in line:
+        if char == '"':
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return True
+    return False
+
+
+@dataclass
+class SIERecord:
+    """A single record yielded by SIEParser.iter_records()."""
+    kind: str  # 'KONTO', 'SRU', 'IB', 'UB', 'RES' or 'VER'
+    data: Any  # dict for account/balance records, Verification for 'VER'
+
 
 class SIEParser:
     """
@@ -24,425 +71,592 @@ class SIEParser:
             'version': None
         }
         self.data_model = SIEDataModel()
+        # Dialect profile, detected once from the header records
+        self.dialect = None
+        # Per-parse caches for values that repeat across transaction rows
+        self._dates = {}
+        self._objects = {}
+        self._symbols = {}  # raw bytes field -> decoded str (mmap mode)
+        # Symbol table: one shared str per distinct account number, series,
+        # date, ... instead of a copy per row
+        self._strings = {}
+        # Lines read per record label, e.g. {'VER': 120, 'TRANS': 360}
+        self.record_counts = {}
     
-    def parse(self):
-        """Parse the SIE file and return structured data."""
+    def parse(self, use_mmap=False, workers=1, balances_only=False):
+        """
+        Parse the SIE file and return structured data.
+        
+        Args: See parse_model()
+        
+        Returns:
+            The standardized data model as a dictionary, or None on errors
+        """
+        data_model = self.parse_model(use_mmap=use_mmap, workers=workers, balances_only=balances_only)
+        if data_model is None:
+            return None
         try:
-            # Open with CP437 encoding to properly handle Swedish characters
-            with codecs.open(self.file_path, 'r', encoding='cp437') as file:
-                current_ver = None
-                in_verification_block = False
-                res_count = 0
-                
-                # First pass: try to find #RES records specifically
-                print("\n==== FIRST PASS: LOOKING FOR #RES RECORDS ====")
-                file_content = file.read()
-                file.seek(0)  # Reset file pointer for the main parsing
-                
-                # Look for lines containing #RES or just RES
-                res_pattern = re.compile(r'(?:#RES|RES)\s+(-?\d+)\s+(\d+)\s+(-?[\d\.]+)', re.IGNORECASE)
-                res_matches = res_pattern.findall(file_content)
-                
-                if res_matches:
-                    print(f"Found {len(res_matches)} potential #RES records in pre-scan")
-                    for match in res_matches:
-                        year, account, amount = match
-                        print(f"Pre-scan RES match: Year={year}, Account={account}, Amount={amount}")
-                        try:
-                            year_key = str(year)
-                            account_key = str(account)
-                            amount_value = float(amount)
-                            
-                            if year_key not in self.data['res']:
-                                self.data['res'][year_key] = {}
-                            self.data['res'][year_key][account_key] = amount_value
-                            print(f"Pre-added RES data: Year={year_key}, Account={account_key}, Amount={amount_value}")
-                        except Exception as e:
-                            print(f"Error pre-processing RES match: {e}")
-                else:
-                    print("No #RES records found in pre-scan")
-                
-                # Main parsing loop
-                print("\n==== MAIN PARSING LOOP ====")
-                for line in file:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    # Enhanced detection for RES lines
-                    if '#RES' in line or (line.startswith('RES') and not in_verification_block):
-                        print(f"Found RES line: {line}")
-                        self._parse_res(line)
-                        res_count += 1
-                    
-                    # Parse different section types
-                    if line.startswith('#FLAGGA'):
-                        self._parse_flagga(line)
-                    elif line.startswith('#PROGRAM'):
-                        self._parse_program(line)
-                    elif line.startswith('#FORMAT'):
-                        self._parse_format(line)
-                    elif line.startswith('#GEN'):
-                        self._parse_gen(line)
-                    elif line.startswith('#SIETYP'):
-                        self._parse_sietyp(line)
-                    elif line.startswith('#RAR'):
-                        self._parse_rar(line)
-                    elif line.startswith('#FNAMN'):
-                        self._parse_fnamn(line)
-                    elif line.startswith('#ORGNR'):
-                        self._parse_orgnr(line)
-                    elif line.startswith('#ADRESS'):
-                        self._parse_adress(line)
-                    elif line.startswith('#KPTYP'):
-                        self._parse_kptyp(line)
-                    elif line.startswith('#KONTO'):
-                        self._parse_konto(line)
-                    elif line.startswith('#SRU'):
-                        self._parse_sru(line)
-                    elif line.startswith('#IB'):
-                        self._parse_ib(line)
-                    elif line.startswith('#UB'):
-                        self._parse_ub(line)
-                    elif line.startswith('#RES'):
-                        self._parse_res(line)
-                    elif line.startswith('#VER') or line.startswith('VER '):
-                        # Start a new verification
-                        if current_ver and not in_verification_block:
-                            self.data['verifications'].append(current_ver)
-                        current_ver = self._parse_ver(line)
-                    elif line.startswith('#TRANS') and current_ver:
-                        # Add transaction to current verification
-                        self._parse_trans(line, current_ver)
-                    elif line.startswith('#RTRANS') and current_ver:
-                        # Add reversed transaction to current verification
-                        self._parse_rtrans(line, current_ver)
-                    elif line.startswith('#BTRANS') and current_ver:
-                        # Add budget transaction
-                        self._parse_btrans(line)
-                    elif line.startswith('{'):
-                        # Start of verification block
-                        in_verification_block = True
-                    elif line.startswith('}'):
-                        # End of verification block
-                        if current_ver:
-                            self.data['verifications'].append(current_ver)
-                            current_ver = None
-                        in_verification_block = False
-                
-                # Add the last verification if not already added
-                if current_ver and not in_verification_block:
-                    self.data['verifications'].append(current_ver)
+            # Return the standardized data model as a dictionary
+            return data_model.to_dict()
+        except Exception:
+            logger.exception("Error in data processing for %s", self.file_path)
+            return None
+    
+    def parse_model(self, use_mmap=False, workers=1, balances_only=False):
+        """
+        Parse the SIE file into self.data_model without serializing it.
+        
+        For callers that query the model (trial balances, ledgers) instead
+        of returning the whole file.
+        
+        Args:
+            use_mmap: Memory-map the file and parse transaction rows from raw
+                      bytes (see iter_records)
+            workers: Number of processes for parsing the #VER section. With
+                     more than one, the file is split at verification block
+                     boundaries and the chunks are parsed in a process pool
+                     (see utils.sie_parallel). The output is identical,
+                     but it is only faster where several cores are free;
+                     check with benchmarks/bench_parallel.py first.
+            balances_only: Only read metadata, accounts and #IB/#UB/#RES
+                           records. Verification blocks are skipped without
+                           being tokenized and the result has no verifications.
+        
+        Returns:
+            The SIEDataModel, or None on errors
+        """
+        started = time.perf_counter()
+        try:
+            logger.debug("Parsing %s", self.file_path)
+            if balances_only:
+                res_count = self._build_model(self.iter_records(skip_verifications=True))
+                self.data_model.balances_only = True
+            elif workers and workers > 1:
+                from utils.sie_parallel import parse_parallel
+                res_count = parse_parallel(self, workers, use_mmap=use_mmap)
+            else:
+                # Single streaming pass: each record goes straight into the
+                # data model, so verifications are never collected in
+                # self.data and the file is never held in memory as a whole
+                res_count = self._build_model(self.iter_records(use_mmap=use_mmap))
+            
+            try:
+                logger.debug("Calculating account totals and balances")
+                self._calculate_table_aggregates()
                 
-                try:
-                    # Calculate account balances
-                    print("Calculating account balances...")
-                    self._calculate_account_balances()
-                    print("Account balances calculated successfully")
-                    
-                    # Process data
-                    print("Processing data...")
-                    self._process_data()
-                    print("Data processed successfully")
-                    
-                    # Convert to standardized data model
-                    print("Converting to data model...")
-                    self.data_model.from_parser_data(self.data)
-                    
-                    # Debug the result accounts
-                    print(f"Processed {res_count} RES lines")
-                    print(f"RES data in parser: {self.data['res']}")
-                    print(f"Results in data model: {self.data_model.results}")
-                    
-                    # Return the standardized data model as a dictionary
-                    return self.data_model.to_dict()
-                except Exception as e:
-                    import traceback
-                    print(f"Error in data processing: {e}")
-                    print(traceback.format_exc())
-                    return None
+                self._set_statistics(started)
+                self._log_parse(res_count)
+                return self.data_model
+            except Exception:
+                logger.exception("Error in data processing for %s", self.file_path)
+                return None
                 
-        except Exception as e:
-            print(f"Error parsing SIE file: {e}")
-            import traceback
-            print(traceback.format_exc())
+        except Exception:
+            logger.exception("Error parsing SIE file %s", self.file_path)
             return None
     
-    def parse_raw(self):
-        """Parse the SIE file and return raw parsed data without converting to data model."""
+    def _build_model(self, records):
+        """
+        Feed a record stream into self.data_model; return the number of RES records.
+        
+        Verifications go into the model's transaction table as they are read
+        and are not kept in self.data. Accounts and balances are also kept in
+        self.data, which later records and the aggregates need.
+        """
+        model = self.data_model
+        res_count = 0
+        for record in records:
+            kind = record.kind
+            if kind == 'VER':
+                model.add_verification(record.data)
+            elif kind == 'KONTO':
+                model.add_account(record.data['account'], record.data.get('name', ''))
+            elif kind in ('IB', 'UB', 'RES'):
+                data = record.data
+                model.add_balance(kind.lower(), data['year'], data['account'], data['amount'])
+                if kind == 'RES':
+                    res_count += 1
+        
+        model.set_metadata(self.data['metadata'])
+        # Rows read before their #KONTO record (or of undefined accounts)
+        # get their final account name, or "Unknown"
+        model.resolve_account_names()
+        return res_count
+    
+    def _calculate_table_aggregates(self):
+        """Set account totals and balances in self.data from the data model's cached totals."""
+        account_totals = self.data_model.account_totals_ore()
+        
+        # Opening balances of all years plus the transactions, in öre
+        account_balances = {}
+        for year, balances in self.data.get('ib', {}).items():
+            for account, amount in balances.items():
+                account_balances[account] = account_balances.get(account, 0) + amount_to_ore(amount)
+        for account, ore in account_totals.items():
+            account_balances[account] = account_balances.get(account, 0) + ore
+        
+        self.data['account_totals_ore'] = account_totals
+        self.data['account_totals'] = {account: ore_to_amount(ore) for account, ore in account_totals.items()}
+        self.data['account_balances_ore'] = account_balances
+        self.data['account_balances'] = {account: ore_to_amount(ore) for account, ore in account_balances.items()}
+    
+    def _set_statistics(self, started):
+        """Attach the statistics of this parse to the data model."""
+        accounts_per_type = {}
+        for account in self.data['accounts'].values():
+            account_type = account.get('type', 'unknown')
+            accounts_per_type[account_type] = accounts_per_type.get(account_type, 0) + 1
+        self.data_model.set_statistics(
+            self.record_counts,
+            accounts_per_type,
+            byte_size=os.path.getsize(self.file_path),
+            parse_seconds=time.perf_counter() - started
+        )
+    
+    def _log_parse(self, res_count):
+        """Log a summary of the finished parse."""
+        n_verifications = self.data_model.table.n_verifications
+        logger.info(
+            "Parsed %s: %d verifications, %d RES lines",
+            self.file_path, n_verifications, res_count,
+            extra={
+                'sie_file': self.file_path,
+                'verifications': n_verifications,
+                'res_lines': res_count,
+                'dialect': self.dialect.name if self.dialect else None,
+            },
+        )
+    
+    def parse_incremental(self, checkpoint_path, use_mmap=False):
+        """
+        Parse the SIE file, resuming from a checkpoint when possible.
+        
+        For files that grow by appended #VER blocks. If checkpoint_path holds
+        a checkpoint whose prefix hash still matches the file, the data model
+        is restored from it and only the bytes after the checkpointed offset
+        are parsed. Otherwise the whole file is parsed. A new checkpoint is
+        written whenever the file ends with a complete #VER block (see
+        utils.sie_checkpoint).
+        
+        Args:
+            checkpoint_path: Checkpoint file to resume from and update
+            use_mmap: See parse()
+        
+        Returns:
+            The same dictionary as parse(), or None on errors
+        """
+        started = time.perf_counter()
         try:
-            # Try different encodings
-            encodings = ['cp437', 'latin1', 'utf-8', 'iso-8859-1']
-            file_content = None
+            size = os.path.getsize(self.file_path)
+            checkpoint = load_checkpoint(checkpoint_path)
+            if checkpoint and (checkpoint['offset'] > size
+                               or prefix_hash(self.file_path, checkpoint['offset']) != checkpoint['prefix_sha256']):
+                logger.info("Checkpoint %s does not match %s, parsing the whole file", checkpoint_path, self.file_path)
+                checkpoint = None
             
-            for encoding in encodings:
-                try:
-                    with codecs.open(self.file_path, 'r', encoding=encoding) as file:
-                        file_content = file.read()
-                        print(f"Successfully read file with encoding: {encoding}")
-                        break
-                except UnicodeDecodeError:
-                    print(f"Failed to read file with encoding: {encoding}")
-                    continue
+            if checkpoint:
+                res_count = self._resume(checkpoint['state'], (checkpoint['offset'], size), use_mmap)
+            else:
+                res_count = self._build_model(self.iter_records(use_mmap=use_mmap))
+            self._calculate_table_aggregates()
             
-            if not file_content:
-                print("Could not read file with any of the attempted encodings")
-                return None
+            offset = resume_offset(self.file_path, size)
+            # Skip the checkpoint if the file changed while it was parsed
+            if offset is not None and os.path.getsize(self.file_path) == size:
+                save_checkpoint(checkpoint_path, offset, prefix_hash(self.file_path, offset), {
+                    'metadata': self.data['metadata'],
+                    'accounts': self.data['accounts'],
+                    'balances': {key: self.data[key] for key in ('ib', 'ub', 'res')},
+                    'program_info': self.program_info,
+                    'dialect': self._get_dialect().name,
+                    'res_count': res_count,
+                    'record_counts': self.record_counts,
+                    # Pickles as arrays and symbol lists, see TransactionTable.__getstate__()
+                    'table': self.data_model.table,
+                })
             
-            # Direct search for specific #RES lines
-            res_patterns = [
-                "#RES 0 3011", "#RES -1 3740", "#RES 0 3740", "#RES -1 3790",
-                "#RES -1 5410", "#RES 0 5410", "#RES -1 6230", "#RES 0 6230",
-                "#RES 0 6420", "#RES -1 6570", "#RES 0 6570", "#RES -1 8999",
-                "#RES 0 8999"
-            ]
+            self._set_statistics(started)
+            self._log_parse(res_count)
+            return self.data_model.to_dict()
+        except Exception:
+            logger.exception("Error parsing SIE file %s", self.file_path)
+            return None
+    
+    def _resume(self, state, byte_range, use_mmap):
+        """Restore the checkpointed data model and parse byte_range on top of it; return the RES count."""
+        self.data['metadata'] = state['metadata']
+        self.data['accounts'] = state['accounts']
+        self.data.update(state['balances'])
+        self.program_info = state['program_info']
+        self.dialect = PROFILES[state['dialect']]
+        self.record_counts = state['record_counts']
+        
+        # Accounts and balances are added in the order they were read, the
+        # rows already carry the account names from the end of the last parse
+        model = self.data_model
+        for number, account in self.data['accounts'].items():
+            model.add_account(number, account.get('name', ''))
+        for key in ('ib', 'ub', 'res'):
+            for year, balances in self.data[key].items():
+                for account, amount in balances.items():
+                    model.add_balance(key, year, account, amount)
+        model.table.extend(state['table'])
+        
+        n_verifications = model.table.n_verifications
+        res_count = state['res_count'] + self._build_model(
+            self.iter_records(use_mmap=use_mmap, byte_range=byte_range)
+        )
+        logger.debug("Resumed %s at byte %d: %d new verifications",
+                     self.file_path, byte_range[0], model.table.n_verifications - n_verifications)
+        return res_count
+    
+    def parse_raw(self):
+        """Parse the SIE file and return raw parsed data without converting to data model."""
+        try:
+            res_count = self._consume_records(self.iter_records())
             
-            print("Directly searching for #RES patterns in file content:")
-            for pattern in res_patterns:
-                if pattern in file_content:
-                    print(f"  Found pattern: {pattern}")
-                else:
-                    print(f"  NOT found: {pattern}")
+            logger.debug("Raw parse of %s: %d RES lines", self.file_path, res_count)
             
-            # Also try with different line endings
-            print("Checking with different line endings:")
-            for pattern in res_patterns:
-                if pattern in file_content.replace('\r\n', '\n'):
-                    print(f"  Found pattern with LF: {pattern}")
-                elif pattern in file_content.replace('\n', '\r\n'):
-                    print(f"  Found pattern with CRLF: {pattern}")
-                
-            # Now continue with normal parsing using the successful encoding
-            with codecs.open(self.file_path, 'r', encoding=encoding) as file:
-                current_ver = None
-                in_verification_block = False
-                res_count = 0
+            return self.data
                 
-                # Read the entire file content for direct search
-                file_content = file.read()
-                
-                # Direct search for specific #RES lines
-                res_patterns = [
-                    "#RES 0 3011", "#RES -1 3740", "#RES 0 3740", "#RES -1 3790",
-                    "#RES -1 5410", "#RES 0 5410", "#RES -1 6230", "#RES 0 6230",
-                    "#RES 0 6420", "#RES -1 6570", "#RES 0 6570", "#RES -1 8999",
-                    "#RES 0 8999"
-                ]
+        except Exception:
+            logger.exception("Error parsing SIE file %s", self.file_path)
+            return None
+    
+    def _consume_records(self, records):
+        """Collect verifications from a record stream into self.data; return the number of RES records."""
+        res_count = 0
+        for record in records:
+            if record.kind == 'VER':
+                self.data['verifications'].append(record.data)
+            elif record.kind == 'RES':
+                res_count += 1
+        return res_count
+    
+    def iter_records(self, kinds=None, encoding='cp437', use_mmap=False, byte_range=None,
+                     skip_verifications=False):
+        """
+        Stream the SIE file and yield one SIERecord at a time.
+        
+        Header records (#FLAGGA, #PROGRAM, #RAR, ...) are stored in
+        self.data['metadata'] as they are read and are not yielded. Accounts
+        and balances are both stored and yielded, so later records can see
+        account names. Verifications are yielded as complete #VER blocks with
+        their #TRANS/#RTRANS rows and are NOT collected in self.data, which
+        keeps memory bounded for callers that filter or stop early.
+        
+        Args:
+            kinds: Optional collection of record kinds to yield
+                   ('KONTO', 'SRU', 'IB', 'UB', 'RES', 'VER'). Defaults to all.
+            encoding: Text encoding of the file (SIE 4 uses PC8/CP437)
+            use_mmap: Memory-map the file and tokenize transaction rows as raw
+                      bytes, decoding only the fields that are kept. Other
+                      records are decoded line by line.
+            byte_range: Optional (start, end) byte offsets to parse only part
+                        of the file. Offsets must fall on line boundaries.
+            skip_verifications: Skip #VER records and their { } blocks by
+                                scanning for the closing brace, without
+                                reading the rows. Implies use_mmap.
+            
+        Yields:
+            SIERecord instances in file order
+        """
+        wanted = set(kinds) if kinds is not None else None
+        record_handlers = self.RECORD_HANDLERS
+        row_handlers = self.ROW_HANDLERS
+        
+        # Rows that can skip decoding in mmap mode, unless a plugin replaced
+        # the built-in handler for that label
+        bytes_rows = {
+            label.encode('ascii'): kind
+            for label, (kind, handler) in self._BYTES_ROW_KINDS.items()
+            if row_handlers.get(label) is handler
+        }
+        
+        if skip_verifications:
+            use_mmap = True
+        
+        # Lines per record label (without '#'), for the parse statistics
+        counts = self.record_counts
+        
+        with self._open_lines(encoding, use_mmap, byte_range, skip_verifications) as lines:
+            current_ver = None
+            in_verification_block = False
+            
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
                 
-                print("Directly searching for #RES patterns in file content:")
-                for pattern in res_patterns:
-                    if pattern in file_content:
-                        print(f"  Found pattern: {pattern}")
-                    else:
-                        print(f"  NOT found: {pattern}")
+                if use_mmap:
+                    label = line.split(None, 1)[0]
+                    row_kind = bytes_rows.get(label)
+                    if row_kind is not None:
+                        counts[row_kind] = counts.get(row_kind, 0) + 1
+                        if current_ver:
+                            fields = self._decode_row_fields(tokenize_bytes(line), encoding)
+                            self._build_transaction_row(fields, current_ver, row_kind)
+                        continue
+                    if skip_verifications and (label == b'#VER' or label == b'VER'):
+                        counts['VER'] = counts.get('VER', 0) + 1
+                        continue
+                    line = line.decode(encoding)
                 
-                # Reset file position for normal parsing
-                file.seek(0)
+                record = None
                 
-                for line in file:
-                    line = line.strip()
-                    if not line:
-                        continue
+                if line[0] == '#':
+                    # Extract the record label once and dispatch through the
+                    # handler tables instead of probing every known prefix
+                    label = line.split(None, 1)[0]
+                    counts[label[1:]] = counts.get(label[1:], 0) + 1
                     
-                    # Special debug for RES lines
-                    if line.startswith('#RES'):
-                        print(f"Found RES line: {line}")
-                        res_count += 1
-                    
-                    # Parse different section types
-                    if line.startswith('#FLAGGA'):
-                        self._parse_flagga(line)
-                    elif line.startswith('#PROGRAM'):
-                        self._parse_program(line)
-                    elif line.startswith('#FORMAT'):
-                        self._parse_format(line)
-                    elif line.startswith('#GEN'):
-                        self._parse_gen(line)
-                    elif line.startswith('#SIETYP'):
-                        self._parse_sietyp(line)
-                    elif line.startswith('#RAR'):
-                        self._parse_rar(line)
-                    elif line.startswith('#FNAMN'):
-                        self._parse_fnamn(line)
-                    elif line.startswith('#ORGNR'):
-                        self._parse_orgnr(line)
-                    elif line.startswith('#ADRESS'):
-                        self._parse_adress(line)
-                    elif line.startswith('#KPTYP'):
-                        self._parse_kptyp(line)
-                    elif line.startswith('#KONTO'):
-                        self._parse_konto(line)
-                    elif line.startswith('#SRU'):
-                        self._parse_sru(line)
-                    elif line.startswith('#IB'):
-                        self._parse_ib(line)
-                    elif line.startswith('#UB'):
-                        self._parse_ub(line)
-                    elif line.startswith('#RES'):
-                        self._parse_res(line)
-                    elif line.startswith('#VER') or line.startswith('VER '):
+                    row_handler = row_handlers.get(label)
+                    if row_handler is not None:
+                        # Transaction rows belong to the open verification
+                        if current_ver:
+                            row_handler(self, line, current_ver)
+                    elif label == '#VER':
                         # Start a new verification
                         if current_ver and not in_verification_block:
-                            self.data['verifications'].append(current_ver)
+                            record = SIERecord('VER', current_ver)
                         current_ver = self._parse_ver(line)
-                    elif line.startswith('#TRANS') and current_ver:
-                        # Add transaction to current verification
-                        self._parse_trans(line, current_ver)
-                    elif line.startswith('#RTRANS') and current_ver:
-                        # Add reversed transaction to current verification
-                        self._parse_rtrans(line, current_ver)
-                    elif line.startswith('#BTRANS') and current_ver:
-                        # Add budget transaction
-                        self._parse_btrans(line)
-                    elif line.startswith('{'):
-                        # Start of verification block
-                        in_verification_block = True
-                    elif line.startswith('}'):
-                        # End of verification block
+                    else:
+                        handler = record_handlers.get(label)
+                        if handler is not None:
+                            record = handler(self, line)
+                elif line[0] == '{':
+                    # Start of verification block; '{}' or '{ #TRANS ... }'
+                    # also ends it on the same line
+                    closes = _closes_block(line)
+                    in_verification_block = True
+                    inner = (line[1:-1] if closes else line[1:]).strip()
+                    if inner:
+                        label = inner.split(None, 1)[0]
+                        row_handler = row_handlers.get(label)
+                        if row_handler is not None:
+                            counts[label[1:]] = counts.get(label[1:], 0) + 1
+                            if current_ver:
+                                row_handler(self, inner, current_ver)
+                    if closes:
                         if current_ver:
-                            self.data['verifications'].append(current_ver)
+                            record = SIERecord('VER', current_ver)
                             current_ver = None
                         in_verification_block = False
+                elif line[0] == '}':
+                    # End of verification block
+                    if current_ver:
+                        record = SIERecord('VER', current_ver)
+                        current_ver = None
+                    in_verification_block = False
+                elif line.startswith('VER '):
+                    counts['VER'] = counts.get('VER', 0) + 1
+                    if current_ver and not in_verification_block:
+                        record = SIERecord('VER', current_ver)
+                    current_ver = self._parse_ver(line)
+                elif line.startswith('RES') and not in_verification_block:
+                    # Some exports write result records without the # prefix
+                    counts['RES'] = counts.get('RES', 0) + 1
+                    record = self._parse_res(line)
                 
-                # Add the last verification if not already added
-                if current_ver and not in_verification_block:
-                    self.data['verifications'].append(current_ver)
-                
-                # Debug the result accounts
-                print(f"Raw parse: Processed {res_count} RES lines")
-                print(f"Raw parse: RES data in parser: {self.data['res']}")
-                
-                return self.data
-                
-        except Exception as e:
-            import traceback
-            print(f"Error parsing SIE file: {e}")
-            print(traceback.format_exc())
-            return None
+                if record is not None and (wanted is None or record.kind in wanted):
+                    yield record
+            
+            # Make sure the dialect is recorded even if no record needed it
+            self._get_dialect()
+            
+            # Yield the last verification if it was not closed by a block
+            if current_ver and not in_verification_block:
+                if wanted is None or 'VER' in wanted:
+                    yield SIERecord('VER', current_ver)
     
-    def _extract_quoted_string(self, text):
-        """Extract string enclosed in quotes."""
-        match = re.search(r'"([^"]*)"', text)
-        if match:
-            return match.group(1)
-        return ""
+    @contextmanager
+    def _open_lines(self, encoding, use_mmap, byte_range=None, skip_blocks=False):
+        """
+        Open the file and yield an iterable of str lines, or raw bytes lines if use_mmap.
+        
+        With skip_blocks (mmap only), lines inside { } verification blocks are left out.
+        """
+        if not use_mmap:
+            if byte_range is None:
+                with codecs.open(self.file_path, 'r', encoding=encoding) as file:
+                    yield file
+                return
+            start, end = byte_range
+            with open(self.file_path, 'rb') as file:
+                file.seek(start)
+                chunk = file.read(end - start)
+            yield chunk.decode(encoding).splitlines()
+            return
+        
+        with open(self.file_path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                # mmap cannot map an empty file
+                yield iter(())
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if skip_blocks:
+                    start, end = byte_range or (0, len(mapped))
+                    yield self._iter_mapped_outside_blocks(mapped, start, end)
+                elif byte_range is None:
+                    yield iter(mapped.readline, b'')
+                else:
+                    yield self._iter_mapped_range(mapped, *byte_range)
     
-    def _extract_values(self, line):
-        """Extract all values from a line, respecting quoted strings."""
-        values = []
-        parts = line.split(' ')
-        i = 0
+    @staticmethod
+    def _iter_mapped_outside_blocks(mapped, start, end):
+        """Yield the raw lines between two byte offsets that are not inside { } blocks."""
+        pos = start
+        while pos < end:
+            block_start = _BLOCK_START_RE.search(mapped, pos, end)
+            stop = block_start.start() if block_start else end
+            if stop > pos:
+                yield from mapped[pos:stop].splitlines()
+            if block_start is None:
+                return
+            # A block opened and closed on one line ('{}') ends with that line
+            line_end = mapped.find(b'\n', block_start.end(), end)
+            line_end = end if line_end == -1 else line_end
+            if _closes_block(mapped[block_start.start():line_end].decode('latin-1')):
+                pos = line_end
+                continue
+            # Jump to the closing brace; the rows in between are never split
+            block_end = _BLOCK_END_RE.search(mapped, block_start.end(), end)
+            if block_end is None:
+                return
+            pos = block_end.end()
+    
+    @staticmethod
+    def _iter_mapped_range(mapped, start, end):
+        """Yield the raw lines of a memory-mapped file between two byte offsets."""
+        mapped.seek(start)
+        while mapped.tell() < end:
+            line = mapped.readline()
+            if not line:
+                break
+            yield line
+    
+    def _decode_row_fields(self, fields, encoding):
+        """
+        Decode the raw bytes fields of a transaction row.
         
-        while i < len(parts):
-            if parts[i].startswith('"'):
-                # Start of a quoted string
-                quoted_value = parts[i]
-                
-                # If the quote isn't closed in this part, continue to the next parts
-                while i + 1 < len(parts) and not quoted_value.endswith('"'):
-                    i += 1
-                    quoted_value += ' ' + parts[i]
-                
-                # Remove the quotes and add to values
-                values.append(quoted_value[1:-1] if quoted_value.endswith('"') else quoted_value[1:])
-            elif parts[i]:  # Skip empty parts
-                # Clean up the value - remove any non-standard characters that might affect parsing
-                clean_value = parts[i].strip()
-                values.append(clean_value)
-            
-            i += 1
+        Account numbers, object lists and dates repeat across rows and are
+        decoded once per distinct value through a cache; the amount and text
+        are decoded individually. Quantity and signature are not used and
+        are left out.
+        """
+        symbols = self._symbols
+        decoded = []
+        for i, field in enumerate(fields[:6]):
+            if i == 3 or i == 5:
+                # ASCII fields skip the (pure Python) CP437 charmap codec
+                decoded.append(field.decode('ascii') if field.isascii() else field.decode(encoding))
+            else:
+                value = symbols.get(field)
+                if value is None:
+                    value = symbols[field] = self._intern(field.decode(encoding))
+                decoded.append(value)
+        return decoded
+    
+    @classmethod
+    def register_record_handler(cls, label, handler, row=False):
+        """
+        Register a handler for a custom or vendor-specific record label.
+        
+        Record handlers are called as handler(parser, line) and may store
+        data on parser.data and/or return an SIERecord to be yielded by
+        iter_records(). Row handlers (row=True) are called as
+        handler(parser, line, verification) for lines inside a #VER block.
         
-        return values
+        Registering on a subclass does not affect the parent class.
+        
+        Args:
+            label: Record label including the # prefix, e.g. '#OBJEKT'
+            handler: Callable implementing the record
+            row: True if the record is a row of the current verification
+        """
+        if row:
+            cls.ROW_HANDLERS = {**cls.ROW_HANDLERS, label: handler}
+        else:
+            cls.RECORD_HANDLERS = {**cls.RECORD_HANDLERS, label: handler}
+    
+    def _extract_values(self, line):
+        """Extract all values from a line, respecting quoted strings and object lists."""
+        return tokenize(line)
     
     def _parse_flagga(self, line):
         """Parse #FLAGGA section (flags)."""
-        parts = line.split(' ')
+        parts = self._extract_values(line)
         if len(parts) > 1:
             self.data['metadata']['flagga'] = parts[1]
     
     def _parse_program(self, line):
         """Parse #PROGRAM section (source program)."""
-        program_string = self._extract_quoted_string(line)
+        # Format is "Program Name" Version
+        parts = self._extract_values(line)
+        program_string = parts[1] if len(parts) > 1 else ""
         self.data['metadata']['program'] = program_string
         
-        # Extract program name and version
         if program_string:
-            # Try to extract program name and version
-            # Format is typically "Program Name" Version
-            parts = program_string.split('"')
-            if len(parts) > 1:
-                self.program_info['name'] = parts[1].strip()
-                if len(parts) > 2 and parts[2].strip():
-                    self.program_info['version'] = parts[2].strip()
-            else:
-                # Alternative format without quotes
-                parts = program_string.split()
-                if parts:
-                    self.program_info['name'] = parts[0]
-                    if len(parts) > 1:
-                        self.program_info['version'] = parts[1]
+            self.program_info['name'] = program_string
+            if len(parts) > 2:
+                self.program_info['version'] = parts[2]
     
     def _parse_format(self, line):
         """Parse #FORMAT section (SIE format)."""
-        parts = line.split(' ')
+        parts = self._extract_values(line)
         if len(parts) > 1:
             self.data['metadata']['format'] = parts[1]
     
     def _parse_gen(self, line):
         """Parse #GEN section (generation date)."""
-        parts = line.split(' ')
+        parts = self._extract_values(line)
         if len(parts) > 1:
             self.data['metadata']['gen_date'] = parts[1]
+        if len(parts) > 2:
+            # Signature; used to detect the dialect when #PROGRAM is not conclusive
+            self.data['metadata']['gen_sign'] = parts[2]
     
     def _parse_sietyp(self, line):
         """Parse #SIETYP section (SIE type)."""
-        parts = line.split(' ')
+        parts = self._extract_values(line)
         if len(parts) > 1:
             self.data['metadata']['sie_type'] = parts[1]
     
     def _parse_fnamn(self, line):
         """Parse #FNAMN section (company name)."""
-        self.data['metadata']['company_name'] = self._extract_quoted_string(line)
+        parts = self._extract_values(line)
+        self.data['metadata']['company_name'] = parts[1] if len(parts) > 1 else ""
     
     def _parse_orgnr(self, line):
         """Parse #ORGNR section (organization number)."""
-        print(f"Parsing ORGNR line: '{line}'")
-        
         # Handle both with and without the # prefix
         if line.startswith('#'):
             line = line[1:].strip()  # Remove the # and any leading whitespace
         
-        parts = line.split(' ')
-        print(f"ORGNR parts: {parts}")
+        parts = self._extract_values(line)
         
         if len(parts) > 1:
             org_number = parts[1].strip()
-            print(f"Found organization number: {org_number}")
             self.data['metadata']['organization_number'] = org_number
             
             # Also store in org_number for backward compatibility
             self.data['metadata']['org_number'] = org_number
         else:
-            print(f"Warning: ORGNR line has fewer than 2 parts: {parts}")
+            logger.warning("ORGNR line has fewer than 2 parts: %r", line)
     
     def _parse_rar(self, line):
         """Parse #RAR section (fiscal year)."""
-        print(f"Parsing RAR line: '{line}'")
-        
         # Handle both with and without the # prefix
         if line.startswith('#'):
             line = line[1:].strip()  # Remove the # and any leading whitespace
         
         parts = self._extract_values(line)
-        print(f"RAR parts: {parts}")
         
         if len(parts) >= 3:
             year_id = parts[1]
             start_date = parts[2]
             end_date = parts[3] if len(parts) > 3 else None
             
-            print(f"Found fiscal year: Year ID={year_id}, Start={start_date}, End={end_date}")
-            
             if 'fiscal_years' not in self.data['metadata']:
                 self.data['metadata']['fiscal_years'] = {}
             
@@ -470,7 +684,6 @@ class SIEParser:
                 if year_id == '0' or year_id == 0:
                     if start_date and len(start_date) >= 4:
                         self.data['metadata']['rar'] = start_date[:4]
-                        print(f"Stored RAR value: {start_date[:4]}")
                 
                 # Store formatted dates for easier access
                 if start_date and len(start_date) >= 8:
@@ -483,19 +696,21 @@ class SIEParser:
                     self.data['metadata']['financial_year_end'] = formatted_end
                     self.data['metadata']['current_fiscal_year_end_year'] = end_date[:4]
         else:
-            print(f"Warning: RAR line has fewer than 3 parts: {parts}")
+            logger.warning("RAR line has fewer than 3 parts: %r", line)
     
     def _parse_konto(self, line):
         """Parse #KONTO section (account)."""
         parts = self._extract_values(line)
         if len(parts) >= 2:
-            account_number = parts[1]
+            account_number = self._intern(parts[1])
             account_name = parts[2] if len(parts) > 2 else ""
             
             self.data['accounts'][account_number] = {
                 'name': account_name,
                 'type': self._determine_account_type(account_number)
             }
+            return SIERecord('KONTO', {'account': account_number, **self.data['accounts'][account_number]})
+        return None
     
     def _parse_ib(self, line):
         """Parse #IB section (opening balance)."""
@@ -509,6 +724,8 @@ class SIEParser:
                 self.data['ib'][year] = {}
             
             self.data['ib'][year][account] = amount
+            return SIERecord('IB', {'year': year, 'account': account, 'amount': amount})
+        return None
     
     def _parse_ub(self, line):
         """Parse #UB section (closing balance)."""
@@ -522,150 +739,73 @@ class SIEParser:
                 self.data['ub'][year] = {}
             
             self.data['ub'][year][account] = amount
+            return SIERecord('UB', {'year': year, 'account': account, 'amount': amount})
+        return None
     
     def _parse_res(self, line):
         """Parse #RES section (result)."""
-        # Print the raw line for debugging
-        print(f"Raw RES line: '{line}'")
-        
         # Handle both with and without the # prefix
         original_line = line
         if line.startswith('#'):
             line = line[1:].strip()  # Remove the # and any leading whitespace
         
-        # Try multiple parsing approaches to ensure we capture the data
         parts = self._extract_values(line)
-        print(f"Extracted RES parts: {parts}")
-        
-        success = False
+        parsed = None
         
         # Standard format: RES year account amount
         if len(parts) >= 3 and parts[0].upper() == 'RES':
+            amount_str = parts[3] if len(parts) > 3 else '0'
             try:
-                year = parts[1]  # This is often 0 for current year, -1 for previous year
-                account = parts[2]
-                amount = float(parts[3]) if len(parts) > 3 else 0.0
-                
-                print(f"Parsing RES (standard): Year={year}, Account={account}, Amount={amount}")
-                
-                # Ensure year is stored as a string for consistent lookup
-                year_key = str(year)
-                account_key = str(account)
-                
-                if year_key not in self.data['res']:
-                    self.data['res'][year_key] = {}
-                
-                self.data['res'][year_key][account_key] = amount
-                success = True
-                
-                # Debug info about what was stored
-                print(f"Stored RES data for year {year_key}, account {account_key}: {amount}")
-                print(f"Current RES data structure: {self.data['res']}")
-            except (ValueError, IndexError) as e:
-                print(f"Error parsing RES parts: {e}")
+                parsed = (parts[1], parts[2], float(amount_str.replace(',', '.')))
+            except ValueError:
+                pass
         
-        # Approach 2: Try multiple regex patterns for different SIE file formats
-        if not success:
-            try:
-                import re
-                
-                # List of patterns to try (from most specific to most general)
-                patterns = [
-                    # Standard format: RES year account amount
-                    r'RES\s+(-?\d+)\s+(\d+)\s+(-?[\d\.]+)',
-                    
-                    # With optional spaces and different decimal format
-                    r'RES\s+(-?\d+)\s+(\d+)\s+(-?[\d,\.]+)',
-                    
-                    # With curly braces (sometimes used in SIE files)
-                    r'RES\s+(-?\d+)\s+(\d+)\s*{\s*(-?[\d\.]+)\s*}',
-                    
-                    # With quotes (sometimes used in SIE files)
-                    r'RES\s+(-?\d+)\s+(\d+)\s+"(-?[\d\.]+)"',
-                    
-                    # Bokio specific format
-                    r'RES\s+"(-?\d+)"\s+"(\d+)"\s+"(-?[\d\.]+)"',
-                    
-                    # Fortnox specific format
-                    r'RES\s+(-?\d+)\s+(\d+)\s+(-?[\d\.]+)\s+\{.*\}',
-                    
-                    # Fallback general pattern (should catch most variations)
-                    r'#?RES\s+(-?\d+)\s+(\d+)[^\d-]+(-?[\d\.]+)',
-                ]
-                
-                # Try each pattern in sequence
-                for i, pattern in enumerate(patterns):
-                    # Try both with and without the # prefix
-                    for test_line in [line, original_line]:
-                        match = re.search(pattern, test_line)
-                        if match:
-                            year, account, amount_str = match.groups()
-                            
-                            # Handle different decimal formats
-                            amount_str = amount_str.replace(',', '.')
-                            
-                            try:
-                                amount = float(amount_str)
-                                print(f"Match with pattern {i+1}: Year={year}, Account={account}, Amount={amount}")
-                                
-                                # Ensure consistent types
-                                year_key = str(year)
-                                account_key = str(account)
-                                
-                                if year_key not in self.data['res']:
-                                    self.data['res'][year_key] = {}
-                                
-                                self.data['res'][year_key][account_key] = amount
-                                success = True
-                                print(f"Successfully parsed RES line with pattern {i+1}")
-                                break  # Exit the inner loop
-                            except ValueError as e:
-                                print(f"Failed to convert amount '{amount_str}' to float: {e}")
-                    
-                    if success:
-                        break  # Exit the outer loop if successful
-                    
-            except Exception as e:
-                print(f"Error in regex parsing: {e}")
+        # Dialect-specific workarounds only run for records that fail the standard parse
+        if parsed is None:
+            parsed = self._parse_res_fallback(line)
         
-        # Special case: If there's a number after RES but the account or amount is missing or malformed
-        if not success and re.search(r'RES\s+(-?\d+)', line):
-            try:
-                year_match = re.search(r'RES\s+(-?\d+)', line)
-                if year_match:
-                    year = year_match.group(1)
-                    year_key = str(year)
-                    print(f"Found year {year_key} but missing account/amount info in RES line")
-                    
-                    # Look for any numbers that might be account numbers and amounts
-                    numbers = re.findall(r'\b(\d+)\b', line[year_match.end():])
-                    if len(numbers) >= 2:
-                        account = numbers[0]
-                        amount_str = numbers[1]
-                        try:
-                            amount = float(amount_str)
-                            account_key = str(account)
-                            
-                            print(f"Extracted potential RES data: Year={year_key}, Account={account_key}, Amount={amount}")
-                            
-                            if year_key not in self.data['res']:
-                                self.data['res'][year_key] = {}
-                            self.data['res'][year_key][account_key] = amount
-                            success = True
-                        except ValueError:
-                            print(f"Failed to convert potential amount '{amount_str}' to float")
-            except Exception as e:
-                print(f"Error in special case parsing: {e}")
+        if parsed is None:
+            logger.warning("Failed to parse RES line: %r", original_line)
+            return None
         
-        # Print warning if parse failed
-        if not success:
-            print(f"WARNING: Failed to parse RES line: {original_line}")
-        else:
-            print(f"Successfully parsed RES line: {original_line}")
-            print(f"Current RES data: {self.data['res']}")
-            
-        # Always return the current state of self.data['res'] for debugging
-        return self.data['res']
+        year_key, account_key, amount = parsed
+        if year_key not in self.data['res']:
+            self.data['res'][year_key] = {}
+        self.data['res'][year_key][account_key] = amount
+        
+        return SIERecord('RES', {'year': year_key, 'account': account_key, 'amount': amount})
+    
+    def _parse_res_fallback(self, line):
+        """Recover (year, account, amount) from a malformed RES line using the dialect profile."""
+        dialect = self._get_dialect()
+        
+        for pattern in dialect.res_patterns:
+            match = pattern.search(line)
+            if match:
+                year, account, amount_str = match.groups()
+                try:
+                    return year, account, float(amount_str.replace(',', '.'))
+                except ValueError:
+                    logger.debug("Failed to convert RES amount %r to float", amount_str)
+        
+        # Last resort: a year followed by any two numbers
+        if dialect.res_salvage_numbers:
+            year_match = re.search(r'RES\s+(-?\d+)', line)
+            if year_match:
+                numbers = re.findall(r'\b(\d+)\b', line[year_match.end():])
+                if len(numbers) >= 2:
+                    logger.debug("Salvaged RES data from numbers in line %r", line)
+                    return year_match.group(1), numbers[0], float(numbers[1])
+        
+        return None
+    
+    def _get_dialect(self):
+        """Return the dialect profile, detecting it from the header records on first use."""
+        if self.dialect is None:
+            self.dialect = detect_dialect(self.data['metadata'])
+            self.data['metadata']['dialect'] = self.dialect.name
+            logger.debug("Detected SIE dialect: %s", self.dialect.name)
+        return self.dialect
     
     def _parse_ver(self, line):
         """Parse #VER section (verification)."""
@@ -706,13 +846,11 @@ class SIEParser:
         
         # Format date if it's in YYYYMMDD format
         if ver_date and len(ver_date) == 8 and ver_date.isdigit():
-            ver_date = f"{ver_date[:4]}-{ver_date[4:6]}-{ver_date[6:8]}"
-        
-        print(f"Creating verification: series={series}, number={ver_number}, date={ver_date}, text={ver_text}")
+            ver_date = self._format_date(ver_date)
         
         # Create a Verification object with keyword arguments
         verification = Verification(
-            series=series,
+            series=self._intern(series),
             number=ver_number,
             date=ver_date,
             text=ver_text
@@ -729,245 +867,109 @@ class SIEParser:
     
     def _parse_trans(self, line, current_ver):
         """Parse #TRANS section (transaction)."""
-        if line.startswith('#'):
-            line = line[1:]  # Remove the # if present
-            
-        parts = self._extract_values(line)
-        account = ""
-        amount = 0.0
-        trans_date = ""
-        trans_text = ""
-        object_info = ""
-        quantity = 0.0
-        sign = ""  # For signature/user info
-        
-        # According to SIE 4 standard, the format for TRANS is:
-        # #TRANS account object_info amount trans_date trans_text quantity sign
-        
-        # Get account number (always in position 1)
-        if len(parts) >= 2:
-            account = parts[1]
-        
-        # Parse object info (position 2)
-        if len(parts) >= 3:
-            # Object info can be {} or {dimension "value"}
-            if parts[2] == '{}' or (parts[2].startswith('{') and parts[2].endswith('}')):
-                object_info = parts[2]
-            else:
-                # If it's a multi-part object notation, collect all parts
-                if parts[2].startswith('{') and not parts[2].endswith('}'):
-                    object_parts = [parts[2]]
-                    i = 3
-                    while i < len(parts) and not parts[i].endswith('}'):
-                        object_parts.append(parts[i])
-                        i += 1
-                    
-                    if i < len(parts):
-                        object_parts.append(parts[i])  # Add the closing part
-                        object_info = ' '.join(object_parts)
-                        
-                        # Adjust parts list to skip the object parts we've processed
-                        new_parts = parts[:2] + parts[i+1:]
-                        parts = new_parts
-        
-        # Parse amount (position 3 after accounting for object info)
-        if len(parts) >= 4:
-            try:
-                # Handle both dot and comma as decimal separators
-                amount_str = parts[3].replace(',', '.')
-                amount = float(amount_str)
-            except (ValueError, TypeError):
-                pass
-        
-        # Parse transaction date if present (position 4)
-        if len(parts) >= 5:
-            if len(parts[4]) == 8 and parts[4].isdigit():
-                # Format: YYYYMMDD
-                trans_date = f"{parts[4][:4]}-{parts[4][4:6]}-{parts[4][6:8]}"
-            elif parts[4] and parts[4] != '""':
-                # If not a date, it might be text
-                if parts[4].startswith('"') and parts[4].endswith('"'):
-                    trans_text = parts[4][1:-1]  # Remove quotes
-                else:
-                    trans_text = parts[4]
-        
-        # Parse transaction text if present (position 5)
-        if len(parts) >= 6 and not trans_text:
-            if parts[5].startswith('"') and parts[5].endswith('"'):
-                trans_text = parts[5][1:-1]  # Remove quotes
-            else:
-                trans_text = parts[5]
-        
-        # Parse quantity if present (position 6)
-        if len(parts) >= 7:
-            try:
-                quantity = float(parts[6])
-            except (ValueError, TypeError):
-                pass
-        
-        # Parse signature/user if present (position 7)
-        if len(parts) >= 8:
-            if parts[7].startswith('"') and parts[7].endswith('"'):
-                sign = parts[7][1:-1]  # Remove quotes
-            else:
-                sign = parts[7]
-        
-        # If no transaction date was provided, use the verification date
-        if not trans_date and current_ver and hasattr(current_ver, 'date'):
-            trans_date = current_ver.date
-        
-        print(f"Parsed transaction: Account={account}, Amount={amount}, Date={trans_date}, Text={trans_text}, Object={object_info}, Quantity={quantity}, Sign={sign}")
-        
-        # Create a Transaction object
-        transaction = Transaction(
-            account=account,
-            amount=amount,
-            date=trans_date,
-            text=trans_text
-        )
-        
-        # Add additional properties if available
-        if object_info:
-            transaction.object_info = object_info
-        if quantity != 0.0:
-            transaction.quantity = quantity
-        if sign:
-            transaction.sign = sign
-        
-        # Add account name if available
-        if account in self.data['accounts']:
-            transaction.account_name = self.data['accounts'][account].get('name', '')
-        
-        # Add transaction to current verification
-        if current_ver and hasattr(current_ver, 'transactions'):
-            current_ver.transactions.append(transaction)
-        
-        return transaction
+        return self._parse_transaction_row(line, current_ver, 'TRANS')
     
     def _parse_rtrans(self, line, current_ver):
         """Parse #RTRANS section (reversed transaction)."""
-        # RTRANS follows the same format as TRANS according to SIE 4 standard
-        if line.startswith('#'):
-            line = line[1:]  # Remove the # if present
-            
-        parts = self._extract_values(line)
-        account = ""
+        return self._parse_transaction_row(line, current_ver, 'RTRANS')
+    
+    def _parse_btrans(self, line, current_ver):
+        """Parse #BTRANS section (budget transaction)."""
+        return self._parse_transaction_row(line, current_ver, 'BTRANS')
+    
+    def _parse_transaction_row(self, line, current_ver, kind):
+        """
+        Parse a #TRANS, #RTRANS or #BTRANS row into a Transaction.
+        
+        All three share the SIE 4 layout:
+        #TRANS account {object_list} amount trans_date "trans_text" quantity "sign"
+        
+        RTRANS amounts are negated. BTRANS rows are kept on the verification's
+        budget_transactions list so they do not affect balances. Quantity and
+        sign are not read; the data model has no place for them.
+        """
+        return self._build_transaction_row(self._extract_values(line), current_ver, kind)
+    
+    def _build_transaction_row(self, parts, current_ver, kind):
+        """Build a Transaction from the tokenized fields of a transaction row."""
+        n_parts = len(parts)
+        account = self._intern(parts[1]) if n_parts >= 2 else ""
         amount = 0.0
         trans_date = ""
         trans_text = ""
-        object_info = ""
-        quantity = 0.0
-        sign = ""  # For signature/user info
-        
-        # According to SIE 4 standard, the format for RTRANS is:
-        # #RTRANS account object_info amount trans_date trans_text quantity sign
-        
-        # Get account number (always in position 1)
-        if len(parts) >= 2:
-            account = parts[1]
+        objects = ()
         
-        # Parse object info (position 2)
-        if len(parts) >= 3:
-            # Object info can be {} or {dimension "value"}
-            if parts[2] == '{}' or (parts[2].startswith('{') and parts[2].endswith('}')):
-                object_info = parts[2]
-            else:
-                # If it's a multi-part object notation, collect all parts
-                if parts[2].startswith('{') and not parts[2].endswith('}'):
-                    object_parts = [parts[2]]
-                    i = 3
-                    while i < len(parts) and not parts[i].endswith('}'):
-                        object_parts.append(parts[i])
-                        i += 1
-                    
-                    if i < len(parts):
-                        object_parts.append(parts[i])  # Add the closing part
-                        object_info = ' '.join(object_parts)
-                        
-                        # Adjust parts list to skip the object parts we've processed
-                        new_parts = parts[:2] + parts[i+1:]
-                        parts = new_parts
+        # Object list (position 2); the tokenizer keeps {...} as one field
+        if n_parts >= 3:
+            object_list = parts[2]
+            if object_list != '{}' and object_list.startswith('{'):
+                objects = self._objects.get(object_list)
+                if objects is None:
+                    objects = self._objects[object_list] = parse_object_list(object_list)
         
-        # Parse amount (position 3 after accounting for object info)
-        if len(parts) >= 4:
+        # Amount (position 3), with either dot or comma as decimal separator
+        if n_parts >= 4:
+            amount_str = parts[3]
+            if ',' in amount_str:
+                amount_str = amount_str.replace(',', '.')
             try:
-                # Handle both dot and comma as decimal separators
-                amount_str = parts[3].replace(',', '.')
-                # For RTRANS, negate the amount
-                amount = -float(amount_str)
-            except (ValueError, TypeError):
+                amount = float(amount_str)
+            except ValueError:
                 pass
         
-        # Parse transaction date if present (position 4)
-        if len(parts) >= 5:
-            if len(parts[4]) == 8 and parts[4].isdigit():
-                # Format: YYYYMMDD
-                trans_date = f"{parts[4][:4]}-{parts[4][4:6]}-{parts[4][6:8]}"
-            elif parts[4] and parts[4] != '""':
-                # If not a date, it might be text
-                if parts[4].startswith('"') and parts[4].endswith('"'):
-                    trans_text = parts[4][1:-1]  # Remove quotes
-                else:
-                    trans_text = parts[4]
-        
-        # Parse transaction text if present (position 5)
-        if len(parts) >= 6 and not trans_text:
-            if parts[5].startswith('"') and parts[5].endswith('"'):
-                trans_text = parts[5][1:-1]  # Remove quotes
-            else:
-                trans_text = parts[5]
+        # Transaction date (position 4); some exports put the text here instead
+        if n_parts >= 5:
+            date_field = parts[4]
+            if len(date_field) == 8 and date_field.isdigit():
+                trans_date = self._format_date(date_field)
+            elif date_field:
+                trans_text = date_field
         
-        # Parse quantity if present (position 6)
-        if len(parts) >= 7:
-            try:
-                quantity = float(parts[6])
-            except (ValueError, TypeError):
-                pass
+        # Transaction text (position 5)
+        if n_parts >= 6 and not trans_text:
+            trans_text = parts[5]
         
-        # Parse signature/user if present (position 7)
-        if len(parts) >= 8:
-            if parts[7].startswith('"') and parts[7].endswith('"'):
-                sign = parts[7][1:-1]  # Remove quotes
-            else:
-                sign = parts[7]
+        # The exact amount is kept in öre; the float is the one nearest to it
+        amount_ore = amount_to_ore(amount)
+        if kind == 'RTRANS':
+            amount_ore = -amount_ore
+        amount = ore_to_amount(amount_ore)
         
         # If no transaction date was provided, use the verification date
-        if not trans_date and current_ver and hasattr(current_ver, 'date'):
+        if not trans_date:
             trans_date = current_ver.date
         
-        print(f"Parsed RTRANS: Account={account}, Amount={amount}, Date={trans_date}, Text={trans_text}, Object={object_info}, Quantity={quantity}, Sign={sign}")
-        
-        # Create a Transaction object
         transaction = Transaction(
             account=account,
             amount=amount,
             date=trans_date,
-            text=trans_text
+            text=trans_text,
+            objects=objects,
+            amount_ore=amount_ore
         )
         
-        # Add additional properties if available
-        if object_info:
-            transaction.object_info = object_info
-        if quantity != 0.0:
-            transaction.quantity = quantity
-        if sign:
-            transaction.sign = sign
-        
         # Add account name if available
-        if account in self.data['accounts']:
-            transaction.account_name = self.data['accounts'][account].get('name', '')
+        account_data = self.data['accounts'].get(account)
+        if account_data is not None:
+            transaction.account_name = account_data.get('name', '')
         
-        # Add transaction to current verification
-        if current_ver and hasattr(current_ver, 'transactions'):
+        if kind == 'BTRANS':
+            current_ver.budget_transactions.append(transaction)
+        else:
             current_ver.transactions.append(transaction)
         
         return transaction
     
-    def _parse_btrans(self, line):
-        """Parse #BTRANS section (budget transaction)."""
-        # Budget transactions are not currently used in the data model
-        # but we parse them to avoid errors
-        pass
+    def _intern(self, value):
+        """Return the shared copy of a repeating string from the per-parse symbol table."""
+        return self._strings.setdefault(value, value)
+    
+    def _format_date(self, date):
+        """Format a YYYYMMDD date as YYYY-MM-DD, reusing earlier results."""
+        formatted = self._dates.get(date)
+        if formatted is None:
+            formatted = self._dates[date] = self._intern(f"{date[:4]}-{date[4:6]}-{date[6:8]}")
+        return formatted
     
     def _determine_account_type(self, account_number):
         """Determine account type based on Swedish BAS standard."""
@@ -987,102 +989,6 @@ class SIEParser:
         else:
             return "other"
     
-    def _process_data(self):
-        """Process and organize the parsed data."""
-        # Calculate transaction totals per account
-        account_totals = {}
-        
-        for ver in self.data['verifications']:
-            # Check if ver is a Verification object or a dictionary
-            if hasattr(ver, 'transactions'):
-                transactions = ver.transactions
-            else:
-                transactions = ver.get('transactions', [])
-                
-            for trans in transactions:
-                # Check if trans is a Transaction object or a dictionary
-                if hasattr(trans, 'account'):
-                    account = trans.account
-                    amount = trans.amount
-                else:
-                    account = trans.get('account', '')
-                    amount = trans.get('amount', 0)
-                
-                if account not in account_totals:
-                    account_totals[account] = 0
-                
-                account_totals[account] += amount
-        
-        self.data['account_totals'] = account_totals
-        
-        # Add account names to transactions for easier reference
-        for ver in self.data['verifications']:
-            # Check if ver is a Verification object or a dictionary
-            if hasattr(ver, 'transactions'):
-                transactions = ver.transactions
-            else:
-                transactions = ver.get('transactions', [])
-                
-            for trans in transactions:
-                # Check if trans is a Transaction object or a dictionary
-                if hasattr(trans, 'account'):
-                    account = trans.account
-                    # Use setattr for Transaction objects
-                    if account in self.data['accounts']:
-                        if isinstance(self.data['accounts'][account], dict):
-                            account_name = self.data['accounts'][account].get('name', "Unknown")
-                        else:
-                            account_name = getattr(self.data['accounts'][account], 'name', "Unknown")
-                        setattr(trans, 'account_name', account_name)
-                    else:
-                        setattr(trans, 'account_name', "Unknown")
-                else:
-                    account = trans.get('account', '')
-                    # Use dictionary assignment for dictionary transactions
-                    if account in self.data['accounts']:
-                        if isinstance(self.data['accounts'][account], dict):
-                            trans['account_name'] = self.data['accounts'][account].get('name', "Unknown")
-                        else:
-                            trans['account_name'] = getattr(self.data['accounts'][account], 'name', "Unknown")
-                    else:
-                        trans['account_name'] = "Unknown"
-
-    def _calculate_account_balances(self):
-        """Calculate account balances based on transactions."""
-        # Initialize account balances
-        account_balances = {}
-        
-        # Add opening balances
-        for year, balances in self.data.get('ib', {}).items():
-            for account, amount in balances.items():
-                if account not in account_balances:
-                    account_balances[account] = 0
-                account_balances[account] += amount
-        
-        # Add transaction amounts
-        for ver in self.data['verifications']:
-            # Check if ver is a Verification object or a dictionary
-            if hasattr(ver, 'transactions'):
-                transactions = ver.transactions
-            else:
-                transactions = ver.get('transactions', [])
-                
-            for trans in transactions:
-                # Check if trans is a Transaction object or a dictionary
-                if hasattr(trans, 'account'):
-                    account = trans.account
-                    amount = trans.amount
-                else:
-                    account = trans.get('account', '')
-                    amount = trans.get('amount', 0)
-                
-                if account not in account_balances:
-                    account_balances[account] = 0
-                account_balances[account] += amount
-        
-        # Store account balances
-        self.data['account_balances'] = account_balances
-
     def _parse_adress(self, line):
         """Parse #ADRESS section (company address)."""
         parts = self._extract_values(line)
@@ -1108,3 +1014,39 @@ class SIEParser:
             
             if account in self.data['accounts']:
                 self.data['accounts'][account]['sru_code'] = sru_code
+            return SIERecord('SRU', {'account': account, 'sru_code': sru_code})
+        return None
+    
+    # Record label -> handler(parser, line). Handlers store what they parse in
+    # parser.data and may return an SIERecord for iter_records() to yield.
+    RECORD_HANDLERS = {
+        '#FLAGGA': _parse_flagga,
+        '#PROGRAM': _parse_program,
+        '#FORMAT': _parse_format,
+        '#GEN': _parse_gen,
+        '#SIETYP': _parse_sietyp,
+        '#RAR': _parse_rar,
+        '#FNAMN': _parse_fnamn,
+        '#ORGNR': _parse_orgnr,
+        '#ADRESS': _parse_adress,
+        '#KPTYP': _parse_kptyp,
+        '#KONTO': _parse_konto,
+        '#SRU': _parse_sru,
+        '#IB': _parse_ib,
+        '#UB': _parse_ub,
+        '#RES': _parse_res,
+    }
+    
+    # Verification row label -> handler(parser, line, verification)
+    ROW_HANDLERS = {
+        '#TRANS': _parse_trans,
+        '#RTRANS': _parse_rtrans,
+        '#BTRANS': _parse_btrans,
+    }
+    
+    # Built-in rows that mmap mode parses straight from bytes: label -> (kind, handler)
+    _BYTES_ROW_KINDS = {
+        '#TRANS': ('TRANS', _parse_trans),
+        '#RTRANS': ('RTRANS', _parse_rtrans),
+        '#BTRANS': ('BTRANS', _parse_btrans),
+    }
@@ -0,0 +1,174 @@
+"""
+JSON serialisation of the data model straight to bytes.
+
+SIEDataModel.to_dict() builds the whole file as nested dicts, which the web
+layer then encodes a second time. model_to_json() writes the same JSON
+without that step. iter_model_json() and iter_model_ndjson() yield it in
+pieces for streamed responses.
+
+The verifications make up nearly all of the output. They are written from
+the TransactionTable columns (see TransactionTable.iter_verification_json).
+The small sections (metadata, accounts, balances, statements) go through
+dumps(), which uses orjson when it is installed and the standard library
+json module otherwise.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+# Verifications per piece of iter_model_json() and iter_model_ndjson()
+CHUNK_VERIFICATIONS = 1000
+
+
+def dumps(value) -> bytes:
+    """
+    Compact UTF-8 JSON of a value.
+
+    Args:
+        value: dicts, lists, strings, numbers, booleans and None
+
+    Returns:
+        JSON as bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _balances_dict(balances):
+    return {
+        year: {acc_num: balance.to_dict() for acc_num, balance in year_balances.items()}
+        for year, year_balances in balances.items()
+    }
+
+
+def _iter_members(data_model, sections, chunk_size, verifications='inline'):
+    """
+    The members of the to_dict() object as JSON bytes, without the braces.
+
+    Args:
+        data_model: SIEDataModel
+        sections: See iter_model_json()
+        chunk_size: Verifications per piece
+        verifications: 'inline' (in the to_dict() position), 'last' (after
+                       all other sections) or None (left out)
+
+    Yields:
+        bytes; every member after the first starts with a comma
+    """
+    sections = dict(sections or {})
+
+    def section(key, compute):
+        value = sections.pop(key) if key in sections else compute()
+        return dumps(key) + b':' + dumps(value)
+
+    def verification_member():
+        if 'verifications' in sections:
+            yield b',' + section('verifications', list)
+        else:
+            yield b',"verifications":'
+            for piece in data_model.table.iter_verification_json(chunk_size):
+                yield piece.encode('utf-8')
+
+    yield section('metadata', data_model.metadata.to_dict)
+    yield b',' + section('accounts', lambda: {
+        acc_num: account.to_dict() for acc_num, account in data_model.accounts.items()
+    })
+    if verifications == 'inline':
+        yield from verification_member()
+
+    # Statements are computed before the balances are written, as in to_dict()
+    balance_sheet = section('balance_sheet', data_model.get_balance_sheet)
+    income_statement = section('income_statement', data_model.get_income_statement)
+    yield b',' + section('opening_balances', lambda: _balances_dict(data_model.opening_balances))
+    yield b',' + section('closing_balances', lambda: _balances_dict(data_model.closing_balances))
+    yield b',' + section('results', lambda: _balances_dict(data_model.results))
+    yield b',' + balance_sheet
+    yield b',' + income_statement
+    for key in [key for key in sections if key != 'verifications']:
+        yield b',' + section(key, None)
+    if verifications == 'last':
+        yield from verification_member()
+
+
+def iter_model_json(data_model, sections=None, chunk_size=CHUNK_VERIFICATIONS, verifications_last=False):
+    """
+    Serialize a data model as JSON, piece by piece.
+
+    The pieces joined are the JSON of data_model.to_dict(), with the same
+    keys in the same order.
+
+    Args:
+        data_model: SIEDataModel
+        sections: Optional dict of top-level keys whose values replace the
+                  model's (or are added after them), e.g. recovered results
+        chunk_size: Verifications per piece
+        verifications_last: Write the verifications after all other
+                            sections, so a streamed response starts with
+                            metadata, accounts and balances
+
+    Yields:
+        bytes
+    """
+    yield b'{'
+    yield from _iter_members(data_model, sections, chunk_size, 'last' if verifications_last else 'inline')
+    yield b'}'
+
+
+def iter_model_ndjson(data_model, sections=None, header=None, chunk_size=CHUNK_VERIFICATIONS):
+    """
+    Serialize a data model as newline-delimited JSON, piece by piece.
+
+    The first line is an object with the header fields, verification_count
+    and data: every to_dict() section except the verifications. Each of the
+    following verification_count lines is one verification.
+
+    Args:
+        data_model: SIEDataModel
+        sections: See iter_model_json()
+        header: Optional dict of fields for the first line, e.g. a status
+        chunk_size: Verifications per piece
+
+    Yields:
+        bytes
+    """
+    sections = dict(sections or {})
+    verifications = sections.pop('verifications', None)
+    first_line = dict(header or {})
+    first_line['verification_count'] = (
+        data_model.table.n_verifications if verifications is None else len(verifications)
+    )
+
+    # The header object is left open for the data member
+    yield dumps(first_line)[:-1] + b',"data":{'
+    yield from _iter_members(data_model, sections, chunk_size, verifications=None)
+    yield b'}}\n'
+    if verifications is None:
+        for piece in data_model.table.iter_verification_json(chunk_size, lines=True):
+            yield piece.encode('utf-8')
+    else:
+        for verification in verifications:
+            yield dumps(verification) + b'\n'
+
+
+def model_to_json(data_model, sections=None, include_verifications=True) -> bytes:
+    """
+    The JSON of data_model.to_dict() as UTF-8 bytes, without building the dict.
+
+    Args:
+        data_model: SIEDataModel
+        sections: See iter_model_json()
+        include_verifications: False leaves the verifications out, e.g. for
+                               a summary of a file that is paged through
+
+    Returns:
+        JSON as bytes
+    """
+    if include_verifications:
+        return b''.join(iter_model_json(data_model, sections))
+    sections = {key: value for key, value in (sections or {}).items() if key != 'verifications'}
+    return b'{' + b''.join(_iter_members(data_model, sections, CHUNK_VERIFICATIONS, verifications=None)) + b'}'
@@ -0,0 +1,105 @@
+"""
+SIE 4 line tokenizer.
+
+Splits a single SIE record line into its fields according to the SIE 4
+quoting rules:
+
+- Fields are separated by any run of spaces or tabs.
+- Text fields may be enclosed in double quotes; inside quotes a backslash
+  escapes the next character (``\\"`` for a literal quote).
+- Object lists are enclosed in curly braces, e.g. ``{1 "100" 6 "P12"}``, and
+  are returned as ONE field including the braces.
+
+The tokenizer is a single compiled regular expression whose alternatives
+start with disjoint characters and whose inner loops are unrolled, so each
+character is consumed exactly once and tokenizing a line is linear in its
+length.
+"""
+
+import re
+
+# Body of a quoted string: runs of plain characters separated by escapes
+_QUOTED_BODY = r'[^"\\]*(?:\\.[^"\\]*)*'
+
+# Group 1 captures the body of a quoted field (possibly unterminated),
+# group 2 captures an object list or a bare field. Exactly one group matches
+# for each token, so an empty quoted field yields ('', '').
+_TOKEN_PATTERN = (
+    r'"(' + _QUOTED_BODY + r')"?'                           # "quoted text"
+    + r'|(\{(?:[^}"]+|"' + _QUOTED_BODY + r'"?)*\}?'      # {object list}
+    + r'|[^\s"{]+)'                                        # bare field
+)
+_TOKEN_RE = re.compile(_TOKEN_PATTERN)
+
+# The same grammar over raw bytes, for parsing memory-mapped files. CP437 is
+# a single-byte superset of ASCII, so the delimiters are identical.
+_TOKEN_RE_BYTES = re.compile(_TOKEN_PATTERN.encode('ascii'))
+
+_ESCAPE_RE = re.compile(r'\\(.)')
+_ESCAPE_RE_BYTES = re.compile(rb'\\(.)')
+
+
+def unquote(value):
+    """Resolve backslash escapes in the body of a quoted field."""
+    if '\\' in value:
+        return _ESCAPE_RE.sub(r'\1', value)
+    return value
+
+
+def tokenize(line):
+    """
+    Split an SIE line into fields.
+
+    Quoted fields are returned without quotes and with escapes resolved.
+    Object lists are returned verbatim, braces included.
+
+    Args:
+        line: A single line from an SIE file
+
+    Returns:
+        List of field strings
+    """
+    if '"' not in line and line.count('{') == line.count('{}'):
+        # No quotes and at most empty object lists, as in most #TRANS rows
+        return line.split()
+    return [field or unquote(quoted) for quoted, field in _TOKEN_RE.findall(line)]
+
+
+def tokenize_bytes(line):
+    """
+    Split a raw (undecoded) SIE line into bytes fields.
+
+    Same rules as tokenize(), but nothing is decoded, so callers can decide
+    per field whether it needs a CP437 decode at all.
+
+    Args:
+        line: A single line from an SIE file as bytes
+
+    Returns:
+        List of field bytes
+    """
+    if b'"' not in line and line.count(b'{') == line.count(b'{}'):
+        return line.split()
+    tokens = []
+    for quoted, field in _TOKEN_RE_BYTES.findall(line):
+        if not field and b'\\' in quoted:
+            quoted = _ESCAPE_RE_BYTES.sub(rb'\1', quoted)
+        tokens.append(field or quoted)
+    return tokens
+
+
+def parse_object_list(field):
+    """
+    Parse an object list field into (dimension, object) pairs.
+
+    Example: '{1 "100" 6 "P12"}' -> (('1', '100'), ('6', 'P12'))
+
+    Args:
+        field: Object list as returned by tokenize(), braces included
+
+    Returns:
+        Tuple of (dimension, object_id) tuples; empty for '{}'
+    """
+    inner = field[1:-1] if field.endswith('}') else field[1:]
+    values = tokenize(inner)
+    return tuple(zip(values[0::2], values[1::2]))
@@ -0,0 +1,192 @@
+"""
+Streaming, stratified and reproducible sampling of transactions.
+
+StratifiedSampler keeps a fixed-size reservoir per stratum (Algorithm L,
+which skips ahead instead of drawing a random number for every item), so
+memory is bounded by the sample size times the number of strata, never by
+the number of transactions. With a seed the same input always gives the
+same sample.
+
+sample_table_rows() runs the sampler directly over a TransactionTable's
+columns and returns row numbers; the caller only builds output for the rows
+that were picked.
+"""
+
+import math
+import random
+
+# Ways to split transactions into strata
+STRATIFY_OPTIONS = ('account_class', 'month', 'magnitude')
+
+
+def stratum_key(stratify, account, date, amount_ore):
+    """
+    The stratum a transaction belongs to.
+
+    Args:
+        stratify: None, 'account_class' (first digit of the BAS account),
+                  'month' (YYYY-MM of the transaction date) or 'magnitude'
+                  (number of digits of the whole-krona amount)
+        account: Account number
+        date: Transaction date, YYYY-MM-DD
+        amount_ore: Amount in öre
+
+    Returns:
+        Stratum key (a string), or None without stratification
+    """
+    if stratify is None:
+        return None
+    if stratify == 'account_class':
+        return account[:1]
+    if stratify == 'month':
+        return date[:7] if len(date) >= 7 else 'unknown'
+    if stratify == 'magnitude':
+        kronor = abs(amount_ore) // 100
+        return f"1e{len(str(kronor)) - 1}" if kronor else '0'
+    check_stratify(stratify)
+
+
+def check_stratify(stratify):
+    """Raise ValueError for an unknown stratification."""
+    if stratify is not None and stratify not in STRATIFY_OPTIONS:
+        raise ValueError(f"Unknown stratification {stratify!r}, expected one of {', '.join(STRATIFY_OPTIONS)}")
+
+
+class _Reservoir:
+    """Uniform sample of up to size items from a stream (Algorithm L)."""
+
+    def __init__(self, size, rng):
+        self.size = size
+        self.rng = rng
+        self.items = []
+        self.seen = 0
+        self._next = None  # Index of the next item that enters the full reservoir
+        self._w = 1.0
+
+    def add(self, item):
+        index = self.seen
+        self.seen += 1
+        if index < self.size:
+            self.items.append(item)
+            if index == self.size - 1:
+                self._w = math.exp(math.log(self._uniform()) / self.size)
+                self._skip(index)
+        elif index == self._next:
+            self.items[self.rng.randrange(self.size)] = item
+            self._w *= math.exp(math.log(self._uniform()) / self.size)
+            self._skip(index)
+
+    def _skip(self, index):
+        if self._w >= 1.0:
+            self._next = index + 1
+        else:
+            self._next = index + 1 + int(math.log(self._uniform()) / math.log(1.0 - self._w))
+
+    def _uniform(self):
+        """A random float in (0, 1)."""
+        value = self.rng.random()
+        while value == 0.0:
+            value = self.rng.random()
+        return value
+
+
+class StratifiedSampler:
+    """
+    Reservoir sampler that spreads a fixed sample size over strata.
+
+    Every stratum that has items gets at least one sample (while the sample
+    size allows); the rest is shared in proportion to the stratum sizes.
+    """
+
+    def __init__(self, sample_size, seed=None):
+        """
+        Args:
+            sample_size: Maximum number of items in the sample
+            seed: Seed for the random generator; the same seed and input
+                  give the same sample
+        """
+        self.sample_size = sample_size
+        self.rng = random.Random(seed)
+        self._reservoirs = {}
+        self._position = 0
+
+    def add(self, stratum, item):
+        """Offer the next item of the stream."""
+        reservoir = self._reservoirs.get(stratum)
+        if reservoir is None:
+            reservoir = self._reservoirs[stratum] = _Reservoir(self.sample_size, self.rng)
+        reservoir.add((self._position, item))
+        self._position += 1
+
+    def sample(self):
+        """
+        The sampled items in the order they were added.
+
+        Returns:
+            List of (stratum, item) tuples
+        """
+        if self.sample_size <= 0:
+            return []
+        quotas = self._allocate()
+        picked = []
+        for stratum, reservoir in self._reservoirs.items():
+            for position, item in self.rng.sample(reservoir.items, quotas[stratum]):
+                picked.append((position, stratum, item))
+        picked.sort(key=lambda entry: entry[0])
+        return [(stratum, item) for _, stratum, item in picked]
+
+    def _allocate(self):
+        """Number of samples per stratum: one each first, the rest by the D'Hondt method."""
+        sizes = {stratum: reservoir.seen for stratum, reservoir in self._reservoirs.items()}
+        quotas = dict.fromkeys(sizes, 0)
+        remaining = self.sample_size
+        for stratum in sorted(sizes, key=str):
+            if remaining == 0:
+                break
+            quotas[stratum] = 1
+            remaining -= 1
+        while remaining > 0:
+            open_strata = [stratum for stratum in sizes if quotas[stratum] < sizes[stratum]]
+            if not open_strata:
+                break
+            stratum = max(open_strata, key=lambda key: sizes[key] / (quotas[key] + 1))
+            quotas[stratum] += 1
+            remaining -= 1
+        return quotas
+
+
+def sample_table_rows(table, sample_size, stratify=None, seed=None):
+    """
+    Sample rows of a TransactionTable without building objects for the others.
+
+    Args:
+        table: TransactionTable to sample from
+        sample_size: Maximum number of rows
+        stratify: See stratum_key()
+        seed: Random seed
+
+    Returns:
+        List of row numbers in table order
+    """
+    check_stratify(stratify)
+    sampler = StratifiedSampler(sample_size, seed)
+    if stratify is None:
+        for row in range(len(table)):
+            sampler.add(None, row)
+    else:
+        # Stratum per account id / date code, worked out once
+        accounts = table.accounts
+        keys = {}
+        for row, (account_id, date_code, amount_ore) in enumerate(
+                zip(table.account_id, table.date_ordinal, table.amount_ore)):
+            if stratify == 'magnitude':
+                key = stratum_key(stratify, '', '', amount_ore)
+            else:
+                cache_key = account_id if stratify == 'account_class' else date_code
+                key = keys.get(cache_key)
+                if key is None:
+                    key = keys[cache_key] = stratum_key(
+                        stratify, accounts[account_id], table.date_string(date_code), amount_ore
+                    )
+            sampler.add(key, row)
+    return [row for _, row in sampler.sample()]
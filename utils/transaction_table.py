@@ -0,0 +1,735 @@
+"""
+Columnar storage for transaction rows.
+
+SIEDataModel keeps its transactions in a TransactionTable instead of one
+Transaction object per row. Each row is an entry in a set of parallel
+integer columns; repeating values (account numbers, texts, account names,
+object lists) are stored once in symbol tables and referenced by id.
+
+The columns are `array.array` objects while rows are appended. Aggregations
+run on NumPy copies of the columns when NumPy is installed and fall back to
+plain Python loops over the arrays otherwise.
+
+Verification and Transaction objects are still available as views built on
+access (see VerificationSequence), so code that iterates over
+`model.verifications` keeps working.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from datetime import date
+from itertools import accumulate
+from json.encoder import encode_basestring
+import json
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+# Column name -> array typecode
+COLUMNS = {
+    'ver_index': 'i',     # Verification the row belongs to
+    'account_id': 'i',    # Index into TransactionTable.accounts
+    'amount_ore': 'q',    # Exact amount in öre
+    'date_ordinal': 'i',  # See TransactionTable.date_code()
+    'text_id': 'i',       # Index into TransactionTable.strings
+    'name_id': 'i',       # Account name, index into TransactionTable.strings
+    'objects_id': 'i',    # Index into TransactionTable.objects
+}
+
+# Date index keys are account_id << DAY_BITS | date ordinal
+DAY_BITS = 32
+LAST_DAY = (1 << DAY_BITS) - 1
+
+# Period name -> label of the period a date falls in
+PERIOD_LABELS = {
+    'month': lambda day: f"{day.year:04d}-{day.month:02d}",
+    'quarter': lambda day: f"{day.year:04d}-Q{(day.month - 1) // 3 + 1}",
+    'year': lambda day: f"{day.year:04d}",
+}
+
+
+def _day_ordinal(value):
+    """date.toordinal() of a YYYY-MM-DD string, None for anything else."""
+    if len(value) == 10 and value[4] == '-' and value[7] == '-':
+        try:
+            ordinal = date(int(value[:4]), int(value[5:7]), int(value[8:])).toordinal()
+        except ValueError:
+            return None
+        if date.fromordinal(ordinal).isoformat() == value:
+            return ordinal
+    return None
+
+
+def _json_text(value):
+    """Compact JSON text of a value, non-ASCII characters kept."""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+class TransactionTable:
+    """
+    Transaction rows of all verifications, stored column by column.
+
+    Rows are appended verification by verification, so the rows of
+    verification i are row_start[i] up to row_start[i + 1].
+    """
+
+    def __init__(self, use_numpy=None):
+        """
+        Args:
+            use_numpy: Run aggregations with NumPy. Defaults to whether NumPy
+                       is installed.
+        """
+        self.use_numpy = np is not None if use_numpy is None else use_numpy
+        if self.use_numpy and np is None:
+            raise ImportError("NumPy is not installed")
+
+        for name, typecode in COLUMNS.items():
+            setattr(self, name, array(typecode))
+
+        # Symbol tables
+        self.accounts = []
+        self._account_ids = {}
+        # Posting index: row numbers per account id, in file order
+        self._account_rows = []
+        self.strings = ['']
+        self._string_ids = {'': 0}
+        self.objects = [()]
+        self._object_ids = {(): 0}
+        # Dates that are not YYYY-MM-DD get negative codes into this list
+        self.odd_dates = []
+        self._date_codes = {'': 0}
+        self._date_strings = {0: ''}
+
+        # Verification headers, one entry per verification
+        self.row_start = array('q')
+        self.ver_series = []
+        self.ver_number = []
+        self.ver_date = []
+        self.ver_text = []
+        self.ver_original_number = []
+        self.ver_original_date = []
+        self.budget_transactions = {}  # Verification index -> list of Transaction
+
+        self._numpy_columns = None
+        self._date_index = None
+
+    def __len__(self):
+        """Number of transaction rows."""
+        return len(self.amount_ore)
+
+    @property
+    def n_verifications(self):
+        return len(self.row_start)
+
+    def __getstate__(self):
+        """Pickled without the id lookups and caches; the arrays pickle as raw bytes."""
+        state = self.__dict__.copy()
+        for name in ('_account_ids', '_string_ids', '_object_ids', '_date_codes'):
+            del state[name]
+        state['_numpy_columns'] = None
+        state['_date_index'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._account_ids = {account: i for i, account in enumerate(self.accounts)}
+        self._string_ids = {value: i for i, value in enumerate(self.strings)}
+        self._object_ids = {objects: i for i, objects in enumerate(self.objects)}
+        self._date_codes = {value: code for code, value in self._date_strings.items()}
+
+    # Building
+
+    def add_verification(self, series='', number='', date='', text='',
+                         original_number='', original_date=''):
+        """Start a new verification; rows added next belong to it. Returns its index."""
+        self.row_start.append(len(self.amount_ore))
+        self.ver_series.append(self._string(series))
+        self.ver_number.append(number)
+        self.ver_date.append(self._string(date))
+        self.ver_text.append(text)
+        self.ver_original_number.append(original_number)
+        self.ver_original_date.append(original_date)
+        return len(self.row_start) - 1
+
+    def add_row(self, account, amount_ore, date='', text='', account_name='', objects=()):
+        """Append a transaction row to the last verification."""
+        account_id = self._account_ids.get(account)
+        if account_id is None:
+            account_id = self._account_ids[account] = len(self.accounts)
+            self.accounts.append(account)
+            self._account_rows.append(array('q'))
+        objects_id = self._object_ids.get(objects)
+        if objects_id is None:
+            objects_id = self._object_ids[objects] = len(self.objects)
+            self.objects.append(objects)
+
+        self._account_rows[account_id].append(len(self.amount_ore))
+        self.ver_index.append(len(self.row_start) - 1)
+        self.account_id.append(account_id)
+        self.amount_ore.append(amount_ore)
+        self.date_ordinal.append(self.date_code(date))
+        self.text_id.append(self._string_id(text))
+        self.name_id.append(self._string_id(account_name))
+        self.objects_id.append(objects_id)
+        self._numpy_columns = None
+        self._date_index = None
+
+    def set_account_names(self, names):
+        """
+        Replace the account name of every row.
+
+        Args:
+            names: New account name per account id (same order as accounts)
+        """
+        name_ids = [self._string_id(name) for name in names]
+        self.name_id = array('i', [name_ids[account_id] for account_id in self.account_id])
+        self._numpy_columns = None
+
+    def extend(self, other):
+        """
+        Append the verifications and rows of another table, e.g. one built
+        from a later part of the same file.
+
+        The other table's symbol ids are mapped to this table's, so the
+        columns are copied as arrays instead of row by row.
+
+        Args:
+            other: TransactionTable
+        """
+        row_offset = len(self.amount_ore)
+        ver_offset = len(self.row_start)
+
+        account_map = []
+        for account in other.accounts:
+            account_id = self._account_ids.get(account)
+            if account_id is None:
+                account_id = self._account_ids[account] = len(self.accounts)
+                self.accounts.append(account)
+                self._account_rows.append(array('q'))
+            account_map.append(account_id)
+        string_map = [self._string_id(value) for value in other.strings]
+        object_map = []
+        for objects in other.objects:
+            objects_id = self._object_ids.get(objects)
+            if objects_id is None:
+                objects_id = self._object_ids[objects] = len(self.objects)
+                self.objects.append(objects)
+            object_map.append(objects_id)
+        # Day ordinals keep their value; only odd dates get new codes
+        date_map = {code: self.date_code(value) for code, value in other._date_strings.items()}
+
+        self.ver_index.extend(self._shifted(other.ver_index, ver_offset))
+        self.account_id.extend(self._remapped(other.account_id, account_map))
+        self.amount_ore.extend(other.amount_ore)
+        if other.odd_dates:
+            self.date_ordinal.extend(array('i', [date_map[code] for code in other.date_ordinal]))
+        else:
+            self.date_ordinal.extend(other.date_ordinal)
+        self.text_id.extend(self._remapped(other.text_id, string_map))
+        self.name_id.extend(self._remapped(other.name_id, string_map))
+        self.objects_id.extend(self._remapped(other.objects_id, object_map))
+        for other_id, rows in enumerate(other._account_rows):
+            self._account_rows[account_map[other_id]].extend(self._shifted(rows, row_offset))
+
+        self.row_start.extend(self._shifted(other.row_start, row_offset))
+        self.ver_series.extend([self._string(series) for series in other.ver_series])
+        self.ver_number.extend(other.ver_number)
+        self.ver_date.extend([self._string(ver_date) for ver_date in other.ver_date])
+        self.ver_text.extend(other.ver_text)
+        self.ver_original_number.extend(other.ver_original_number)
+        self.ver_original_date.extend(other.ver_original_date)
+        for ver_index, transactions in other.budget_transactions.items():
+            self.budget_transactions[ver_index + ver_offset] = list(transactions)
+        self._numpy_columns = None
+        self._date_index = None
+
+    def _remapped(self, column, mapping):
+        """A copy of an id column with every id i replaced by mapping[i]."""
+        if all(i == new_id for i, new_id in enumerate(mapping)):
+            return column
+        if self.use_numpy:
+            ids = np.frombuffer(column, dtype=column.typecode)
+            return array(column.typecode, np.asarray(mapping, dtype=column.typecode)[ids].tobytes())
+        return array(column.typecode, [mapping[i] for i in column])
+
+    def _shifted(self, column, offset):
+        """A copy of an index column with offset added to every value."""
+        if not offset:
+            return column
+        if self.use_numpy:
+            values = np.frombuffer(column, dtype=column.typecode) + offset
+            return array(column.typecode, values.astype(column.typecode).tobytes())
+        return array(column.typecode, [value + offset for value in column])
+
+    def add_budget_transaction(self, transaction):
+        """Attach a #BTRANS row to the last verification (kept as an object; they are few)."""
+        self.budget_transactions.setdefault(len(self.row_start) - 1, []).append(transaction)
+
+    def _string_id(self, value):
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = self._string_ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+    def _string(self, value):
+        """Shared copy of a repeating header string."""
+        return self.strings[self._string_id(value)]
+
+    def date_code(self, value):
+        """
+        Integer code for a date string.
+
+        YYYY-MM-DD dates map to date.toordinal(), the empty string to 0 and
+        anything else to a negative index into odd_dates, so the original
+        string can always be restored.
+        """
+        code = self._date_codes.get(value)
+        if code is None:
+            code = _day_ordinal(value)
+            if code is None:
+                self.odd_dates.append(value)
+                code = -len(self.odd_dates)
+            self._date_codes[value] = code
+            self._date_strings[code] = value
+        return code
+
+    def date_string(self, code):
+        """The date string for a code from the date_ordinal column."""
+        return self._date_strings[code]
+
+    # Reading
+
+    def row_range(self, ver_index):
+        """(first row, end row) of a verification."""
+        start = self.row_start[ver_index]
+        end = self.row_start[ver_index + 1] if ver_index + 1 < len(self.row_start) else len(self.amount_ore)
+        return start, end
+
+    def account_rows(self, account):
+        """Row numbers of an account's transactions in file order, from the posting index."""
+        account_id = self._account_ids.get(account)
+        return self._account_rows[account_id] if account_id is not None else array('q')
+
+    def columns(self):
+        """
+        The row columns by name: NumPy arrays when use_numpy, else the arrays themselves.
+
+        NumPy columns are copies, cached until the next row is added.
+        """
+        if not self.use_numpy:
+            return {name: getattr(self, name) for name in COLUMNS}
+        if self._numpy_columns is None:
+            self._numpy_columns = {
+                name: np.frombuffer(getattr(self, name), dtype=getattr(self, name).typecode).copy()
+                for name in COLUMNS
+            }
+        return self._numpy_columns
+
+    def transaction(self, row):
+        """A Transaction view of one row."""
+        # Imported here to avoid a circular import with utils.data_model
+        from utils.data_model import Transaction
+
+        amount_ore = self.amount_ore[row]
+        return Transaction(
+            account=self.accounts[self.account_id[row]],
+            amount=amount_ore / 100,
+            date=self._date_strings[self.date_ordinal[row]],
+            text=self.strings[self.text_id[row]],
+            account_name=self.strings[self.name_id[row]],
+            objects=self.objects[self.objects_id[row]],
+            amount_ore=amount_ore
+        )
+
+    def verification(self, ver_index):
+        """A Verification view, with Transaction views for its rows."""
+        from utils.data_model import Verification
+
+        verification = Verification(
+            series=self.ver_series[ver_index],
+            number=self.ver_number[ver_index],
+            date=self.ver_date[ver_index],
+            text=self.ver_text[ver_index],
+            original_number=self.ver_original_number[ver_index],
+            original_date=self.ver_original_date[ver_index]
+        )
+        start, end = self.row_range(ver_index)
+        verification.transactions = [self.transaction(row) for row in range(start, end)]
+        verification.budget_transactions = list(self.budget_transactions.get(ver_index, ()))
+        return verification
+
+    def verification_dicts(self):
+        """
+        Serialize all verifications, same output as Verification.to_dict().
+
+        Reads the columns directly instead of building views.
+        """
+        accounts = self.accounts
+        strings = self.strings
+        objects = self.objects
+        date_strings = self._date_strings
+        rows = zip(self.account_id, self.amount_ore, self.date_ordinal,
+                   self.text_id, self.name_id, self.objects_id)
+
+        result = []
+        for ver_index in range(len(self.row_start)):
+            start, end = self.row_range(ver_index)
+            transactions = []
+            for _ in range(end - start):
+                account_id, amount_ore, date_code, text_id, name_id, objects_id = next(rows)
+                transactions.append({
+                    'account': accounts[account_id],
+                    'amount': amount_ore / 100,
+                    'date': date_strings[date_code],
+                    'text': strings[text_id],
+                    'account_name': strings[name_id],
+                    'objects': objects[objects_id],
+                })
+            result.append({
+                'series': self.ver_series[ver_index],
+                'number': self.ver_number[ver_index],
+                'date': self.ver_date[ver_index],
+                'text': self.ver_text[ver_index],
+                'original_number': self.ver_original_number[ver_index],
+                'original_date': self.ver_original_date[ver_index],
+                'transactions': transactions,
+                'budget_transactions': [t.to_dict() for t in self.budget_transactions.get(ver_index, ())],
+            })
+        return result
+
+    def iter_verification_json(self, chunk_size=1000, lines=False):
+        """
+        Serialize all verifications as a JSON list, same content as verification_dicts().
+
+        Writes the text straight from the columns: every account number,
+        string, date and object list is encoded once and rows are joined
+        from the encoded pieces, without building a dict per row.
+
+        Args:
+            chunk_size: Verifications per yielded piece
+            lines: Write NDJSON instead, one verification object per line
+                   without the enclosing list
+
+        Yields:
+            str pieces; joined they are the JSON list (or the lines)
+        """
+        encode = encode_basestring
+        accounts = [encode(account) for account in self.accounts]
+        strings = [encode(string) for string in self.strings]
+        objects = [_json_text(objects) for objects in self.objects]
+        date_strings = {code: encode(string) for code, string in self._date_strings.items()}
+
+        n_verifications = len(self.row_start)
+        if not lines:
+            yield '['
+        for chunk_start in range(0, n_verifications, chunk_size):
+            chunk_end = min(chunk_start + chunk_size, n_verifications)
+            first = self.row_start[chunk_start]
+            last = self.row_range(chunk_end - 1)[1]
+            rows = [
+                f'{{"account":{accounts[account_id]},"amount":{amount_ore / 100!r},'
+                f'"date":{date_strings[date_code]},"text":{strings[text_id]},'
+                f'"account_name":{strings[name_id]},"objects":{objects[objects_id]}}}'
+                for account_id, amount_ore, date_code, text_id, name_id, objects_id in zip(
+                    self.account_id[first:last], self.amount_ore[first:last],
+                    self.date_ordinal[first:last], self.text_id[first:last],
+                    self.name_id[first:last], self.objects_id[first:last])
+            ]
+            pieces = []
+            for ver_index in range(chunk_start, chunk_end):
+                start, end = self.row_range(ver_index)
+                budget = self.budget_transactions.get(ver_index)
+                pieces.append(
+                    f'{{"series":{encode(self.ver_series[ver_index])},'
+                    f'"number":{encode(self.ver_number[ver_index])},'
+                    f'"date":{encode(self.ver_date[ver_index])},'
+                    f'"text":{encode(self.ver_text[ver_index])},'
+                    f'"original_number":{encode(self.ver_original_number[ver_index])},'
+                    f'"original_date":{encode(self.ver_original_date[ver_index])},'
+                    f'"transactions":[{",".join(rows[start - first:end - first])}],'
+                    f'"budget_transactions":{_json_text([t.to_dict() for t in budget]) if budget else "[]"}}}'
+                )
+            if lines:
+                yield '\n'.join(pieces) + '\n'
+            else:
+                yield (',' if chunk_start else '') + ','.join(pieces)
+        if not lines:
+            yield ']'
+
+    # Selection
+
+    def verification_days(self):
+        """
+        Date ordinal of every verification, 0 where the date is empty or not YYYY-MM-DD.
+
+        Only reads the table (a model in the ModelStore is shared between
+        request threads); each distinct date is parsed once per call.
+        """
+        days = {'': 0}
+        result = []
+        for ver_date in self.ver_date:
+            day = days.get(ver_date)
+            if day is None:
+                day = days[ver_date] = max(self._date_codes.get(ver_date) or _day_ordinal(ver_date) or 0, 0)
+            result.append(day)
+        return result
+
+    def select_verifications(self, series=None, first_day=None, last_day=None):
+        """
+        Indexes of the verifications in a series and date range.
+
+        Args:
+            series: Verification series, or None for every series
+            first_day: Ordinal of the first day (date.toordinal()), or None
+            last_day: Ordinal of the last day, inclusive, or None. With
+                      either day given, verifications without a date are
+                      left out.
+
+        Returns:
+            array of verification indexes in file order
+        """
+        ver_series = self.ver_series
+        if first_day is None and last_day is None:
+            return array('i', (
+                ver_index for ver_index in range(len(self.row_start))
+                if series is None or ver_series[ver_index] == series
+            ))
+        low = 1 if first_day is None else first_day
+        high = LAST_DAY if last_day is None else last_day
+        return array('i', (
+            ver_index for ver_index, day in enumerate(self.verification_days())
+            if low <= day <= high and (series is None or ver_series[ver_index] == series)
+        ))
+
+    def select_rows(self, series=None, first_day=None, last_day=None, account=None):
+        """
+        Row numbers of the transactions in the selected verifications.
+
+        Args:
+            series, first_day, last_day: See select_verifications(); the
+                                         verification date counts, as in
+                                         the date index
+            account: Only this account's rows (from the posting index), or None
+
+        Returns:
+            array of row numbers in file order
+        """
+        filtered = series is not None or first_day is not None or last_day is not None
+        if account is not None:
+            rows = self.account_rows(account)
+            if not filtered:
+                return array('q', rows)
+            selected = set(self.select_verifications(series, first_day, last_day))
+            ver_index = self.ver_index
+            return array('q', (row for row in rows if ver_index[row] in selected))
+        if not filtered:
+            return array('q', range(len(self.amount_ore)))
+        rows = array('q')
+        for ver_index in self.select_verifications(series, first_day, last_day):
+            rows.extend(range(*self.row_range(ver_index)))
+        return rows
+
+    # Aggregation
+
+    def sum_by_year_and_account(self):
+        """
+        Sum amounts and count rows per account id for every year, in one pass.
+
+        The year of a row is the first four characters of its verification's
+        date ('' for verifications without a date).
+
+        Returns:
+            Dict year -> (sums in öre, row counts), both lists indexed by account id
+        """
+        n_accounts = len(self.accounts)
+        year_ids = {}
+        ver_year = [year_ids.setdefault(ver_date[:4], len(year_ids)) for ver_date in self.ver_date]
+        n_years = len(year_ids)
+
+        if self.use_numpy:
+            columns = self.columns()
+            # One bincount over a combined (year, account) key
+            keys = np.asarray(ver_year, dtype=np.int64)[columns['ver_index']] * n_accounts + columns['account_id']
+            size = n_years * n_accounts
+            counts = np.bincount(keys, minlength=size).reshape(n_years, n_accounts).tolist()
+            # bincount sums in float64, which is exact for totals below 2**53 öre
+            sums = np.bincount(keys, weights=columns['amount_ore'], minlength=size)
+            sums = np.rint(sums).astype(np.int64).reshape(n_years, n_accounts).tolist()
+        else:
+            sums = [[0] * n_accounts for _ in range(n_years)]
+            counts = [[0] * n_accounts for _ in range(n_years)]
+            for ver_index, account_id, amount_ore in zip(self.ver_index, self.account_id, self.amount_ore):
+                year_id = ver_year[ver_index]
+                sums[year_id][account_id] += amount_ore
+                counts[year_id][account_id] += 1
+
+        return {year: (sums[year_id], counts[year_id]) for year, year_id in year_ids.items()}
+
+    def sum_by_account_and_period(self, period='month'):
+        """
+        Sum amounts and count rows per account id and calendar period, in one pass.
+
+        Rows are placed by their own date. Rows without a YYYY-MM-DD date go
+        to the period 'unknown', which sorts last.
+
+        Args:
+            period: 'month' (YYYY-MM), 'quarter' (YYYY-Qn) or 'year' (YYYY)
+
+        Returns:
+            (period labels in order, sums in öre, row counts); sums and counts
+            are lists of rows indexed by account id, with one column per period
+        """
+        if period not in PERIOD_LABELS:
+            raise ValueError(f"Unknown period {period!r}, expected one of {', '.join(PERIOD_LABELS)}")
+        label = PERIOD_LABELS[period]
+
+        # Label every distinct date once, then number the labels in order
+        codes = set(self._date_strings)
+        code_labels = {code: label(date.fromordinal(code)) if code > 0 else 'unknown' for code in codes}
+        periods = sorted(set(code_labels.values()), key=lambda value: (value == 'unknown', value))
+        period_ids = {value: period_id for period_id, value in enumerate(periods)}
+        code_periods = {code: period_ids[value] for code, value in code_labels.items()}
+        n_accounts = len(self.accounts)
+        n_periods = len(periods)
+
+        if self.use_numpy:
+            columns = self.columns()
+            unique_codes, inverse = np.unique(columns['date_ordinal'], return_inverse=True)
+            row_periods = np.array([code_periods[code] for code in unique_codes.tolist()], dtype=np.int64)[inverse]
+            keys = columns['account_id'].astype(np.int64) * n_periods + row_periods
+            size = n_accounts * n_periods
+            counts = np.bincount(keys, minlength=size).reshape(n_accounts, n_periods).tolist()
+            # bincount sums in float64, which is exact for totals below 2**53 öre
+            sums = np.bincount(keys, weights=columns['amount_ore'], minlength=size)
+            sums = np.rint(sums).astype(np.int64).reshape(n_accounts, n_periods).tolist()
+        else:
+            sums = [[0] * n_periods for _ in range(n_accounts)]
+            counts = [[0] * n_periods for _ in range(n_accounts)]
+            for account_id, date_code, amount_ore in zip(self.account_id, self.date_ordinal, self.amount_ore):
+                period_id = code_periods[date_code]
+                sums[account_id][period_id] += amount_ore
+                counts[account_id][period_id] += 1
+
+        # Drop periods no row falls in (e.g. 'unknown' when every row is dated)
+        used = [period_id for period_id in range(n_periods) if any(row[period_id] for row in counts)]
+        if len(used) < n_periods:
+            periods = [periods[period_id] for period_id in used]
+            sums = [[row[period_id] for period_id in used] for row in sums]
+            counts = [[row[period_id] for period_id in used] for row in counts]
+        return periods, sums, counts
+
+    def sum_by_account_between(self, first_day=None, last_day=None):
+        """
+        Sum amounts and count rows per account id for a range of verification dates.
+
+        Uses the date index, so the cost is a binary search per account
+        instead of a pass over the rows. Rows of verifications without a
+        YYYY-MM-DD date are not in the index and never counted.
+
+        Args:
+            first_day: First date ordinal included (date.toordinal()), or None
+            last_day: Last date ordinal included, or None
+
+        Returns:
+            (sums in öre, row counts), both lists indexed by account id
+        """
+        keys, cumulative = self._get_date_index()
+        first_day = 1 if first_day is None else max(first_day, 1)
+        last_day = LAST_DAY if last_day is None else min(last_day, LAST_DAY)
+        n_accounts = len(self.accounts)
+        if last_day < first_day:
+            return [0] * n_accounts, [0] * n_accounts
+
+        if self.use_numpy:
+            prefixes = np.arange(n_accounts, dtype=np.int64) << DAY_BITS
+            lo = np.searchsorted(keys, prefixes | first_day, side='left')
+            hi = np.searchsorted(keys, prefixes | last_day, side='right')
+            return (cumulative[hi] - cumulative[lo]).tolist(), (hi - lo).tolist()
+
+        sums = []
+        counts = []
+        for account_id in range(n_accounts):
+            prefix = account_id << DAY_BITS
+            lo = bisect_left(keys, prefix | first_day)
+            hi = bisect_right(keys, prefix | last_day)
+            sums.append(cumulative[hi] - cumulative[lo])
+            counts.append(hi - lo)
+        return sums, counts
+
+    def _get_date_index(self):
+        """
+        The date index, built on first use after rows were added.
+
+        Rows sorted by (account id, verification date) as combined integer
+        keys, plus the prefix sums of their amounts, so the total of any
+        account and date range is the difference of two prefix sums.
+        """
+        if self._date_index is not None:
+            return self._date_index
+
+        ver_days = self.verification_days()
+        if self.use_numpy:
+            columns = self.columns()
+            row_days = np.asarray(ver_days, dtype=np.int64)[columns['ver_index']]
+            dated = row_days > 0
+            keys = (columns['account_id'][dated].astype(np.int64) << DAY_BITS) | row_days[dated]
+            order = np.argsort(keys, kind='stable')
+            keys = keys[order]
+            cumulative = np.concatenate(([0], np.cumsum(columns['amount_ore'][dated][order])))
+        else:
+            rows = sorted(
+                (account_id << DAY_BITS | ver_days[ver_index], amount_ore)
+                for ver_index, account_id, amount_ore in zip(self.ver_index, self.account_id, self.amount_ore)
+                if ver_days[ver_index]
+            )
+            keys = [key for key, _ in rows]
+            cumulative = [0]
+            cumulative.extend(accumulate(amount_ore for _, amount_ore in rows))
+
+        self._date_index = (keys, cumulative)
+        return self._date_index
+
+
+class VerificationSequence(Sequence):
+    """
+    The verifications of a TransactionTable as a read-only list of views.
+
+    Each access builds a fresh Verification; changing it does not change the
+    table. append() adds a Verification object's data to the table.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    def __len__(self):
+        return self.table.n_verifications
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.table.verification(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("verification index out of range")
+        return self.table.verification(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.table.verification(index)
+
+    def append(self, verification):
+        """Add a Verification object (and its transactions) to the table."""
+        table = self.table
+        table.add_verification(
+            verification.series, verification.number, verification.date, verification.text,
+            verification.original_number, verification.original_date
+        )
+        for transaction in verification.transactions:
+            table.add_row(transaction.account, transaction.amount_ore, transaction.date,
+                          transaction.text, transaction.account_name, tuple(transaction.objects))
+        for transaction in verification.budget_transactions:
+            table.add_budget_transaction(transaction)